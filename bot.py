@@ -2,10 +2,15 @@
 Bot initialization and configuration module.
 Sets up the bot with handlers and necessary configurations.
 """
+import asyncio
 import os
 import logging
 from telegram.ext import ApplicationBuilder, CommandHandler, CallbackQueryHandler, MessageHandler, filters
 
+from services.escrow_service import flush_pending_transactions, start_transaction_flusher
+from services.executor import install_default_executor
+from services.notification_service import notification_service
+
 # Import handlers
 from handlers.user_handlers import start, help_command, register, my_profile
 from handlers.transaction_handlers import (
@@ -21,6 +26,9 @@ from handlers.dispute_handlers import (
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of updates processed at the same time
+CONCURRENT_UPDATES = int(os.environ.get("BOT_CONCURRENT_UPDATES", 64))
+
 def setup_bot():
     """
     Set up and configure the bot with all necessary handlers.
@@ -31,41 +39,64 @@ def setup_bot():
     if not token:
         raise ValueError("TELEGRAM_BOT_TOKEN environment variable is not set!")
     
-    # Create the Application
-    application = ApplicationBuilder().token(token).build()
+    # Create the Application; transaction actions are serialized per chat,
+    # so updates from different chats can be handled concurrently
+    application = (
+        ApplicationBuilder()
+        .token(token)
+        .concurrent_updates(CONCURRENT_UPDATES)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
     
-    # Add handlers for user management
-    application.add_handler(CommandHandler("start", start))
-    application.add_handler(CommandHandler("help", help_command))
-    application.add_handler(CommandHandler("register", register))
-    application.add_handler(CommandHandler("profile", my_profile))
+    # Add handlers for user management; every handler is non-blocking so a
+    # slow update never holds up the ones behind it
+    application.add_handler(CommandHandler("start", start, block=False))
+    application.add_handler(CommandHandler("help", help_command, block=False))
+    application.add_handler(CommandHandler("register", register, block=False))
+    application.add_handler(CommandHandler("profile", my_profile, block=False))
     
     # Add handlers for transaction management
-    application.add_handler(CommandHandler("new", create_transaction))
-    application.add_handler(CommandHandler("transactions", list_transactions))
-    application.add_handler(CommandHandler("details", transaction_details))
-    application.add_handler(CommandHandler("cancel", cancel_transaction))
-    application.add_handler(CommandHandler("complete", complete_transaction))
+    application.add_handler(CommandHandler("new", create_transaction, block=False))
+    application.add_handler(CommandHandler("transactions", list_transactions, block=False))
+    application.add_handler(CommandHandler("details", transaction_details, block=False))
+    application.add_handler(CommandHandler("cancel", cancel_transaction, block=False))
+    application.add_handler(CommandHandler("complete", complete_transaction, block=False))
     
     # Add handlers for payment management
-    application.add_handler(CommandHandler("payment_methods", payment_methods))
-    application.add_handler(CommandHandler("add_payment", add_payment_method))
-    application.add_handler(CommandHandler("pay", send_payment))
-    application.add_handler(CommandHandler("confirm_payment", confirm_payment))
+    application.add_handler(CommandHandler("payment_methods", payment_methods, block=False))
+    application.add_handler(CommandHandler("add_payment", add_payment_method, block=False))
+    application.add_handler(CommandHandler("pay", send_payment, block=False))
+    application.add_handler(CommandHandler("confirm_payment", confirm_payment, block=False))
     
     # Add handlers for dispute management
-    application.add_handler(CommandHandler("dispute", open_dispute))
-    application.add_handler(CommandHandler("resolve", resolve_dispute))
-    application.add_handler(CommandHandler("dispute_details", dispute_details))
+    application.add_handler(CommandHandler("dispute", open_dispute, block=False))
+    application.add_handler(CommandHandler("resolve", resolve_dispute, block=False))
+    application.add_handler(CommandHandler("dispute_details", dispute_details, block=False))
     
     # Add callback query handler for button interactions
-    application.add_handler(CallbackQueryHandler(button_callback))
+    application.add_handler(CallbackQueryHandler(button_callback, block=False))
     
     # Log setup completion
     logger.info("Bot handlers configured successfully")
     
     return application
 
+async def post_init(application):
+    """
+    Run startup hooks once the application's event loop is running.
+    """
+    await install_default_executor(application)
+    await start_transaction_flusher(application)
+
+async def post_shutdown(application):
+    """
+    Deliver queued notifications and write buffered transactions before exiting.
+    """
+    await notification_service.aclose(application)
+    await flush_pending_transactions(application)
+
 async def button_callback(update, context):
     """
     Handle button callbacks from inline keyboards.
@@ -74,8 +105,9 @@ async def button_callback(update, context):
     query = update.callback_query
     data = query.data
     
-    # Acknowledge the callback
-    await query.answer()
+    # Acknowledge the callback right away to clear the client's spinner,
+    # without waiting for that round-trip before doing the actual work
+    ack_task = asyncio.create_task(query.answer())
     
     try:
         # Route to appropriate handler based on callback data prefix
@@ -97,3 +129,8 @@ async def button_callback(update, context):
     except Exception as e:
         logger.error(f"Error in button callback: {e}")
         await query.edit_message_text(text="❌ An error occurred. Please try again.")
+    finally:
+        try:
+            await ack_task
+        except Exception as e:
+            logger.warning(f"Failed to answer callback query: {e}")
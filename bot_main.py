@@ -0,0 +1,49 @@
+"""
+Bot entry point for the Telegram Escrow Bot.
+Prepares the database and runs the goods & services escrow bot.
+"""
+import logging
+
+from initialize_db import initialize_database
+from db_models import create_tables
+
+logger = logging.getLogger(__name__)
+
+# Initialize database before starting the bot
+def ensure_database_setup():
+    """Make sure the database is set up correctly."""
+    try:
+        logger.info("Initializing database...")
+        success = initialize_database()
+        if success:
+            logger.info("Database initialized successfully.")
+            return True
+        else:
+            logger.error("Failed to initialize database.")
+            # Fallback to just creating tables
+            try:
+                create_tables()
+                logger.info("Tables created successfully using fallback method.")
+                return True
+            except Exception as e:
+                logger.error(f"Failed to create tables: {e}")
+                return False
+    except Exception as e:
+        logger.error(f"Error during database initialization: {e}")
+        return False
+
+def main():
+    """Set up the database and start the bot."""
+    try:
+        # Initialize database first
+        db_ready = ensure_database_setup()
+        if not db_ready:
+            logger.warning("Database might not be fully initialized. Bot may encounter issues.")
+        
+        # Set up and start the goods & services escrow bot
+        from goods_escrow_bot import main as run_bot
+        
+        logger.info("Starting AI ESCROW BOT...")
+        run_bot()
+    except Exception as e:
+        logger.error(f"Error in main function: {e}")
@@ -2,12 +2,13 @@
 Database models for the Telegram Escrow Bot.
 These models will be stored in the PostgreSQL database.
 """
+import functools
 import os
 from datetime import datetime
-from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, ForeignKey, Boolean, Text
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, ForeignKey, Boolean, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
-from sqlalchemy import create_engine
+from sqlalchemy.orm import relationship, raiseload
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.dialects.postgresql import JSONB
 
@@ -22,11 +23,48 @@ if not DB_URL:
 if DB_URL.startswith("postgres://"):
     DB_URL = DB_URL.replace("postgres://", "postgresql://", 1)
 
-engine = create_engine(DB_URL, pool_pre_ping=True, pool_recycle=300)
+# Pool settings, overridable per deployment. Pre-ping costs a round-trip per checkout,
+# so it is off by default: stale connections are retried by the services instead.
+DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', '').lower() in ('1', 'true', 'yes')
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 20))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 40))
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+# Compiled SQL cache shared by every service using the engine (SQLAlchemy's default is 500)
+DB_QUERY_CACHE_SIZE = int(os.environ.get('DB_QUERY_CACHE_SIZE', 1200))
+
+# Development aid: make lazy relationship loads raise, so N+1 query patterns fail loudly
+DB_RAISELOAD = os.environ.get('DB_RAISELOAD', '').lower() in ('1', 'true', 'yes')
+
+@functools.lru_cache(maxsize=None)
+def get_engine():
+    """
+    Get the process-wide database engine, creating it on first use.
+    
+    Returns:
+        The shared SQLAlchemy engine
+    """
+    return create_engine(
+        DB_URL,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_recycle=DB_POOL_RECYCLE,
+        query_cache_size=DB_QUERY_CACHE_SIZE,
+        connect_args={"connect_timeout": 5}
+    )
+
+engine = get_engine()
 
 # Create a session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+if DB_RAISELOAD:
+    @event.listens_for(SessionLocal, "do_orm_execute")
+    def _raise_on_lazy_load(execute_state):
+        """Apply raiseload('*') to every top-level ORM SELECT."""
+        if execute_state.is_select and not execute_state.is_relationship_load:
+            execute_state.statement = execute_state.statement.options(raiseload("*"))
+
 
 class User(Base):
     """
@@ -93,6 +131,12 @@ class Transaction(Base):
     # Renamed from metadata to avoid conflicts with SQLAlchemy's internal attribute
     transaction_data = Column(JSONB, nullable=True)
 
+    # Per-user queries filter on one party and count by status
+    __table_args__ = (
+        Index("ix_txn_seller_status", "seller_id", "status"),
+        Index("ix_txn_buyer_status", "buyer_id", "status"),
+    )
+
     # Relationships
     seller = relationship("User", foreign_keys=[seller_id], back_populates="transactions_as_seller")
     buyer = relationship("User", foreign_keys=[buyer_id], back_populates="transactions_as_buyer")
@@ -174,6 +218,9 @@ class WalletTransaction(Base):
 # Create all tables in the database
 def create_tables():
     Base.metadata.create_all(bind=engine)
+    # create_all skips the indexes of tables that already exist
+    for index in Transaction.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
 
 
 # Get a database session
@@ -4,9 +4,10 @@ Handles conflicts between buyers and sellers with professional moderation
 """
 
 import os
+import secrets
 import uuid
 from datetime import datetime, timedelta
-from sqlalchemy import create_engine, Column, String, Integer, DateTime, Text, Boolean, Float
+from sqlalchemy import Column, String, Integer, DateTime, Text, Boolean, Float
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.dialects.postgresql import JSONB
@@ -126,7 +127,8 @@ class DisputeSystem:
         if not database_url:
             raise ValueError("DATABASE_URL environment variable not set")
         
-        self.engine = create_engine(database_url)
+        from db_models import get_engine
+        self.engine = get_engine()
         Base.metadata.create_all(self.engine)
         Session = sessionmaker(bind=self.engine)
         self.session = Session()
@@ -171,7 +173,7 @@ class DisputeSystem:
                     seller_id, seller_username, dispute_type, opened_by, 
                     dispute_reason, evidence, dispute_amount, currency):
         """Open a new dispute case"""
-        dispute_id = f"DSP-{str(uuid.uuid4())[:8].upper()}"
+        dispute_id = f"DSP-{secrets.token_hex(4).upper()}"
         
         # Determine priority based on amount and dispute type
         priority = self._calculate_priority(dispute_amount, dispute_type)
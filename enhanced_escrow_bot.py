@@ -5,7 +5,7 @@ Similar to Binance P2P, Paxful, and AirTM
 """
 import os
 import logging
-import uuid
+import secrets
 from datetime import datetime
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ApplicationBuilder, CommandHandler, CallbackQueryHandler, MessageHandler, filters, ContextTypes
@@ -346,7 +346,7 @@ Example: "0.01 BTC at $45,000 via PayPal - Fast payment required"
         details = update.message.text
         
         # Generate trade ID
-        trade_id = f"T{uuid.uuid4().hex[:8].upper()}"
+        trade_id = f"T{secrets.token_hex(4).upper()}"
         
         confirmation_text = f"""
 ✅ *Trade Offer Created!*
@@ -6,7 +6,7 @@ With real crypto payments and Binance Pay integration
 """
 import os
 import logging
-import uuid
+import secrets
 import json
 from datetime import datetime, timedelta
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
@@ -15,6 +15,8 @@ from payment_gateways import payment_manager
 from trust_system import trust_system
 from dispute_system import dispute_system
 from ai_assistant import ai_assistant
+from utils.helpers import run_application
+from services.executor import install_default_executor
 
 # Configure logging
 logging.basicConfig(
@@ -703,7 +705,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     if context.user_data.get('creating_agreement'):
         category = context.user_data['creating_agreement']
-        trade_id = f"ESC{uuid.uuid4().hex[:6].upper()}"
+        trade_id = f"ESC{secrets.token_hex(3).upper()}"
         
         # Store the agreement
         active_trades[trade_id] = {
@@ -746,7 +748,7 @@ Your listing is now active in the marketplace! 🚀
         
     elif context.user_data.get('filing_dispute'):
         trade_id = "ESC004"  # Example trade ID
-        dispute_id = f"DIS{uuid.uuid4().hex[:6].upper()}"
+        dispute_id = f"DIS{secrets.token_hex(3).upper()}"
         
         response = f"""
 ⚖️ *Dispute Filed Successfully*
@@ -987,10 +989,10 @@ async def show_user_profile(query, context):
     user_id = str(user.id)
     
     # Get or create user profile
-    trust_system.get_or_create_user(user_id, user.username, user.first_name)
+    await trust_system.get_or_create_user_async(user_id, user.username, user.first_name)
     
     # Get comprehensive user statistics
-    stats = trust_system.get_user_stats(user_id)
+    stats = await trust_system.get_user_stats_async(user_id)
     
     if not stats:
         # Create demo profile data for new users
@@ -2326,10 +2328,8 @@ Your details have been logged:
 
 async def contact_seller(query, context, seller_name):
     """Handle buyer contacting specific seller"""
-    import uuid
-    
     # Generate unique buyer ID for this session
-    buyer_id = str(uuid.uuid4())[:8].upper()
+    buyer_id = secrets.token_hex(4).upper()
     buyer = query.from_user
     
     # Store buyer info in context for this transaction
@@ -2617,7 +2617,13 @@ def main():
         raise ValueError("TELEGRAM_BOT_TOKEN not found!")
     
     # Create application
-    app = Application.builder().token(token).build()
+    app = (
+        Application.builder()
+        .token(token)
+        .post_init(install_default_executor)
+        .post_shutdown(payment_manager.aclose)
+        .build()
+    )
     
     # Add handlers
     app.add_handler(CommandHandler("start", start))
@@ -2626,7 +2632,7 @@ def main():
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
     
     logger.info("🛡️ AI ESCROW BOT Started!")
-    app.run_polling(allowed_updates=["message", "callback_query"])
+    run_application(app, allowed_updates=["message", "callback_query"])
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -12,8 +12,8 @@ from services.escrow_service import EscrowService
 from config import TransactionStatus, DisputeStatus
 
 logger = logging.getLogger(__name__)
-user_service = UserService()
-escrow_service = EscrowService()
+user_service = UserService.get()
+escrow_service = EscrowService.get()
 
 # Conversation states
 REASON, EVIDENCE = range(2)
@@ -29,7 +29,7 @@ async def open_dispute(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
     user_id = update.effective_user.id
     
     # Check if user is registered
-    if not user_service.get_user(user_id):
+    if not await user_service.get_user_async(user_id):
         await update.message.reply_text(
             "You need to register first! Use /register to create an account."
         )
@@ -52,7 +52,7 @@ async def open_dispute(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
         return ConversationHandler.END
     
     # Check if user is part of this transaction
-    if user_id != transaction.seller_id and user_id != transaction.buyer_id:
+    if user_id not in (transaction.seller_id, transaction.buyer_id):
         await update.message.reply_text(
             "You don't have access to this transaction."
         )
@@ -187,7 +187,7 @@ async def resolve_dispute(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     # In a real implementation, this would be restricted to admins
     
     # Check if user is registered
-    if not user_service.get_user(user_id):
+    if not await user_service.get_user_async(user_id):
         await update.message.reply_text(
             "You need to register first! Use /register to create an account."
         )
@@ -226,7 +226,7 @@ async def resolve_dispute(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     
     # Check if user is part of this transaction
     # In a real implementation, this would check for admin privileges
-    if user_id != transaction.seller_id and user_id != transaction.buyer_id:
+    if user_id not in (transaction.seller_id, transaction.buyer_id):
         await update.message.reply_text(
             "You don't have access to this transaction."
         )
@@ -289,7 +289,7 @@ async def dispute_details(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     user_id = update.effective_user.id
     
     # Check if user is registered
-    if not user_service.get_user(user_id):
+    if not await user_service.get_user_async(user_id):
         await update.message.reply_text(
             "You need to register first! Use /register to create an account."
         )
@@ -312,7 +312,7 @@ async def dispute_details(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         return
     
     # Check if user is part of this transaction
-    if user_id != transaction.seller_id and user_id != transaction.buyer_id:
+    if user_id not in (transaction.seller_id, transaction.buyer_id):
         await update.message.reply_text(
             "You don't have access to this transaction."
         )
@@ -340,29 +340,29 @@ async def dispute_details(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     details = (
         f"*Dispute Details*\n\n"
         f"Transaction: {transaction.title} (`{transaction_id}`)\n"
-        f"Status: {dispute['status'].capitalize()}\n"
-        f"Opened by: {'Seller' if dispute['opened_by'] == 'seller' else 'Buyer'}\n"
-        f"Date Opened: {dispute['opened_at']}\n\n"
-        f"*Reason for Dispute:*\n{dispute['reason']}\n\n"
-        f"*Evidence:*\n{dispute['evidence']}\n\n"
+        f"Status: {dispute.status.capitalize()}\n"
+        f"Opened by: {'Seller' if dispute.opened_by == 'seller' else 'Buyer'}\n"
+        f"Date Opened: {dispute.opened_at:%Y-%m-%d %H:%M:%S}\n\n"
+        f"*Reason for Dispute:*\n{dispute.reason}\n\n"
+        f"*Evidence:*\n{dispute.evidence}\n\n"
     )
     
-    if dispute['response']:
-        details += f"*Counterparty Response:*\n{dispute['response']}\n\n"
+    if dispute.response:
+        details += f"*Counterparty Response:*\n{dispute.response}\n\n"
     
-    if dispute['resolution']:
+    if dispute.resolution:
         details += (
             f"*Resolution:*\n"
-            f"Outcome: {dispute['resolution'].capitalize()}\n"
-            f"Date Resolved: {dispute['resolved_at']}\n\n"
+            f"Outcome: {dispute.resolution.capitalize()}\n"
+            f"Date Resolved: {dispute.resolved_at:%Y-%m-%d %H:%M:%S}\n\n"
         )
     
     # Add action buttons if dispute is open
     keyboard = []
     
-    if dispute['status'] == DisputeStatus.OPEN:
+    if dispute.status == DisputeStatus.OPEN:
         # Show different options based on who opened the dispute and the user's role
-        if dispute['opened_by'] != user_role:
+        if dispute.opened_by != user_role:
             # User is responding to the dispute
             keyboard.append([InlineKeyboardButton("Respond to Dispute", callback_data=f"dispute_respond_{transaction_id}")])
         
@@ -404,7 +404,7 @@ async def dispute_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         return
     
     # Check if user is part of this transaction
-    if user_id != transaction.seller_id and user_id != transaction.buyer_id:
+    if user_id not in (transaction.seller_id, transaction.buyer_id):
         await query.edit_message_text("You don't have access to this transaction.")
         return
     
@@ -422,29 +422,29 @@ async def dispute_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         details = (
             f"*Dispute Details*\n\n"
             f"Transaction: {transaction.title} (`{transaction_id}`)\n"
-            f"Status: {dispute['status'].capitalize()}\n"
-            f"Opened by: {'Seller' if dispute['opened_by'] == 'seller' else 'Buyer'}\n"
-            f"Date Opened: {dispute['opened_at']}\n\n"
-            f"*Reason for Dispute:*\n{dispute['reason']}\n\n"
-            f"*Evidence:*\n{dispute['evidence']}\n\n"
+            f"Status: {dispute.status.capitalize()}\n"
+            f"Opened by: {'Seller' if dispute.opened_by == 'seller' else 'Buyer'}\n"
+            f"Date Opened: {dispute.opened_at:%Y-%m-%d %H:%M:%S}\n\n"
+            f"*Reason for Dispute:*\n{dispute.reason}\n\n"
+            f"*Evidence:*\n{dispute.evidence}\n\n"
         )
         
-        if dispute['response']:
-            details += f"*Counterparty Response:*\n{dispute['response']}\n\n"
+        if dispute.response:
+            details += f"*Counterparty Response:*\n{dispute.response}\n\n"
         
-        if dispute['resolution']:
+        if dispute.resolution:
             details += (
                 f"*Resolution:*\n"
-                f"Outcome: {dispute['resolution'].capitalize()}\n"
-                f"Date Resolved: {dispute['resolved_at']}\n\n"
+                f"Outcome: {dispute.resolution.capitalize()}\n"
+                f"Date Resolved: {dispute.resolved_at:%Y-%m-%d %H:%M:%S}\n\n"
             )
         
         # Add action buttons if dispute is open
         keyboard = []
         
-        if dispute['status'] == DisputeStatus.OPEN:
+        if dispute.status == DisputeStatus.OPEN:
             # Show different options based on who opened the dispute and the user's role
-            if dispute['opened_by'] != user_role:
+            if dispute.opened_by != user_role:
                 # User is responding to the dispute
                 keyboard.append([InlineKeyboardButton("Respond to Dispute", callback_data=f"dispute_respond_{transaction_id}")])
             
@@ -13,9 +13,9 @@ from services.payment_service import PaymentService
 from config import SUPPORTED_FIAT_METHODS, SUPPORTED_CRYPTO_METHODS, TransactionStatus
 
 logger = logging.getLogger(__name__)
-user_service = UserService()
-escrow_service = EscrowService()
-payment_service = PaymentService()
+user_service = UserService.get()
+escrow_service = EscrowService.get()
+payment_service = PaymentService.get()
 
 # Conversation states
 METHOD_TYPE, METHOD_DETAILS, CONFIRM = range(3)
@@ -31,7 +31,7 @@ async def payment_methods(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     user_id = update.effective_user.id
     
     # Check if user is registered
-    if not user_service.get_user(user_id):
+    if not await user_service.get_user_async(user_id):
         await update.message.reply_text(
             "You need to register first! Use /register to create an account."
         )
@@ -95,7 +95,7 @@ async def add_payment_method(update: Update, context: ContextTypes.DEFAULT_TYPE)
     user_id = update.effective_user.id
     
     # Check if user is registered
-    if not user_service.get_user(user_id):
+    if not await user_service.get_user_async(user_id):
         await update.message.reply_text(
             "You need to register first! Use /register to create an account."
         )
@@ -272,7 +272,7 @@ async def send_payment(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     user_id = update.effective_user.id
     
     # Check if user is registered
-    if not user_service.get_user(user_id):
+    if not await user_service.get_user_async(user_id):
         await update.message.reply_text(
             "You need to register first! Use /register to create an account."
         )
@@ -378,7 +378,7 @@ async def confirm_payment(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     user_id = update.effective_user.id
     
     # Check if user is registered
-    if not user_service.get_user(user_id):
+    if not await user_service.get_user_async(user_id):
         await update.message.reply_text(
             "You need to register first! Use /register to create an account."
         )
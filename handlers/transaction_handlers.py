@@ -2,26 +2,197 @@
 Transaction management handlers for the Telegram Escrow Bot.
 Handles transaction creation, listing, details, cancellation, and completion.
 """
+import asyncio
+import functools
 import logging
-import uuid
+import random
+import re
+import string
+from typing import Dict, List, Optional, Tuple
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
 
 from models.transaction import Transaction
-from models.user import User
 from services.user_service import UserService
 from services.escrow_service import EscrowService
+from services.notification_service import notification_service
+from utils.cache import TTLCache
 from config import TransactionStatus, UserRole, TRANSACTION_FEE_PERCENTAGE
 
 logger = logging.getLogger(__name__)
-user_service = UserService()
-escrow_service = EscrowService()
+user_service = UserService.get()
+escrow_service = EscrowService.get()
 
 # Conversation states
 TITLE, DESCRIPTION, AMOUNT, PAYMENT_METHOD, CONFIRM = range(5)
 
-# Store conversation data temporarily
-conv_data = {}
+# Number of transactions shown per page of the transactions list
+TRANSACTIONS_PAGE_SIZE = 5
+
+# Store conversation data temporarily; abandoned conversations expire after 30 minutes
+conv_data = TTLCache(maxsize=10_000, ttl=1800)
+
+# Payment methods funded off-chain; everything else gets crypto deposit instructions
+FIAT_PAYMENT_METHODS = frozenset({"bank", "paypal"})
+
+# Reply templates for the cancel/complete/fund prompts
+CANCEL_CONFIRM_TMPL = (
+    "Are you sure you want to cancel transaction `{transaction_id}`?\n\n"
+    "Title: {title}\n"
+    "Amount: ${amount:.2f}\n\n"
+    "This action cannot be undone."
+)
+COMPLETE_CONFIRM_TMPL = (
+    "Are you confirming that you've received the goods/services for transaction `{transaction_id}`?\n\n"
+    "Title: {title}\n"
+    "Amount: ${amount:.2f}\n\n"
+    "This will release the funds to the seller and cannot be undone."
+)
+_FUND_HEADER_TMPL = (
+    "*Payment Instructions*\n\n"
+    "Transaction: {title}\n"
+    "Amount: ${amount:.2f}\n"
+    "Fee: ${fee:.2f}\n"
+    "Total: ${total:.2f}\n"
+    "Payment Method: {payment_method}\n\n"
+)
+FUND_FIAT_TMPL = _FUND_HEADER_TMPL + (
+    "To proceed with payment:\n"
+    "1. Use /pay {transaction_id} to get detailed payment instructions\n"
+    "2. After sending payment, use /confirm_payment {transaction_id}\n"
+    "3. The seller will verify your payment\n\n"
+    "Your funds will be held in escrow until you confirm receipt of goods/services."
+)
+FUND_CRYPTO_TMPL = _FUND_HEADER_TMPL + (
+    "To proceed with crypto payment:\n"
+    "1. Use /pay {transaction_id} to get the deposit address\n"
+    "2. Send exactly the requested amount to the provided address\n"
+    "3. After sending, use /confirm_payment {transaction_id}\n\n"
+    "Your funds will be held in escrow until you confirm receipt of goods/services."
+)
+
+# Row templates for the transaction lists
+TXN_ROW_TMPL = (
+    "ID: `{id}`\n"
+    "Title: {title}\n"
+    "Amount: ${amount:.2f}\n"
+    "Status: {status}\n"
+    "Role: {role}\n"
+    "Counterparty: @{counterparty}\n"
+)
+TXN_ROW_DATED_TMPL = TXN_ROW_TMPL + "Created: {created}\n"
+TXN_LIST_HEADER = "*Your Transactions*\n\n"
+TXN_LIST_FOOTER = "(Use /details [ID] to see more details)"
+
+# Action buttons shown by /details, keyed by (transaction status, user role)
+_NO_BUTTONS = lambda tid: []
+_DETAIL_BUTTONS = {
+    (TransactionStatus.CREATED, "Buyer"): lambda tid: [
+        [InlineKeyboardButton("Fund Transaction", callback_data=f"txn_fund_{tid}")]
+    ],
+    (TransactionStatus.CREATED, "Seller"): lambda tid: [
+        [InlineKeyboardButton("Cancel Transaction", callback_data=f"txn_cancel_{tid}")]
+    ],
+    (TransactionStatus.FUNDED, "Seller"): lambda tid: [
+        [InlineKeyboardButton("Confirm Receipt", callback_data=f"txn_confirm_{tid}")]
+    ],
+    (TransactionStatus.FUNDED, "Buyer"): lambda tid: [
+        [InlineKeyboardButton("Open Dispute", callback_data=f"dispute_open_{tid}")]
+    ],
+    (TransactionStatus.CONFIRMED, "Buyer"): lambda tid: [
+        [InlineKeyboardButton("Complete Transaction", callback_data=f"txn_complete_{tid}")],
+        [InlineKeyboardButton("Open Dispute", callback_data=f"dispute_open_{tid}")]
+    ],
+    (TransactionStatus.DISPUTED, "Buyer"): lambda tid: [
+        [InlineKeyboardButton("View Dispute", callback_data=f"dispute_view_{tid}")]
+    ],
+    (TransactionStatus.DISPUTED, "Seller"): lambda tid: [
+        [InlineKeyboardButton("View Dispute", callback_data=f"dispute_view_{tid}")]
+    ],
+}
+
+@functools.lru_cache(maxsize=4096)
+def _details_markup(status: str, role: str, transaction_id: str) -> Optional[InlineKeyboardMarkup]:
+    """Build (and memoize) the /details keyboard for a transaction, or None if it has no actions."""
+    keyboard = _DETAIL_BUTTONS.get((status, role), _NO_BUTTONS)(transaction_id)
+    return InlineKeyboardMarkup(keyboard) if keyboard else None
+
+@functools.lru_cache(maxsize=4096)
+def _cancel_keyboard(transaction_id: str) -> InlineKeyboardMarkup:
+    """Build the yes/no keyboard for cancelling a transaction."""
+    return InlineKeyboardMarkup([
+        [
+            InlineKeyboardButton("Yes, Cancel", callback_data=f"txn_cancel_confirm_{transaction_id}"),
+            InlineKeyboardButton("No, Keep", callback_data=f"txn_cancel_abort_{transaction_id}")
+        ]
+    ])
+
+@functools.lru_cache(maxsize=4096)
+def _complete_keyboard(transaction_id: str) -> InlineKeyboardMarkup:
+    """Build the yes/no keyboard for completing a transaction."""
+    return InlineKeyboardMarkup([
+        [
+            InlineKeyboardButton("Yes, Complete", callback_data=f"txn_complete_confirm_{transaction_id}"),
+            InlineKeyboardButton("No, Not Yet", callback_data=f"txn_complete_abort_{transaction_id}")
+        ]
+    ])
+
+@functools.lru_cache(maxsize=4096)
+def _pay_keyboard(transaction_id: str) -> InlineKeyboardMarkup:
+    """Build the keyboard that starts funding a transaction."""
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton("Make Payment", callback_data=f"pay_init_{transaction_id}")]
+    ])
+
+# Per-chat locks as [lock, number of holders and waiters]; entries are dropped when unused
+_chat_locks: Dict[int, List] = {}
+
+def per_chat_serialized(handler):
+    """
+    Serialize a handler per chat so updates from one chat are processed in order
+    while other chats proceed concurrently.
+    """
+    @functools.wraps(handler)
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        chat = update.effective_chat
+        if chat is None:
+            return await handler(update, context)
+        
+        entry = _chat_locks.get(chat.id)
+        if entry is None:
+            entry = _chat_locks[chat.id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                return await handler(update, context)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _chat_locks[chat.id]
+    
+    return wrapper
+
+class TransactionNotFoundError(LookupError):
+    """Raised when a transaction ID does not resolve to a transaction."""
+
+
+async def _fetch_authorized(transaction_id: str, user_id: int) -> Tuple[Transaction, str]:
+    """
+    Fetch a transaction and resolve the caller's role in it.
+    
+    Raises:
+        TransactionNotFoundError: If the transaction does not exist
+        PermissionError: If the user is neither the seller nor the buyer
+    """
+    transaction = escrow_service.get_transaction(transaction_id)
+    if not transaction:
+        raise TransactionNotFoundError(transaction_id)
+    
+    if user_id == transaction.seller_id:
+        return transaction, "Seller"
+    if user_id == transaction.buyer_id:
+        return transaction, "Buyer"
+    raise PermissionError(f"User {user_id} is not part of transaction {transaction_id}")
 
 async def create_transaction(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """
@@ -33,7 +204,7 @@ async def create_transaction(update: Update, context: ContextTypes.DEFAULT_TYPE)
     first_name = update.effective_user.first_name
     
     # Check if user is registered
-    if not user_service.get_user(user_id):
+    if not await user_service.get_user_async(user_id):
         # Create inline keyboard for registration
         keyboard = [
             [InlineKeyboardButton("✅ Register Now", callback_data="user_register")]
@@ -84,7 +255,8 @@ async def create_transaction(update: Update, context: ContextTypes.DEFAULT_TYPE)
         )
         return ConversationHandler.END
     
-    # Initialize conversation data
+    # Initialize conversation data, sweeping out abandoned conversations first
+    conv_data.expire()
     conv_data[user_id] = {
         'role': UserRole.SELLER,  # Default to seller role
         'user_id': user_id,
@@ -486,8 +658,6 @@ async def transaction_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE
         
         # Generate a memorable transaction ID
         # Format: 2 letters + 6 numbers for better readability
-        import random
-        import string
         letters = ''.join(random.choice(string.ascii_uppercase) for _ in range(2))
         numbers = ''.join(random.choice(string.digits) for _ in range(6))
         transaction_id = f"{letters}{numbers}"
@@ -597,14 +767,14 @@ async def list_transactions(update: Update, context: ContextTypes.DEFAULT_TYPE)
     user_id = update.effective_user.id
     
     # Check if user is registered
-    if not user_service.get_user(user_id):
+    if not await user_service.get_user_async(user_id):
         await update.message.reply_text(
             "You need to register first! Use /register to create an account."
         )
         return
     
-    # Get user's transactions
-    transactions = escrow_service.get_user_transactions(user_id)
+    # Get the user's most recent transactions
+    transactions = escrow_service.get_user_transactions(user_id, limit=TRANSACTIONS_PAGE_SIZE)
     
     if not transactions:
         await update.message.reply_text(
@@ -613,32 +783,23 @@ async def list_transactions(update: Update, context: ContextTypes.DEFAULT_TYPE)
         )
         return
     
-    # Build transactions list
-    header = "*Your Transactions*\n\n"
-    transaction_list = []
-    
+    # Build transactions list in a single join
+    parts = [TXN_LIST_HEADER]
     for txn in transactions:
         role = "Seller" if txn.seller_id == user_id else "Buyer"
         counterparty = txn.buyer_username if role == "Seller" else txn.seller_username
-        counterparty = counterparty or "Not joined yet"
-        
-        txn_text = (
-            f"ID: `{txn.id}`\n"
-            f"Title: {txn.title}\n"
-            f"Amount: ${txn.amount:.2f}\n"
-            f"Status: {txn.status.capitalize()}\n"
-            f"Role: {role}\n"
-            f"Counterparty: @{counterparty}\n"
-            f"Created: {txn.created_at.strftime('%Y-%m-%d')}\n"
-        )
-        transaction_list.append(txn_text)
-    
-    # Create paginated view if needed
-    if len(transaction_list) > 5:
-        # Only show first 5 transactions
-        transactions_text = header + "\n\n".join(transaction_list[:5]) + "\n\n(Use /details [ID] to see more details)"
-    else:
-        transactions_text = header + "\n\n".join(transaction_list) + "\n\n(Use /details [ID] to see more details)"
+        parts.append(TXN_ROW_DATED_TMPL.format(
+            id=txn.id,
+            title=txn.title,
+            amount=txn.amount,
+            status=txn.status.capitalize(),
+            role=role,
+            counterparty=counterparty or "Not joined yet",
+            created=txn.created_at_str
+        ))
+        parts.append("\n\n")
+    parts.append(TXN_LIST_FOOTER)
+    transactions_text = "".join(parts)
     
     await update.message.reply_text(
         transactions_text,
@@ -653,7 +814,7 @@ async def transaction_details(update: Update, context: ContextTypes.DEFAULT_TYPE
     user_id = update.effective_user.id
     
     # Check if user is registered
-    if not user_service.get_user(user_id):
+    if not await user_service.get_user_async(user_id):
         await update.message.reply_text(
             "You need to register first! Use /register to create an account."
         )
@@ -667,88 +828,52 @@ async def transaction_details(update: Update, context: ContextTypes.DEFAULT_TYPE
         return
     
     transaction_id = context.args[0]
-    transaction = escrow_service.get_transaction(transaction_id)
-    
-    if not transaction:
+    try:
+        transaction, role = await _fetch_authorized(transaction_id, user_id)
+    except TransactionNotFoundError:
         await update.message.reply_text(
             f"Transaction with ID {transaction_id} not found."
         )
         return
-    
-    # Check if user is part of this transaction
-    if user_id != transaction.seller_id and user_id != transaction.buyer_id:
+    except PermissionError:
         await update.message.reply_text(
             "You don't have access to this transaction."
         )
         return
     
-    # Determine user's role in this transaction
-    role = "Seller" if transaction.seller_id == user_id else "Buyer"
+    # Counterparty information
+    if role == "Seller":
+        counterparty = f"Buyer: @{transaction.buyer_username}\n" if transaction.buyer_id else "Buyer: Not joined yet\n"
+    else:
+        counterparty = f"Seller: @{transaction.seller_username}\n"
     
-    # Build transaction details
-    details = (
+    # Build transaction details in a single join
+    details = "".join((
         f"*Transaction Details*\n\n"
         f"ID: `{transaction.id}`\n"
         f"Title: {transaction.title}\n"
         f"Description: {transaction.description}\n"
         f"Amount: ${transaction.amount:.2f}\n"
         f"Escrow Fee: ${transaction.fee:.2f}\n"
-        f"Total: ${transaction.amount + transaction.fee:.2f}\n"
+        f"Total: ${transaction.total_amount:.2f}\n"
         f"Status: {transaction.status.capitalize()}\n"
-        f"Payment Method: {transaction.payment_method.capitalize()}\n"
-        f"Your Role: {role}\n"
-    )
-    
-    # Add counterparty information
-    if role == "Seller":
-        if transaction.buyer_id:
-            details += f"Buyer: @{transaction.buyer_username}\n"
-        else:
-            details += "Buyer: Not joined yet\n"
-    else:
-        details += f"Seller: @{transaction.seller_username}\n"
-    
-    # Add timestamps
-    details += f"Created: {transaction.created_at.strftime('%Y-%m-%d %H:%M')}\n"
-    if transaction.updated_at:
-        details += f"Last Updated: {transaction.updated_at.strftime('%Y-%m-%d %H:%M')}\n"
+        f"Payment Method: {transaction.payment_method_display}\n"
+        f"Your Role: {role}\n",
+        counterparty,
+        f"Created: {transaction.created_at_dt:%Y-%m-%d %H:%M}\n",
+        f"Last Updated: {transaction.updated_at_dt:%Y-%m-%d %H:%M}\n" if transaction.updated_at else "",
+    ))
     
     # Add action buttons based on transaction status and user role
-    keyboard = []
-    
-    if transaction.status == TransactionStatus.CREATED:
-        if role == "Buyer":
-            keyboard.append([InlineKeyboardButton("Fund Transaction", callback_data=f"txn_fund_{transaction.id}")])
-        elif role == "Seller":
-            keyboard.append([InlineKeyboardButton("Cancel Transaction", callback_data=f"txn_cancel_{transaction.id}")])
-    
-    elif transaction.status == TransactionStatus.FUNDED:
-        if role == "Seller":
-            keyboard.append([InlineKeyboardButton("Confirm Receipt", callback_data=f"txn_confirm_{transaction.id}")])
-        elif role == "Buyer":
-            keyboard.append([InlineKeyboardButton("Open Dispute", callback_data=f"dispute_open_{transaction.id}")])
-    
-    elif transaction.status == TransactionStatus.CONFIRMED:
-        if role == "Buyer":
-            keyboard.append([InlineKeyboardButton("Complete Transaction", callback_data=f"txn_complete_{transaction.id}")])
-            keyboard.append([InlineKeyboardButton("Open Dispute", callback_data=f"dispute_open_{transaction.id}")])
-    
-    elif transaction.status == TransactionStatus.DISPUTED:
-        keyboard.append([InlineKeyboardButton("View Dispute", callback_data=f"dispute_view_{transaction.id}")])
+    reply_markup = _details_markup(transaction.status, role, transaction.id)
     
-    if keyboard:
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await update.message.reply_text(
-            details,
-            reply_markup=reply_markup,
-            parse_mode="Markdown"
-        )
-    else:
-        await update.message.reply_text(
-            details,
-            parse_mode="Markdown"
-        )
+    await update.message.reply_text(
+        details,
+        reply_markup=reply_markup,
+        parse_mode="Markdown"
+    )
 
+@per_chat_serialized
 async def cancel_transaction(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Handle the /cancel command.
@@ -757,7 +882,7 @@ async def cancel_transaction(update: Update, context: ContextTypes.DEFAULT_TYPE)
     user_id = update.effective_user.id
     
     # Check if user is registered
-    if not user_service.get_user(user_id):
+    if not await user_service.get_user_async(user_id):
         await update.message.reply_text(
             "You need to register first! Use /register to create an account."
         )
@@ -771,16 +896,14 @@ async def cancel_transaction(update: Update, context: ContextTypes.DEFAULT_TYPE)
         return
     
     transaction_id = context.args[0]
-    transaction = escrow_service.get_transaction(transaction_id)
-    
-    if not transaction:
+    try:
+        transaction, _ = await _fetch_authorized(transaction_id, user_id)
+    except TransactionNotFoundError:
         await update.message.reply_text(
             f"Transaction with ID {transaction_id} not found."
         )
         return
-    
-    # Check if user is authorized to cancel this transaction
-    if user_id != transaction.seller_id and user_id != transaction.buyer_id:
+    except PermissionError:
         await update.message.reply_text(
             "You don't have permission to cancel this transaction."
         )
@@ -795,23 +918,15 @@ async def cancel_transaction(update: Update, context: ContextTypes.DEFAULT_TYPE)
         return
     
     # Create confirmation buttons
-    keyboard = [
-        [
-            InlineKeyboardButton("Yes, Cancel", callback_data=f"txn_cancel_confirm_{transaction_id}"),
-            InlineKeyboardButton("No, Keep", callback_data=f"txn_cancel_abort_{transaction_id}")
-        ]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    
     await update.message.reply_text(
-        f"Are you sure you want to cancel transaction `{transaction_id}`?\n\n"
-        f"Title: {transaction.title}\n"
-        f"Amount: ${transaction.amount:.2f}\n\n"
-        f"This action cannot be undone.",
-        reply_markup=reply_markup,
+        CANCEL_CONFIRM_TMPL.format(
+            transaction_id=transaction_id, title=transaction.title, amount=transaction.amount
+        ),
+        reply_markup=_cancel_keyboard(transaction_id),
         parse_mode="Markdown"
     )
 
+@per_chat_serialized
 async def complete_transaction(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Handle the /complete command.
@@ -820,7 +935,7 @@ async def complete_transaction(update: Update, context: ContextTypes.DEFAULT_TYP
     user_id = update.effective_user.id
     
     # Check if user is registered
-    if not user_service.get_user(user_id):
+    if not await user_service.get_user_async(user_id):
         await update.message.reply_text(
             "You need to register first! Use /register to create an account."
         )
@@ -858,238 +973,238 @@ async def complete_transaction(update: Update, context: ContextTypes.DEFAULT_TYP
         return
     
     # Create confirmation buttons
-    keyboard = [
-        [
-            InlineKeyboardButton("Yes, Complete", callback_data=f"txn_complete_confirm_{transaction_id}"),
-            InlineKeyboardButton("No, Not Yet", callback_data=f"txn_complete_abort_{transaction_id}")
-        ]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    
     await update.message.reply_text(
-        f"Are you confirming that you've received the goods/services for transaction `{transaction_id}`?\n\n"
-        f"Title: {transaction.title}\n"
-        f"Amount: ${transaction.amount:.2f}\n\n"
-        f"This will release the funds to the seller and cannot be undone.",
-        reply_markup=reply_markup,
+        COMPLETE_CONFIRM_TMPL.format(
+            transaction_id=transaction_id, title=transaction.title, amount=transaction.amount
+        ),
+        reply_markup=_complete_keyboard(transaction_id),
+        parse_mode="Markdown"
+    )
+
+async def _safe_edit(query, text: str, **kwargs) -> None:
+    """
+    Edit the callback message unless it already shows the same text and keyboard.
+    
+    Identical edits are rejected by Telegram and still count against the bot's send rate.
+    """
+    message = query.message
+    if (
+        message
+        and (message.text_markdown or "").strip() == text.strip()
+        and message.reply_markup == kwargs.get("reply_markup")
+    ):
+        return
+    await query.edit_message_text(text, **kwargs)
+
+async def _edit_and_notify(query, context: ContextTypes.DEFAULT_TYPE, text: str,
+                           notify_chat_id: Optional[int], notify_text: str) -> None:
+    """
+    Edit the callback message and queue a notification for the other party.
+    
+    The notification is delivered in the background by the notification service,
+    so the user's reply is never held up by the bot-wide send rate limit.
+    """
+    if notify_chat_id:
+        notification_service.enqueue(context.bot, notify_chat_id, notify_text)
+    await _safe_edit(query, text)
+
+async def _load_transaction(query, transaction_id: str) -> Optional[Transaction]:
+    """Fetch a transaction for a callback, reporting on the message if it does not exist."""
+    transaction = escrow_service.get_transaction(transaction_id)
+    if not transaction:
+        await _safe_edit(
+            query,
+            f"Transaction with ID {transaction_id} not found."
+        )
+    return transaction
+
+async def _fund_transaction(query, context: ContextTypes.DEFAULT_TYPE, transaction_id: str) -> None:
+    """Show payment instructions for funding a transaction."""
+    transaction = await _load_transaction(query, transaction_id)
+    if not transaction:
+        return
+    
+    template = FUND_FIAT_TMPL if transaction.payment_method in FIAT_PAYMENT_METHODS else FUND_CRYPTO_TMPL
+    payment_instructions = template.format(
+        transaction_id=transaction_id,
+        title=transaction.title,
+        amount=transaction.amount,
+        fee=transaction.fee,
+        total=transaction.total_amount,
+        payment_method=transaction.payment_method_display
+    )
+    
+    await _safe_edit(
+        query,
+        payment_instructions,
+        reply_markup=_pay_keyboard(transaction_id),
+        parse_mode="Markdown"
+    )
+
+async def _prompt_cancel(query, context: ContextTypes.DEFAULT_TYPE, transaction_id: str) -> None:
+    """Ask the user to confirm cancelling a transaction."""
+    transaction = await _load_transaction(query, transaction_id)
+    if not transaction:
+        return
+    
+    await _safe_edit(
+        query,
+        CANCEL_CONFIRM_TMPL.format(
+            transaction_id=transaction_id, title=transaction.title, amount=transaction.amount
+        ),
+        reply_markup=_cancel_keyboard(transaction_id),
         parse_mode="Markdown"
     )
 
+async def _confirm_cancel(query, context: ContextTypes.DEFAULT_TYPE, transaction_id: str) -> None:
+    """Cancel a transaction and notify the other party."""
+    user_id = query.from_user.id
+    transaction = escrow_service.cancel_transaction(transaction_id, user_id)
+    
+    if transaction:
+        # Notify the other party
+        other_id = transaction.buyer_id if user_id == transaction.seller_id else transaction.seller_id
+        await _edit_and_notify(
+            query, context,
+            f"✅ Transaction `{transaction_id}` has been cancelled.",
+            other_id,
+            f"ℹ️ Transaction `{transaction_id}` ({transaction.title}) has been cancelled."
+        )
+    else:
+        await _safe_edit(
+            query,
+            f"❌ Failed to cancel transaction `{transaction_id}`."
+        )
+
+async def _abort_cancel(query, context: ContextTypes.DEFAULT_TYPE, transaction_id: str) -> None:
+    """Keep the transaction after the user backed out of cancelling it."""
+    await _safe_edit(
+        query,
+        f"Transaction cancellation aborted. The transaction remains active."
+    )
+
+async def _confirm_receipt(query, context: ContextTypes.DEFAULT_TYPE, transaction_id: str) -> None:
+    """Seller confirms that payment was received."""
+    transaction = escrow_service.confirm_transaction(transaction_id, query.from_user.id)
+    
+    if transaction:
+        # Notify the buyer
+        await _edit_and_notify(
+            query, context,
+            f"✅ You've confirmed receipt of payment for transaction `{transaction_id}`.\n\n"
+            f"The buyer can now review the goods/services and complete the transaction "
+            f"to release the funds from escrow.",
+            transaction.buyer_id,
+            f"ℹ️ The seller has confirmed receipt of your payment for transaction `{transaction_id}` ({transaction.title}).\n\n"
+            f"Once you've received and are satisfied with the goods/services, "
+            f"please use /complete {transaction_id} to release the funds to the seller."
+        )
+    else:
+        await _safe_edit(
+            query,
+            f"❌ Failed to confirm transaction `{transaction_id}`."
+        )
+
+async def _prompt_complete(query, context: ContextTypes.DEFAULT_TYPE, transaction_id: str) -> None:
+    """Ask the buyer to confirm completing a transaction."""
+    transaction = await _load_transaction(query, transaction_id)
+    if not transaction:
+        return
+    
+    await _safe_edit(
+        query,
+        COMPLETE_CONFIRM_TMPL.format(
+            transaction_id=transaction_id, title=transaction.title, amount=transaction.amount
+        ),
+        reply_markup=_complete_keyboard(transaction_id),
+        parse_mode="Markdown"
+    )
+
+async def _confirm_complete(query, context: ContextTypes.DEFAULT_TYPE, transaction_id: str) -> None:
+    """Complete a transaction and notify the seller."""
+    transaction = escrow_service.complete_transaction(transaction_id, query.from_user.id)
+    
+    if transaction:
+        # Notify the seller
+        await _edit_and_notify(
+            query, context,
+            f"✅ Transaction `{transaction_id}` has been completed!\n\n"
+            f"The funds have been released to the seller. Thank you for using our escrow service.",
+            transaction.seller_id,
+            f"🎉 Good news! Transaction `{transaction_id}` ({transaction.title}) has been completed.\n\n"
+            f"The buyer has confirmed receipt of goods/services and the funds "
+            f"(${transaction.amount:.2f}) have been released to you."
+        )
+    else:
+        await _safe_edit(
+            query,
+            f"❌ Failed to complete transaction `{transaction_id}`."
+        )
+
+async def _abort_complete(query, context: ContextTypes.DEFAULT_TYPE, transaction_id: str) -> None:
+    """Leave the transaction open after the buyer backed out of completing it."""
+    await _safe_edit(
+        query,
+        f"Transaction completion aborted. The transaction remains in progress."
+    )
+
+# Transaction action callback data: "txn_<action>[_confirm|_abort]_<transaction id>"
+_CALLBACK_RE = re.compile(r"^(txn_(?:fund|cancel|confirm|complete)(?:_confirm|_abort)?)_([A-Za-z0-9-]+)$")
+
+# Transaction action callbacks, keyed by the callback data with the transaction ID stripped
+_CALLBACK_HANDLERS = {
+    "txn_fund": _fund_transaction,
+    "txn_cancel": _prompt_cancel,
+    "txn_cancel_confirm": _confirm_cancel,
+    "txn_cancel_abort": _abort_cancel,
+    "txn_confirm": _confirm_receipt,
+    "txn_complete": _prompt_complete,
+    "txn_complete_confirm": _confirm_complete,
+    "txn_complete_abort": _abort_complete,
+}
+
+@per_chat_serialized
 async def transaction_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Handle callback queries for transaction actions.
     """
     query = update.callback_query
-    user_id = query.from_user.id
-    data = query.data.split("_")
-    action = data[1]
     
     # Handle confirmation flow callbacks
-    if action == "confirm" and len(data) == 2:
-        return await transaction_confirm(update, context)
-    
-    if action == "cancel" and len(data) == 2:
+    if query.data in ("txn_confirm", "txn_cancel"):
         return await transaction_confirm(update, context)
     
     # Handle transaction action callbacks
-    if len(data) >= 3:
-        transaction_id = data[2]
-        transaction = escrow_service.get_transaction(transaction_id)
-        
-        if not transaction:
-            await query.edit_message_text(
-                f"Transaction with ID {transaction_id} not found."
-            )
-            return
-        
-        # Fund transaction
-        if action == "fund":
-            # Create payment instructions
-            payment_instructions = (
-                f"*Payment Instructions*\n\n"
-                f"Transaction: {transaction.title}\n"
-                f"Amount: ${transaction.amount:.2f}\n"
-                f"Fee: ${transaction.fee:.2f}\n"
-                f"Total: ${transaction.amount + transaction.fee:.2f}\n"
-                f"Payment Method: {transaction.payment_method.capitalize()}\n\n"
-            )
-            
-            if transaction.payment_method in ["bank", "paypal"]:
-                # Fiat payment
-                payment_instructions += (
-                    f"To proceed with payment:\n"
-                    f"1. Use /pay {transaction_id} to get detailed payment instructions\n"
-                    f"2. After sending payment, use /confirm_payment {transaction_id}\n"
-                    f"3. The seller will verify your payment\n\n"
-                    f"Your funds will be held in escrow until you confirm receipt of goods/services."
-                )
-            else:
-                # Crypto payment
-                payment_instructions += (
-                    f"To proceed with crypto payment:\n"
-                    f"1. Use /pay {transaction_id} to get the deposit address\n"
-                    f"2. Send exactly the requested amount to the provided address\n"
-                    f"3. After sending, use /confirm_payment {transaction_id}\n\n"
-                    f"Your funds will be held in escrow until you confirm receipt of goods/services."
-                )
-            
-            keyboard = [
-                [InlineKeyboardButton("Make Payment", callback_data=f"pay_init_{transaction_id}")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            await query.edit_message_text(
-                payment_instructions,
-                reply_markup=reply_markup,
-                parse_mode="Markdown"
-            )
-        
-        # Cancel transaction
-        elif action == "cancel":
-            keyboard = [
-                [
-                    InlineKeyboardButton("Yes, Cancel", callback_data=f"txn_cancel_confirm_{transaction_id}"),
-                    InlineKeyboardButton("No, Keep", callback_data=f"txn_cancel_abort_{transaction_id}")
-                ]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            await query.edit_message_text(
-                f"Are you sure you want to cancel transaction `{transaction_id}`?\n\n"
-                f"Title: {transaction.title}\n"
-                f"Amount: ${transaction.amount:.2f}\n\n"
-                f"This action cannot be undone.",
-                reply_markup=reply_markup,
-                parse_mode="Markdown"
-            )
-        
-        # Confirm cancellation
-        elif action == "cancel" and len(data) >= 4 and data[3] == "confirm":
-            success = escrow_service.cancel_transaction(transaction_id, user_id)
-            
-            if success:
-                await query.edit_message_text(
-                    f"✅ Transaction `{transaction_id}` has been cancelled."
-                )
-                
-                # Notify the other party
-                other_id = transaction.buyer_id if user_id == transaction.seller_id else transaction.seller_id
-                if other_id:
-                    try:
-                        await context.bot.send_message(
-                            chat_id=other_id,
-                            text=f"ℹ️ Transaction `{transaction_id}` ({transaction.title}) has been cancelled.",
-                            parse_mode="Markdown"
-                        )
-                    except Exception as e:
-                        logger.error(f"Failed to notify user {other_id}: {e}")
-            else:
-                await query.edit_message_text(
-                    f"❌ Failed to cancel transaction `{transaction_id}`."
-                )
-        
-        # Abort cancellation
-        elif action == "cancel" and len(data) >= 4 and data[3] == "abort":
-            await query.edit_message_text(
-                f"Transaction cancellation aborted. The transaction remains active."
-            )
-        
-        # Confirm receipt (seller confirms payment was received)
-        elif action == "confirm":
-            success = escrow_service.confirm_transaction(transaction_id, user_id)
-            
-            if success:
-                await query.edit_message_text(
-                    f"✅ You've confirmed receipt of payment for transaction `{transaction_id}`.\n\n"
-                    f"The buyer can now review the goods/services and complete the transaction "
-                    f"to release the funds from escrow."
-                )
-                
-                # Notify the buyer
-                try:
-                    await context.bot.send_message(
-                        chat_id=transaction.buyer_id,
-                        text=(
-                            f"ℹ️ The seller has confirmed receipt of your payment for transaction `{transaction_id}` ({transaction.title}).\n\n"
-                            f"Once you've received and are satisfied with the goods/services, "
-                            f"please use /complete {transaction_id} to release the funds to the seller."
-                        ),
-                        parse_mode="Markdown"
-                    )
-                except Exception as e:
-                    logger.error(f"Failed to notify buyer {transaction.buyer_id}: {e}")
-            else:
-                await query.edit_message_text(
-                    f"❌ Failed to confirm transaction `{transaction_id}`."
-                )
-        
-        # Complete transaction
-        elif action == "complete":
-            keyboard = [
-                [
-                    InlineKeyboardButton("Yes, Complete", callback_data=f"txn_complete_confirm_{transaction_id}"),
-                    InlineKeyboardButton("No, Not Yet", callback_data=f"txn_complete_abort_{transaction_id}")
-                ]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            await query.edit_message_text(
-                f"Are you confirming that you've received the goods/services for transaction `{transaction_id}`?\n\n"
-                f"Title: {transaction.title}\n"
-                f"Amount: ${transaction.amount:.2f}\n\n"
-                f"This will release the funds to the seller and cannot be undone.",
-                reply_markup=reply_markup,
-                parse_mode="Markdown"
-            )
-        
-        # Confirm completion
-        elif action == "complete" and len(data) >= 4 and data[3] == "confirm":
-            success = escrow_service.complete_transaction(transaction_id, user_id)
-            
-            if success:
-                await query.edit_message_text(
-                    f"✅ Transaction `{transaction_id}` has been completed!\n\n"
-                    f"The funds have been released to the seller. Thank you for using our escrow service."
-                )
-                
-                # Notify the seller
-                try:
-                    await context.bot.send_message(
-                        chat_id=transaction.seller_id,
-                        text=(
-                            f"🎉 Good news! Transaction `{transaction_id}` ({transaction.title}) has been completed.\n\n"
-                            f"The buyer has confirmed receipt of goods/services and the funds "
-                            f"(${transaction.amount:.2f}) have been released to you."
-                        ),
-                        parse_mode="Markdown"
-                    )
-                except Exception as e:
-                    logger.error(f"Failed to notify seller {transaction.seller_id}: {e}")
-            else:
-                await query.edit_message_text(
-                    f"❌ Failed to complete transaction `{transaction_id}`."
-                )
-        
-        # Abort completion
-        elif action == "complete" and len(data) >= 4 and data[3] == "abort":
-            await query.edit_message_text(
-                f"Transaction completion aborted. The transaction remains in progress."
-            )
-        
-        else:
-            await query.edit_message_text(
-                "Unknown transaction operation."
-            )
+    match = _CALLBACK_RE.match(query.data)
+    handler = _CALLBACK_HANDLERS.get(match.group(1)) if match else None
+    if handler is None:
+        await _safe_edit(
+            query,
+            "Unknown transaction operation."
+        )
+        return
+    
+    # Mutating actions get the updated transaction back from the escrow service,
+    # so only the prompts need to fetch it up front
+    await handler(query, context, match.group(2))
 
 async def show_transactions(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Show user transactions (called from callbacks).
+    Callback data of the form ``user_transactions_<offset>`` selects a later page.
     """
     query = update.callback_query
     user_id = query.from_user.id
     
-    # Get user's transactions
-    transactions = escrow_service.get_user_transactions(user_id)
+    # Work out which page was requested
+    _, _, offset_text = query.data.rpartition("_")
+    offset = int(offset_text) if offset_text.isdigit() else 0
+    
+    # Fetch one page plus one extra row to tell whether a next page exists
+    transactions = escrow_service.get_user_transactions(user_id, limit=TRANSACTIONS_PAGE_SIZE + 1, offset=offset)
+    if not transactions and offset:
+        offset = 0
+        transactions = escrow_service.get_user_transactions(user_id, limit=TRANSACTIONS_PAGE_SIZE + 1)
     
     if not transactions:
         await query.edit_message_text(
@@ -1098,36 +1213,41 @@ async def show_transactions(update: Update, context: ContextTypes.DEFAULT_TYPE)
         )
         return
     
-    # Build transactions list
-    header = "*Your Transactions*\n\n"
-    transaction_list = []
+    has_more = len(transactions) > TRANSACTIONS_PAGE_SIZE
+    page = transactions[:TRANSACTIONS_PAGE_SIZE]
     
-    for txn in transactions:
+    # Build transactions list in one pass and a single join
+    parts = [TXN_LIST_HEADER]
+    for txn in page:
         role = "Seller" if txn.seller_id == user_id else "Buyer"
         counterparty = txn.buyer_username if role == "Seller" else txn.seller_username
-        counterparty = counterparty or "Not joined yet"
-        
-        txn_text = (
-            f"ID: `{txn.id}`\n"
-            f"Title: {txn.title}\n"
-            f"Amount: ${txn.amount:.2f}\n"
-            f"Status: {txn.status.capitalize()}\n"
-            f"Role: {role}\n"
-            f"Counterparty: @{counterparty}\n"
-        )
-        transaction_list.append(txn_text)
-    
-    # Create paginated view if needed
-    if len(transaction_list) > 5:
-        # Only show first 5 transactions
-        transactions_text = header + "\n\n".join(transaction_list[:5]) + "\n\n(Use /details [ID] to see more details)"
-    else:
-        transactions_text = header + "\n\n".join(transaction_list) + "\n\n(Use /details [ID] to see more details)"
-    
-    # Add buttons
+        parts.append(TXN_ROW_TMPL.format(
+            id=txn.id,
+            title=txn.title,
+            amount=txn.amount,
+            status=txn.status.capitalize(),
+            role=role,
+            counterparty=counterparty or "Not joined yet"
+        ))
+        parts.append("\n\n")
+    parts.append(TXN_LIST_FOOTER)
+    transactions_text = "".join(parts)
+    
+    # Add buttons, with page navigation when there is more than one page
+    navigation = []
+    if offset > 0:
+        navigation.append(InlineKeyboardButton(
+            "◀️ Previous", callback_data=f"user_transactions_{offset - TRANSACTIONS_PAGE_SIZE}"
+        ))
+    if has_more:
+        navigation.append(InlineKeyboardButton(
+            f"Next {TRANSACTIONS_PAGE_SIZE} ▶️", callback_data=f"user_transactions_{offset + TRANSACTIONS_PAGE_SIZE}"
+        ))
     keyboard = [
         [InlineKeyboardButton("Create New Transaction", callback_data="txn_new")]
     ]
+    if navigation:
+        keyboard.insert(0, navigation)
     reply_markup = InlineKeyboardMarkup(keyboard)
     
     await query.edit_message_text(
@@ -2,70 +2,264 @@
 User management handlers for the Telegram Escrow Bot.
 Handles user commands like start, help, register, and profile management.
 """
+import asyncio
+import functools
 import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import TelegramError
 from telegram.ext import ContextTypes
+from sqlalchemy.exc import SQLAlchemyError
 
 from models.user import User
+from services.executor import DB_EXECUTOR
 from services.user_service import UserService
-from config import HELP_MESSAGE
+from handlers.payment_handlers import show_payment_methods
+from handlers.transaction_handlers import show_transactions
+from config import HELP_MESSAGE, TRANSACTION_HELP, PAYMENT_HELP, DISPUTE_HELP
+from utils.helpers import markdown_to_html
 
 logger = logging.getLogger(__name__)
-user_service = UserService()
+user_service = UserService.get()
+
+# Static keyboards and texts shared by every request
+_WELCOME_BACK_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("💰 New Transaction", callback_data="txn_new"),
+        InlineKeyboardButton("📋 My Transactions", callback_data="user_transactions")
+    ],
+    [
+        InlineKeyboardButton("👤 My Profile", callback_data="user_profile"),
+        InlineKeyboardButton("❓ Help", callback_data="user_help")
+    ]
+])
+_REGISTER_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("✅ Register Now", callback_data="user_register")],
+    [InlineKeyboardButton("❓ How It Works", callback_data="user_help")]
+])
+_BACK_TO_START_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("✅ Register Now", callback_data="user_register")],
+    [InlineKeyboardButton("❓ How It Works", callback_data="help_how_it_works")]
+])
+_REGISTER_NOW_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("✅ Register Now", callback_data="user_register")]
+])
+_RETRY_REGISTER_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔄 Try Again", callback_data="user_register")]
+])
+_REGISTERED_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("💰 Create Transaction", callback_data="transaction_new"),
+        InlineKeyboardButton("📋 View Commands", callback_data="help_command")
+    ]
+])
+_PROFILE_ACTIONS_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("💳 Payment Methods", callback_data="user_payment_methods"),
+        InlineKeyboardButton("📋 My Transactions", callback_data="user_transactions")
+    ],
+    [
+        InlineKeyboardButton("➕ Create New Transaction", callback_data="transaction_new")
+    ]
+])
+_HOW_IT_WORKS_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("✅ Register Now", callback_data="user_register")],
+    [InlineKeyboardButton("◀️ Back", callback_data="back_to_start")]
+])
+_MAIN_HELP_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("📝 Transaction Guide", callback_data="help_transaction"),
+        InlineKeyboardButton("💸 Payment Guide", callback_data="help_payment")
+    ],
+    [
+        InlineKeyboardButton("⚖️ Dispute Resolution", callback_data="help_dispute"),
+        InlineKeyboardButton("👤 Account Help", callback_data="help_profile")
+    ]
+])
+_BACK_TO_HELP_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("↩️ Back to Main Help", callback_data="help_main")]
+])
+
+_WELCOME_BACK_TEMPLATE = (
+    "🔒 *Welcome back to the Escrow Assistant*, %(first_name)s!\n\n"
+    "What would you like to do today?"
+)
+_WELCOME_TEMPLATE = (
+    "🔐 *Welcome to the Secure Escrow Assistant!*\n\n"
+    "Hi %(first_name)s! I'm your personal escrow assistant for secure digital transactions.\n\n"
+    "*What I can do for you:*\n"
+    "• Create secure escrow transactions\n"
+    "• Protect buyers and sellers\n"
+    "• Support multiple payment methods\n"
+    "• Provide fair dispute resolution\n\n"
+    "To get started, please register with a simple click below!"
+)
+_HOW_IT_WORKS_TEXT = (
+    "🔄 *How Our Escrow System Works*\n\n"
+    "*For Sellers:*\n"
+    "1️⃣ Create a new transaction with `/new`\n"
+    "2️⃣ Set details, price, and payment method\n"
+    "3️⃣ Share the transaction ID with buyer\n"
+    "4️⃣ Deliver goods/services when notified\n"
+    "5️⃣ Receive funds after buyer confirmation\n\n"
+    
+    "*For Buyers:*\n"
+    "1️⃣ Join transaction with provided ID\n"
+    "2️⃣ Review details carefully\n"
+    "3️⃣ Fund the escrow account\n"
+    "4️⃣ Receive goods/services from seller\n"
+    "5️⃣ Confirm receipt to release payment\n\n"
+    
+    "🔒 *Your Security Guarantee:*\n"
+    "• Funds held in secure escrow\n"
+    "• Fair dispute resolution\n"
+    "• No payments released until both parties agree\n"
+    "• Complete transparency throughout process"
+)
+_PROFILE_TEMPLATE = (
+    "👤 *Your Profile*\n\n"
+    "Username: @%(username)s\n"
+    "Name: %(first_name)s %(last_name)s\n"
+    "Registered: %(registered)s\n\n"
+    "📊 *Transaction Statistics*\n"
+    "💼 Total Transactions: %(total_transactions)s\n"
+    "🛒 As Buyer: %(as_buyer)s\n"
+    "💰 As Seller: %(as_seller)s\n"
+    "✅ Completed: %(completed)s\n"
+    "⏳ Active: %(active)s\n"
+    "⚠️ Disputed: %(disputed)s\n\n"
+    "💵 *Wallet Balance*\n"
+    "🔒 Escrow Balance: $%(escrow_balance).2f"
+)
+_ACCOUNT_HELP_TEXT = """
+🧩 *ACCOUNT MANAGEMENT GUIDE*
+
+*Account Features:*
+• View your transaction history
+• Manage payment methods
+• Check escrow wallet balance
+• See dispute status
+
+*Commands:*
+• `/profile` - View your profile dashboard
+• `/payment_methods` - Manage your payment details
+• `/help` - Access this help system
+
+Your profile is your control center for all escrow transactions and activities. Keep your payment methods up to date for smooth transactions.
+"""
+
+# Static guides are rendered to HTML once and sent with parse_mode="HTML"
+_HTML_HELP_MESSAGE = markdown_to_html(HELP_MESSAGE)
+_HTML_TRANSACTION_HELP = markdown_to_html(TRANSACTION_HELP)
+_HTML_PAYMENT_HELP = markdown_to_html(PAYMENT_HELP)
+_HTML_DISPUTE_HELP = markdown_to_html(DISPUTE_HELP)
+_HTML_HOW_IT_WORKS = markdown_to_html(_HOW_IT_WORKS_TEXT)
+_HTML_ACCOUNT_HELP = markdown_to_html(_ACCOUNT_HELP_TEXT)
+
+# /help topic aliases mapped to their guide text
+_HELP_TOPICS = {
+    **dict.fromkeys(("transaction", "transactions", "tx"), _HTML_TRANSACTION_HELP),
+    **dict.fromkeys(("payment", "payments", "pay"), _HTML_PAYMENT_HELP),
+    **dict.fromkeys(("dispute", "disputes", "resolution"), _HTML_DISPUTE_HELP),
+}
+
+# Blocking service calls run on the shared DB thread pool instead of the event loop
+_user_inflight: Dict[int, asyncio.Future] = {}
+_stats_inflight: Dict[int, asyncio.Future] = {}
+
+async def _single_flight(inflight: Dict[Any, asyncio.Future], key: Any,
+                         func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run a blocking lookup on the DB thread pool, sharing one call between concurrent callers.
+    
+    Args:
+        inflight: Futures of the lookups currently running, keyed by ``key``
+        key: Key identifying the lookup
+        func: Blocking function to call
+        *args: Arguments passed to ``func``
+        
+    Returns:
+        The result of ``func``
+    """
+    future = inflight.get(key)
+    if future is None:
+        future = asyncio.get_running_loop().run_in_executor(DB_EXECUTOR, func, *args)
+        inflight[key] = future
+        future.add_done_callback(lambda _: inflight.pop(key, None))
+    return await asyncio.shield(future)
+
+async def _get_user_cached(user_id: int) -> Optional[User]:
+    """Get a user through the service's TTL cache without blocking the event loop."""
+    return await _single_flight(_user_inflight, user_id, user_service.get_user, user_id)
+
+async def _get_stats_cached(user_id: int) -> Dict[str, Any]:
+    """Get a user's statistics, collapsing concurrent profile views into one query."""
+    return await _single_flight(_stats_inflight, user_id, user_service.get_user_stats, user_id)
+
+def _format_registered_date(created_at: Any) -> str:
+    """
+    Format a user's registration timestamp as YYYY-MM-DD.
+    
+    Args:
+        created_at: ISO timestamp string or datetime
+        
+    Returns:
+        The formatted date, or "Unknown" if it cannot be formatted
+    """
+    if isinstance(created_at, datetime):
+        return created_at.strftime('%Y-%m-%d')
+    if isinstance(created_at, str):
+        return created_at[:10] if 'T' in created_at else created_at
+    return "Unknown"
+
+async def _render_profile(send_func: Callable[..., Awaitable[Any]], user: User, stats: Dict[str, Any]) -> None:
+    """
+    Send a user's profile and statistics.
+    
+    Args:
+        send_func: Bound ``reply_text`` or ``edit_message_text`` used to send the profile
+        user: User whose profile is shown
+        stats: Statistics from ``get_user_stats``
+    """
+    profile_text = _PROFILE_TEMPLATE % {
+        **stats,
+        'username': user.username,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'registered': _format_registered_date(user.created_at)
+    }
+    await send_func(
+        profile_text,
+        reply_markup=_PROFILE_ACTIONS_MARKUP,
+        parse_mode="Markdown"
+    )
+
+async def _register_user(user: User) -> bool:
+    """Register a user without blocking the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(DB_EXECUTOR, user_service.register_user, user)
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Handle the /start command.
     Introduces the bot and guides new users to register.
     """
-    user_id = update.effective_user.id
-    username = update.effective_user.username
-    first_name = update.effective_user.first_name
+    tg_user = update.effective_user
+    user_id, first_name = tg_user.id, tg_user.first_name
     
     # Check if user is already registered
-    if user_service.get_user(user_id):
+    if await _get_user_cached(user_id):
         # Enhanced welcome back message with quick action buttons
-        keyboard = [
-            [
-                InlineKeyboardButton("💰 New Transaction", callback_data="txn_new"),
-                InlineKeyboardButton("📋 My Transactions", callback_data="user_transactions")
-            ],
-            [
-                InlineKeyboardButton("👤 My Profile", callback_data="user_profile"),
-                InlineKeyboardButton("❓ Help", callback_data="user_help")
-            ]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
         await update.message.reply_text(
-            f"🔒 *Welcome back to the Escrow Assistant*, {first_name}!\n\n"
-            f"What would you like to do today?",
-            reply_markup=reply_markup,
+            _WELCOME_BACK_TEMPLATE % {'first_name': first_name},
+            reply_markup=_WELCOME_BACK_MARKUP,
             parse_mode="Markdown"
         )
     else:
-        # Enhanced registration button with better design
-        keyboard = [
-            [InlineKeyboardButton("✅ Register Now", callback_data="user_register")],
-            [InlineKeyboardButton("❓ How It Works", callback_data="user_help")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        # Send welcome message with improved formatting and visuals
-        welcome_text = (
-            f"🔐 *Welcome to the Secure Escrow Assistant!*\n\n"
-            f"Hi {first_name}! I'm your personal escrow assistant for secure digital transactions.\n\n"
-            f"*What I can do for you:*\n"
-            f"• Create secure escrow transactions\n"
-            f"• Protect buyers and sellers\n"
-            f"• Support multiple payment methods\n"
-            f"• Provide fair dispute resolution\n\n"
-            f"To get started, please register with a simple click below!"
-        )
-        
+        # Send welcome message with a registration button
         await update.message.reply_text(
-            welcome_text,
-            reply_markup=reply_markup,
+            _WELCOME_TEMPLATE % {'first_name': first_name},
+            reply_markup=_REGISTER_MARKUP,
             parse_mode="Markdown"
         )
 
@@ -74,68 +268,22 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     Handle the /help command.
     Provides a list of available commands and their descriptions.
     """
-    from config import HELP_MESSAGE, TRANSACTION_HELP, PAYMENT_HELP, DISPUTE_HELP
-    
     # Check if a specific help topic is requested
-    if context.args and len(context.args) > 0:
-        topic = context.args[0].lower()
-        
-        if topic in ["transaction", "transactions", "tx"]:
-            # Show transaction-specific help
-            keyboard = [
-                [InlineKeyboardButton("↩️ Back to Main Help", callback_data="help_main")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+    if context.args:
+        topic_help = _HELP_TOPICS.get(context.args[0].lower())
+        if topic_help:
             await update.message.reply_text(
-                TRANSACTION_HELP,
-                reply_markup=reply_markup,
-                parse_mode="Markdown"
-            )
-            return
-            
-        elif topic in ["payment", "payments", "pay"]:
-            # Show payment-specific help
-            keyboard = [
-                [InlineKeyboardButton("↩️ Back to Main Help", callback_data="help_main")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            await update.message.reply_text(
-                PAYMENT_HELP,
-                reply_markup=reply_markup,
-                parse_mode="Markdown"
-            )
-            return
-            
-        elif topic in ["dispute", "disputes", "resolution"]:
-            # Show dispute-specific help
-            keyboard = [
-                [InlineKeyboardButton("↩️ Back to Main Help", callback_data="help_main")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            await update.message.reply_text(
-                DISPUTE_HELP,
-                reply_markup=reply_markup,
-                parse_mode="Markdown"
+                topic_help,
+                reply_markup=_BACK_TO_HELP_MARKUP,
+                parse_mode="HTML"
             )
             return
     
     # Show main help with category selection buttons
-    keyboard = [
-        [
-            InlineKeyboardButton("📝 Transaction Guide", callback_data="help_transaction"),
-            InlineKeyboardButton("💸 Payment Guide", callback_data="help_payment")
-        ],
-        [
-            InlineKeyboardButton("⚖️ Dispute Resolution", callback_data="help_dispute"),
-            InlineKeyboardButton("👤 Account Help", callback_data="help_profile")
-        ]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    
     await update.message.reply_text(
-        HELP_MESSAGE,
-        reply_markup=reply_markup,
-        parse_mode="Markdown"
+        _HTML_HELP_MESSAGE,
+        reply_markup=_MAIN_HELP_MARKUP,
+        parse_mode="HTML"
     )
 
 async def register(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -143,13 +291,12 @@ async def register(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     Handle the /register command.
     Registers a new user in the system.
     """
-    user_id = update.effective_user.id
-    username = update.effective_user.username
-    first_name = update.effective_user.first_name
-    last_name = update.effective_user.last_name or ""
+    tg_user = update.effective_user
+    user_id, username, first_name = tg_user.id, tg_user.username, tg_user.first_name
+    last_name = tg_user.last_name or ""
     
     # Check if user is already registered
-    if user_service.get_user(user_id):
+    if await _get_user_cached(user_id):
         await update.message.reply_text(
             "You are already registered! Use /profile to see your profile information."
         )
@@ -164,7 +311,7 @@ async def register(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     )
     
     # Register the user
-    success = user_service.register_user(new_user)
+    success = await _register_user(new_user)
     
     if success:
         await update.effective_chat.send_message(
@@ -182,89 +329,51 @@ async def my_profile(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
     Displays the user's profile information and statistics.
     """
     user_id = update.effective_user.id
-    user = user_service.get_user(user_id)
+    # Queue both lookups at once; the stats are discarded if the user isn't registered
+    user, stats = await asyncio.gather(_get_user_cached(user_id), _get_stats_cached(user_id))
     
     if not user:
         # Enhanced UI for registration prompt
-        keyboard = [
-            [InlineKeyboardButton("✅ Register Now", callback_data="user_register")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
         await update.message.reply_text(
             "⚠️ You need to register first to access your profile!\n\n"
             "Registration takes just a few seconds and allows you to use all the features of our escrow service.",
-            reply_markup=reply_markup
+            reply_markup=_REGISTER_NOW_MARKUP
         )
         return
     
-    # Get user transaction statistics
-    stats = user_service.get_user_stats(user_id)
-    
-    # Format date properly, handling string or datetime object
-    if isinstance(user.created_at, str):
-        registered_date = user.created_at.split('T')[0] if 'T' in user.created_at else user.created_at
-    else:
-        try:
-            registered_date = user.created_at.strftime('%Y-%m-%d')
-        except:
-            registered_date = "Unknown"
-    
-    # Enhanced profile view with better formatting and emoji
-    profile_text = (
-        f"👤 *Your Profile*\n\n"
-        f"Username: @{user.username}\n"
-        f"Name: {user.first_name} {user.last_name}\n"
-        f"Registered: {registered_date}\n\n"
-        f"📊 *Transaction Statistics*\n"
-        f"💼 Total Transactions: {stats['total_transactions']}\n"
-        f"🛒 As Buyer: {stats['as_buyer']}\n"
-        f"💰 As Seller: {stats['as_seller']}\n"
-        f"✅ Completed: {stats['completed']}\n"
-        f"⏳ Active: {stats['active']}\n"
-        f"⚠️ Disputed: {stats['disputed']}\n\n"
-        f"💵 *Wallet Balance*\n"
-        f"🔒 Escrow Balance: ${stats['escrow_balance']:.2f}"
-    )
-    
-    # Enhanced action buttons with better UI
-    keyboard = [
-        [
-            InlineKeyboardButton("💳 Payment Methods", callback_data="user_payment_methods"),
-            InlineKeyboardButton("📋 My Transactions", callback_data="user_transactions")
-        ],
-        [
-            InlineKeyboardButton("➕ Create New Transaction", callback_data="transaction_new")
-        ]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    
-    await update.message.reply_text(
-        profile_text,
-        reply_markup=reply_markup,
-        parse_mode="Markdown"
-    )
+    await _render_profile(update.message.reply_text, user, stats)
 
-async def user_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+async def _handle_register(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
-    Handle callback queries related to user management.
+    Register the user from the "Register Now" button.
+    The callback query itself is already answered by the bot's callback router.
     """
     query = update.callback_query
-    user_id = query.from_user.id
-    callback_data = query.data
-    
-    # Log callback data for debugging
-    logger.debug(f"User callback received: {callback_data} from user {user_id}")
+    from_user = query.from_user
+    user_id = from_user.id
     
-    # Extract action from callback data
-    if "_" in callback_data:
-        action = callback_data.split("_")[1]
-    else:
-        action = callback_data
-    
-    if action == "register":
-        # First, acknowledge the callback to prevent Telegram timeout
-        await query.answer()
+    try:
+        # Check if username is provided
+        if not from_user.username:
+            await query.edit_message_text(
+                "⚠️ *Username Required*\n\n"
+                "To complete registration, you need to set a Telegram username first.\n\n"
+                "1. Go to your Telegram Settings\n"
+                "2. Tap on your profile\n"
+                "3. Add a username\n"
+                "4. Come back and try again!",
+                parse_mode="Markdown",
+                reply_markup=_RETRY_REGISTER_MARKUP
+            )
+            return
+        
+        # Repeated taps on "Register Now" are answered from the user cache
+        if await _get_user_cached(user_id):
+            await query.edit_message_text(
+                "✅ You are already registered! Use /profile to see your profile information.",
+                reply_markup=_REGISTERED_MARKUP
+            )
+            return
         
         # Show a processing message
         await query.edit_message_text(
@@ -274,337 +383,142 @@ async def user_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         )
         
         try:
-            # Trigger the registration flow with enhanced visuals
-            # Check if username is provided
-            if not query.from_user.username:
-                await query.edit_message_text(
-                    "⚠️ *Username Required*\n\n"
-                    "To complete registration, you need to set a Telegram username first.\n\n"
-                    "1. Go to your Telegram Settings\n"
-                    "2. Tap on your profile\n"
-                    "3. Add a username\n"
-                    "4. Come back and try again!",
-                    parse_mode="Markdown",
-                    reply_markup=InlineKeyboardMarkup([
-                        [InlineKeyboardButton("🔄 Try Again", callback_data="user_register")]
-                    ])
-                )
-                return
-                
-            # Create user object with proper error handling
-            try:
-                user = User(
-                    id=user_id,
-                    username=query.from_user.username or f"user{user_id}",  # Fallback username if needed
-                    first_name=query.from_user.first_name or "User",  # Default if missing
-                    last_name=query.from_user.last_name or ""
-                )
-                
-                # Log registration attempt
-                logger.info(f"Attempting to register user: {user_id}, username: {user.username}")
-                
-                # Try to register the user
-                success = user_service.register_user(user)
-                
-                if success:
-                    # Enhanced success message with quick action buttons
-                    keyboard = [
-                        [
-                            InlineKeyboardButton("💰 Create Transaction", callback_data="transaction_new"),
-                            InlineKeyboardButton("📋 View Commands", callback_data="help_command")
-                        ]
-                    ]
-                    reply_markup = InlineKeyboardMarkup(keyboard)
-                    
-                    await query.edit_message_text(
-                        f"✅ *Registration Successful!*\n\n"
-                        f"Welcome to the Escrow Service, *{user.first_name}*!\n\n"
-                        f"Your account is now active and ready to use.\n\n"
-                        f"🔑 *Account ID:* `{user.id}`\n"
-                        f"👤 *Username:* @{user.username}\n\n"
-                        f"What would you like to do next?",
-                        reply_markup=reply_markup,
-                        parse_mode="Markdown"
-                    )
-                else:
-                    # Enhanced error message with retry option
-                    keyboard = [
-                        [InlineKeyboardButton("🔄 Try Again", callback_data="user_register")]
-                    ]
-                    reply_markup = InlineKeyboardMarkup(keyboard)
-                    
-                    logger.error(f"Failed to register user {user_id}")
-                    
-                    await query.edit_message_text(
-                        "❌ *Registration Issue*\n\n"
-                        "We encountered a problem while setting up your account.\n\n"
-                        "This could be due to a temporary system issue. Please try again or contact support if the problem persists.",
-                        reply_markup=reply_markup,
-                        parse_mode="Markdown"
-                    )
-            except Exception as e:
-                logger.error(f"Error creating user object: {e}")
-                # Show a user-friendly error
-                await query.edit_message_text(
-                    "❌ *Registration Error*\n\n"
-                    "An unexpected error occurred while processing your registration.\n\n"
-                    "Please try again in a few moments.",
-                    reply_markup=InlineKeyboardMarkup([
-                        [InlineKeyboardButton("🔄 Try Again", callback_data="user_register")]
-                    ]),
-                    parse_mode="Markdown"
-                )
-        except Exception as e:
-            logger.error(f"Unhandled exception in registration: {e}")
-            # If we get here, something really went wrong
-            try:
-                await query.edit_message_text(
-                    "❌ *System Error*\n\n"
-                    "Something went wrong on our end.\n\n"
-                    "Please try again later.",
-                    reply_markup=InlineKeyboardMarkup([
-                        [InlineKeyboardButton("🔙 Back to Start", callback_data="back_to_start")]
-                    ]),
-                    parse_mode="Markdown"
-                )
-            except:
-                # Last resort if we can't even edit the message
-                pass
-    
-    elif action == "profile":
-        # Show user profile directly via callback
-        user = user_service.get_user(user_id)
-        if user:
-            # Get user transaction statistics
-            stats = user_service.get_user_stats(user_id)
-            
-            # Format date properly
-            if isinstance(user.created_at, str):
-                registered_date = user.created_at.split('T')[0] if 'T' in user.created_at else user.created_at
-            else:
-                try:
-                    registered_date = user.created_at.strftime('%Y-%m-%d')
-                except:
-                    registered_date = "Unknown"
-            
-            # Enhanced profile view with better formatting and emoji
-            profile_text = (
-                f"👤 *Your Profile*\n\n"
-                f"Username: @{user.username}\n"
-                f"Name: {user.first_name} {user.last_name}\n"
-                f"Registered: {registered_date}\n\n"
-                f"📊 *Transaction Statistics*\n"
-                f"💼 Total Transactions: {stats['total_transactions']}\n"
-                f"🛒 As Buyer: {stats['as_buyer']}\n"
-                f"💰 As Seller: {stats['as_seller']}\n"
-                f"✅ Completed: {stats['completed']}\n"
-                f"⏳ Active: {stats['active']}\n"
-                f"⚠️ Disputed: {stats['disputed']}\n\n"
-                f"💵 *Wallet Balance*\n"
-                f"🔒 Escrow Balance: ${stats['escrow_balance']:.2f}"
-            )
-            
-            # Enhanced action buttons with better UI
-            keyboard = [
-                [
-                    InlineKeyboardButton("💳 Payment Methods", callback_data="user_payment_methods"),
-                    InlineKeyboardButton("📋 My Transactions", callback_data="user_transactions")
-                ],
-                [
-                    InlineKeyboardButton("➕ Create New Transaction", callback_data="transaction_new")
-                ]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            await query.edit_message_text(
-                profile_text,
-                reply_markup=reply_markup,
-                parse_mode="Markdown"
+            user = User(
+                id=user_id,
+                username=from_user.username,
+                first_name=from_user.first_name or "User",  # Default if missing
+                last_name=from_user.last_name or ""
             )
-        else:
-            # User not found, prompt registration
-            keyboard = [
-                [InlineKeyboardButton("✅ Register Now", callback_data="user_register")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            await query.edit_message_text(
-                "⚠️ You need to register first to view your profile!",
-                reply_markup=reply_markup
-            )
-    
-    elif action == "payment_methods":
-        # Redirect to payment methods view
-        from handlers.payment_handlers import show_payment_methods
-        await show_payment_methods(update, context)
-    
-    elif action == "transactions":
-        # Redirect to transactions list
-        from handlers.transaction_handlers import show_transactions
-        await show_transactions(update, context)
-        
-    elif action == "how_it_works":
-        # Show how the escrow system works
-        how_it_works_text = (
-            "🔄 *How Our Escrow System Works*\n\n"
-            "*For Sellers:*\n"
-            "1️⃣ Create a new transaction with `/new`\n"
-            "2️⃣ Set details, price, and payment method\n"
-            "3️⃣ Share the transaction ID with buyer\n"
-            "4️⃣ Deliver goods/services when notified\n"
-            "5️⃣ Receive funds after buyer confirmation\n\n"
-            
-            "*For Buyers:*\n"
-            "1️⃣ Join transaction with provided ID\n"
-            "2️⃣ Review details carefully\n"
-            "3️⃣ Fund the escrow account\n"
-            "4️⃣ Receive goods/services from seller\n"
-            "5️⃣ Confirm receipt to release payment\n\n"
-            
-            "🔒 *Your Security Guarantee:*\n"
-            "• Funds held in secure escrow\n"
-            "• Fair dispute resolution\n"
-            "• No payments released until both parties agree\n"
-            "• Complete transparency throughout process"
-        )
-        
-        keyboard = [
-            [InlineKeyboardButton("✅ Register Now", callback_data="user_register")],
-            [InlineKeyboardButton("◀️ Back", callback_data="back_to_start")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(
-            how_it_works_text,
-            reply_markup=reply_markup,
-            parse_mode="Markdown"
-        )
-        
-    elif action == "back_to_start":
-        # Return to start message
-        first_name = query.from_user.first_name
-        keyboard = [
-            [InlineKeyboardButton("✅ Register Now", callback_data="user_register")],
-            [InlineKeyboardButton("❓ How It Works", callback_data="help_how_it_works")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        welcome_text = (
-            f"🔐 *Welcome to the Secure Escrow Assistant!*\n\n"
-            f"Hi {first_name}! I'm your personal escrow assistant for secure digital transactions.\n\n"
-            f"*What I can do for you:*\n"
-            f"• Create secure escrow transactions\n"
-            f"• Protect buyers and sellers\n"
-            f"• Support multiple payment methods\n"
-            f"• Provide fair dispute resolution\n\n"
-            f"To get started, please register with a simple click below!"
-        )
-        
-        await query.edit_message_text(
-            welcome_text,
-            reply_markup=reply_markup,
-            parse_mode="Markdown"
-        )
-    
-    # Handle help-related callbacks
-    elif action in ["main", "transaction", "payment", "dispute", "profile"]:
-        from config import HELP_MESSAGE, TRANSACTION_HELP, PAYMENT_HELP, DISPUTE_HELP
-        
-        if action == "main":
-            # Return to main help menu
-            keyboard = [
-                [
-                    InlineKeyboardButton("📝 Transaction Guide", callback_data="help_transaction"),
-                    InlineKeyboardButton("💸 Payment Guide", callback_data="help_payment")
-                ],
-                [
-                    InlineKeyboardButton("⚖️ Dispute Resolution", callback_data="help_dispute"),
-                    InlineKeyboardButton("👤 Account Help", callback_data="help_profile")
-                ]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
             
-            await query.edit_message_text(
-                HELP_MESSAGE,
-                reply_markup=reply_markup,
-                parse_mode="Markdown"
-            )
-        
-        elif action == "transaction":
-            # Show transaction help
-            keyboard = [
-                [InlineKeyboardButton("↩️ Back to Main Help", callback_data="help_main")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            # Log registration attempt
+            logger.info("Attempting to register user: %s, username: %s", user_id, user.username)
             
+            # Try to register the user
+            success = await _register_user(user)
+        except (SQLAlchemyError, ValueError) as e:
+            logger.error(f"Error registering user {user_id}: {e}")
+            # Show a user-friendly error
             await query.edit_message_text(
-                TRANSACTION_HELP,
-                reply_markup=reply_markup,
+                "❌ *Registration Error*\n\n"
+                "An unexpected error occurred while processing your registration.\n\n"
+                "Please try again in a few moments.",
+                reply_markup=_RETRY_REGISTER_MARKUP,
                 parse_mode="Markdown"
             )
+            return
         
-        elif action == "payment":
-            # Show payment help
-            keyboard = [
-                [InlineKeyboardButton("↩️ Back to Main Help", callback_data="help_main")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
+        if success:
+            # Enhanced success message with quick action buttons
             await query.edit_message_text(
-                PAYMENT_HELP,
-                reply_markup=reply_markup,
+                f"✅ *Registration Successful!*\n\n"
+                f"Welcome to the Escrow Service, *{user.first_name}*!\n\n"
+                f"Your account is now active and ready to use.\n\n"
+                f"🔑 *Account ID:* `{user.id}`\n"
+                f"👤 *Username:* @{user.username}\n\n"
+                f"What would you like to do next?",
+                reply_markup=_REGISTERED_MARKUP,
                 parse_mode="Markdown"
             )
-        
-        elif action == "dispute":
-            # Show dispute help
-            keyboard = [
-                [InlineKeyboardButton("↩️ Back to Main Help", callback_data="help_main")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+        else:
+            # Enhanced error message with retry option
+            logger.error(f"Failed to register user {user_id}")
             
             await query.edit_message_text(
-                DISPUTE_HELP,
-                reply_markup=reply_markup,
+                "❌ *Registration Issue*\n\n"
+                "We encountered a problem while setting up your account.\n\n"
+                "This could be due to a temporary system issue. Please try again or contact support if the problem persists.",
+                reply_markup=_RETRY_REGISTER_MARKUP,
                 parse_mode="Markdown"
             )
-        
-        elif action == "profile":
-            # Show account help
-            profile_help = """
-🧩 *ACCOUNT MANAGEMENT GUIDE*
+    except TelegramError as e:
+        # The message can no longer be edited; nothing more to show the user
+        logger.error(f"Telegram error during registration of user {user_id}: {e}")
 
-*Account Features:*
-• View your transaction history
-• Manage payment methods
-• Check escrow wallet balance
-• See dispute status
+async def _handle_profile(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Show the user's profile directly via callback."""
+    query = update.callback_query
+    user_id = query.from_user.id
+    user, stats = await asyncio.gather(_get_user_cached(user_id), _get_stats_cached(user_id))
+    if user:
+        await _render_profile(query.edit_message_text, user, stats)
+    else:
+        # User not found, prompt registration
+        await query.edit_message_text(
+            "⚠️ You need to register first to view your profile!",
+            reply_markup=_REGISTER_NOW_MARKUP
+        )
 
-*Commands:*
-• `/profile` - View your profile dashboard
-• `/payment_methods` - Manage your payment details
-• `/help` - Access this help system
+async def _handle_how_it_works(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Show how the escrow system works."""
+    await update.callback_query.edit_message_text(
+        _HTML_HOW_IT_WORKS,
+        reply_markup=_HOW_IT_WORKS_MARKUP,
+        parse_mode="HTML"
+    )
 
-Your profile is your control center for all escrow transactions and activities. Keep your payment methods up to date for smooth transactions.
-            """
-            
-            keyboard = [
-                [InlineKeyboardButton("↩️ Back to Main Help", callback_data="help_main")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            await query.edit_message_text(
-                profile_help,
-                reply_markup=reply_markup,
-                parse_mode="Markdown"
-            )
-        
-    else:
-        # For unknown actions
-        await query.answer("Unknown operation", show_alert=True)
-        
-    # Answer the callback query to remove the loading state
-    try:
-        await query.answer()
-    except:
-        pass  # Already answered above
+async def _handle_back_to_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Return to the start message."""
+    query = update.callback_query
+    await query.edit_message_text(
+        _WELCOME_TEMPLATE % {'first_name': query.from_user.first_name},
+        reply_markup=_BACK_TO_START_MARKUP,
+        parse_mode="Markdown"
+    )
+
+async def _handle_help_main(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Return to the main help menu."""
+    await update.callback_query.edit_message_text(
+        _HTML_HELP_MESSAGE,
+        reply_markup=_MAIN_HELP_MARKUP,
+        parse_mode="HTML"
+    )
+
+async def _handle_help_topic(update: Update, context: ContextTypes.DEFAULT_TYPE, topic_help: str) -> None:
+    """Show the guide for a help topic."""
+    await update.callback_query.edit_message_text(
+        topic_help,
+        reply_markup=_BACK_TO_HELP_MARKUP,
+        parse_mode="HTML"
+    )
+
+# User callback actions, keyed by callback data with the "user_" prefix removed
+_ACTION_DISPATCH: Dict[str, Callable[[Update, ContextTypes.DEFAULT_TYPE], Awaitable[None]]] = {
+    "register": _handle_register,
+    "profile": _handle_profile,
+    "payment_methods": show_payment_methods,
+    "transactions": show_transactions,
+    "how_it_works": _handle_how_it_works,
+    "help": _handle_help_main,
+    "back_to_start": _handle_back_to_start,
+    "help_how_it_works": _handle_how_it_works,
+    "help_main": _handle_help_main,
+    "help_transaction": functools.partial(_handle_help_topic, topic_help=_HTML_TRANSACTION_HELP),
+    "help_payment": functools.partial(_handle_help_topic, topic_help=_HTML_PAYMENT_HELP),
+    "help_dispute": functools.partial(_handle_help_topic, topic_help=_HTML_DISPUTE_HELP),
+    "help_profile": functools.partial(_handle_help_topic, topic_help=_HTML_ACCOUNT_HELP),
+}
+
+async def user_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Handle callback queries related to user management.
+    """
+    query = update.callback_query
+    callback_data = query.data
+    
+    # Paged actions end in "_<offset>", which their handler parses itself
+    action = callback_data.removeprefix("user_")
+    handler = _ACTION_DISPATCH.get(action)
+    if handler is None and action[-1:].isdigit():
+        handler = _ACTION_DISPATCH.get(action.rpartition("_")[0])
+    
+    if handler is None:
+        # Stale or forged buttons are dropped without another API call;
+        # the router has already answered the query
+        logger.debug("Ignoring unknown user callback: %s", callback_data)
+        return
+    
+    # Log callback data for debugging; formatting is deferred until a record is emitted
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("User callback received: %s from user %s", callback_data, query.from_user.id)
+    
+    await handler(update, context)
@@ -4,12 +4,10 @@ This script creates all the required tables in the PostgreSQL database.
 """
 import os
 import logging
-import uuid
-from sqlalchemy import create_engine
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import sessionmaker
 
-from db_models import Base, User, Wallet, create_tables
+from db_models import Base, User, Wallet, SessionLocal, create_tables
+from utils.helpers import generate_uuid7
 
 # Configure logging
 logging.basicConfig(
@@ -26,21 +24,15 @@ def initialize_database():
         create_tables()
         logger.info("Database tables created successfully!")
         
-        # Optional: Create admin user for testing
-        DB_URL = os.environ.get('DATABASE_URL', '')
-        if not DB_URL:
-            raise ValueError("DATABASE_URL environment variable is not set!")
-            
-        # Ensure the PostgreSQL URL is in the correct format for SQLAlchemy
-        if DB_URL.startswith("postgres://"):
-            DB_URL = DB_URL.replace("postgres://", "postgresql://", 1)
-            
-        engine = create_engine(DB_URL, pool_pre_ping=True, pool_recycle=300)
-        Session = sessionmaker(bind=engine)
-        session = Session()
+        # Optional: Create admin user for testing, enabled with CREATE_ADMIN_USER=1
+        if os.environ.get('CREATE_ADMIN_USER', '').lower() not in ('1', 'true', 'yes'):
+            return True
+        
+        # Reuse the application's engine instead of opening a second pool
+        session = SessionLocal()
         
         # Check if admin user exists
-        admin_exists = session.query(User).filter(User.id == 0).first()
+        admin_exists = session.query(session.query(User).filter(User.id == 0).exists()).scalar()
         if not admin_exists:
             logger.info("Creating admin user...")
             # Create admin user
@@ -54,7 +46,7 @@ def initialize_database():
             
             # Create admin wallet
             admin_wallet = Wallet(
-                id=str(uuid.uuid4()),
+                id=generate_uuid7(),
                 user_id=0,
                 balance=0.0
             )
@@ -1,3 +1,7 @@
 """
 Initialization file for the models package.
 """
+import msgspec
+
+# Shared encoder for the model Structs; reusing one instance avoids per-call setup
+encoder = msgspec.json.Encoder()
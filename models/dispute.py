@@ -0,0 +1,35 @@
+"""
+Dispute model for the Telegram Escrow Bot.
+Represents a dispute raised on an escrow transaction.
+"""
+from datetime import datetime
+from typing import Optional
+
+from msgspec import Struct
+
+from config import DisputeStatus
+
+class Dispute(Struct, kw_only=True, gc=False):
+    """
+    Represents a dispute between the parties of a transaction.
+    
+    Attributes:
+        transaction_id: ID of the disputed transaction
+        opened_by: Role of the party that opened the dispute ('seller' or 'buyer')
+        reason: Reason for the dispute
+        evidence: Evidence supporting the dispute
+        opened_at: Time the dispute was opened
+        response: Counterparty's response, if any
+        status: Current status of the dispute
+        resolution: Resolution outcome once resolved
+        resolved_at: Time the dispute was resolved
+    """
+    transaction_id: str
+    opened_by: str
+    reason: str
+    evidence: str
+    opened_at: datetime
+    response: Optional[str] = None
+    status: str = DisputeStatus.OPEN
+    resolution: Optional[str] = None
+    resolved_at: Optional[datetime] = None
@@ -2,14 +2,32 @@
 Transaction model for the Telegram Escrow Bot.
 Represents escrow transactions between buyers and sellers.
 """
+import sys
+import time
 from datetime import datetime
-from dataclasses import dataclass, field
+from functools import cached_property
 from typing import Optional, Dict, Any
 
+from msgspec import Struct, field
+
 from config import TransactionStatus
 
-@dataclass
-class Transaction:
+# Status predicates as bit flags, so each check is one dict lookup and a mask
+_ACTIVE = 1
+_DISPUTED = 2
+_COMPLETE = 4
+_CANCELLED = 8
+
+_STATUS_FLAGS: Dict[str, int] = {
+    TransactionStatus.CREATED: _ACTIVE,
+    TransactionStatus.FUNDED: _ACTIVE,
+    TransactionStatus.CONFIRMED: _ACTIVE,
+    TransactionStatus.DISPUTED: _DISPUTED,
+    TransactionStatus.COMPLETED: _COMPLETE,
+    TransactionStatus.CANCELLED: _CANCELLED,
+}
+
+class Transaction(Struct, kw_only=True, dict=True):
     """
     Represents an escrow transaction between a buyer and a seller.
     
@@ -25,9 +43,9 @@ class Transaction:
         buyer_id: Telegram ID of the buyer (optional until joined)
         buyer_username: Telegram username of the buyer (optional until joined)
         status: Current status of the transaction
-        created_at: Timestamp when the transaction was created
-        updated_at: Timestamp when the transaction was last updated
-        completed_at: Timestamp when the transaction was completed
+        created_at: Creation time in nanoseconds since the epoch
+        updated_at: Last update time in nanoseconds since the epoch
+        completed_at: Completion time in nanoseconds since the epoch
         metadata: Additional metadata for the transaction
         dispute: Dispute information if a dispute is raised
     """
@@ -42,37 +60,64 @@ class Transaction:
     buyer_id: Optional[int] = None
     buyer_username: Optional[str] = None
     status: str = TransactionStatus.CREATED
-    created_at: datetime = field(default_factory=datetime.now)
-    updated_at: Optional[datetime] = None
-    completed_at: Optional[datetime] = None
-    metadata: Dict[str, Any] = field(default_factory=dict)
+    created_at: int = field(default_factory=time.time_ns)
+    updated_at: Optional[int] = None
+    completed_at: Optional[int] = None
+    metadata: Dict[str, Any] = {}
     dispute: Optional[Dict[str, Any]] = None
     
+    def __post_init__(self):
+        # Status and payment method come from small fixed vocabularies; share one string object each
+        self.status = sys.intern(self.status)
+        self.payment_method = sys.intern(self.payment_method)
+    
+    @cached_property
+    def created_at_str(self) -> str:
+        """Get the creation date formatted as YYYY-MM-DD."""
+        # Creation time never changes, so the display date is formatted once
+        return self.created_at_dt.strftime('%Y-%m-%d')
+    
     @property
+    def created_at_dt(self) -> datetime:
+        """Get the creation time as a datetime."""
+        return datetime.fromtimestamp(self.created_at / 1e9)
+    
+    @property
+    def updated_at_dt(self) -> Optional[datetime]:
+        """Get the last update time as a datetime, if any."""
+        return datetime.fromtimestamp(self.updated_at / 1e9) if self.updated_at is not None else None
+    
+    @property
+    def completed_at_dt(self) -> Optional[datetime]:
+        """Get the completion time as a datetime, if any."""
+        return datetime.fromtimestamp(self.completed_at / 1e9) if self.completed_at is not None else None
+    
+    @cached_property
     def total_amount(self) -> float:
         """Get the total amount including fees."""
         return self.amount + self.fee
     
+    @cached_property
+    def payment_method_display(self) -> str:
+        """Get the payment method formatted for display."""
+        return self.payment_method.capitalize()
+    
     @property
     def is_active(self) -> bool:
         """Check if the transaction is in an active state."""
-        return self.status in [
-            TransactionStatus.CREATED,
-            TransactionStatus.FUNDED,
-            TransactionStatus.CONFIRMED
-        ]
+        return bool(_STATUS_FLAGS.get(self.status, 0) & _ACTIVE)
     
     @property
     def is_disputed(self) -> bool:
         """Check if the transaction is in disputed state."""
-        return self.status == TransactionStatus.DISPUTED
+        return bool(_STATUS_FLAGS.get(self.status, 0) & _DISPUTED)
     
     @property
     def is_complete(self) -> bool:
         """Check if the transaction is complete."""
-        return self.status == TransactionStatus.COMPLETED
+        return bool(_STATUS_FLAGS.get(self.status, 0) & _COMPLETE)
     
     @property
     def is_cancelled(self) -> bool:
         """Check if the transaction is cancelled."""
-        return self.status == TransactionStatus.CANCELLED
+        return bool(_STATUS_FLAGS.get(self.status, 0) & _CANCELLED)
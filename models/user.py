@@ -3,11 +3,12 @@ User model for the Telegram Escrow Bot.
 Represents registered users with their details and preferences.
 """
 from datetime import datetime
-from dataclasses import dataclass, field
+from functools import cached_property
 from typing import Optional, List, Dict
 
-@dataclass
-class User:
+from msgspec import Struct, field
+
+class User(Struct, kw_only=True, dict=True):
     """
     Represents a registered user in the escrow system.
     
@@ -27,22 +28,22 @@ class User:
     username: str
     first_name: str
     last_name: str = ""
-    created_at: datetime = field(default_factory=datetime.now)
-    payment_methods: Dict = field(default_factory=dict)
-    transactions: List[str] = field(default_factory=list)
-    feedback: Dict = field(default_factory=dict)
-    trusted_by: List[int] = field(default_factory=list)
+    created_at: Optional[datetime] = field(default_factory=datetime.now)
+    payment_methods: Dict = {}
+    transactions: List[str] = []
+    feedback: Dict = {}
+    trusted_by: List[int] = []
     is_active: bool = True
     
-    @property
+    @cached_property
     def full_name(self) -> str:
         """Get the user's full name."""
         return f"{self.first_name} {self.last_name}".strip()
     
-    @property
+    @cached_property
     def display_name(self) -> str:
         """Get the user's display name (username or full name)."""
-        return f"@{self.username}" if self.username else self.full_name
+        return "@" + self.username if self.username else self.full_name
     
     @property
     def transaction_count(self) -> int:
@@ -2,12 +2,13 @@
 Wallet model for the Telegram Escrow Bot.
 Represents escrow wallet for handling funds.
 """
+import time
 from datetime import datetime
-from dataclasses import dataclass, field
 from typing import List, Dict, Optional
 
-@dataclass
-class WalletTransaction:
+from msgspec import Struct, field
+
+class WalletTransaction(Struct, kw_only=True, gc=False):
     """
     Represents a transaction in a wallet.
     
@@ -17,7 +18,7 @@ class WalletTransaction:
         amount: Amount of the transaction
         direction: 'in' or 'out'
         type: Type of transaction (deposit, withdrawal, fee, etc.)
-        created_at: Timestamp when the wallet transaction occurred
+        created_at: Time of the wallet transaction in nanoseconds since the epoch
         metadata: Additional metadata for the wallet transaction
     """
     id: str
@@ -25,11 +26,15 @@ class WalletTransaction:
     amount: float
     direction: str  # 'in' or 'out'
     type: str  # 'deposit', 'withdrawal', 'fee', etc.
-    created_at: datetime = field(default_factory=datetime.now)
-    metadata: Dict = field(default_factory=dict)
+    created_at: int = field(default_factory=time.time_ns)
+    metadata: Dict = {}
+    
+    @property
+    def created_at_dt(self) -> datetime:
+        """Get the time of the wallet transaction as a datetime."""
+        return datetime.fromtimestamp(self.created_at / 1e9)
 
-@dataclass
-class Wallet:
+class Wallet(Struct, kw_only=True, gc=False):
     """
     Represents an escrow wallet.
     
@@ -38,15 +43,27 @@ class Wallet:
         user_id: Associated user ID
         balance: Current balance
         transactions: List of wallet transactions
-        created_at: Timestamp when the wallet was created
-        updated_at: Timestamp when the wallet was last updated
+        created_at: Creation time in nanoseconds since the epoch
+        updated_at: Last update time in nanoseconds since the epoch
+        last_tx_seq: Sequence number of the last wallet transaction ID issued
     """
     id: str
     user_id: int
     balance: float = 0.0
-    transactions: List[WalletTransaction] = field(default_factory=list)
-    created_at: datetime = field(default_factory=datetime.now)
-    updated_at: Optional[datetime] = None
+    transactions: List[WalletTransaction] = []
+    created_at: int = field(default_factory=time.time_ns)
+    updated_at: Optional[int] = None
+    last_tx_seq: int = 0
+    
+    @property
+    def created_at_dt(self) -> datetime:
+        """Get the creation time as a datetime."""
+        return datetime.fromtimestamp(self.created_at / 1e9)
+    
+    @property
+    def updated_at_dt(self) -> Optional[datetime]:
+        """Get the last update time as a datetime, if any."""
+        return datetime.fromtimestamp(self.updated_at / 1e9) if self.updated_at is not None else None
     
     def deposit(self, amount: float, transaction_id: str, transaction_type: str) -> WalletTransaction:
         """
@@ -64,10 +81,12 @@ class Wallet:
             raise ValueError("Deposit amount must be positive")
         
         self.balance += amount
-        self.updated_at = datetime.now()
+        self.updated_at = time.time_ns()
         
+        # IDs come from a counter so they stay unique even if old entries are pruned
+        self.last_tx_seq += 1
         wallet_tx = WalletTransaction(
-            id=f"wtx_{len(self.transactions) + 1}",
+            id="wtx_" + str(self.last_tx_seq),
             transaction_id=transaction_id,
             amount=amount,
             direction="in",
@@ -96,10 +115,12 @@ class Wallet:
             raise ValueError("Insufficient funds")
         
         self.balance -= amount
-        self.updated_at = datetime.now()
+        self.updated_at = time.time_ns()
         
+        # IDs come from a counter so they stay unique even if old entries are pruned
+        self.last_tx_seq += 1
         wallet_tx = WalletTransaction(
-            id=f"wtx_{len(self.transactions) + 1}",
+            id="wtx_" + str(self.last_tx_seq),
             transaction_id=transaction_id,
             amount=amount,
             direction="out",
@@ -4,16 +4,45 @@ Supports major payment processors for traditional currency transactions
 """
 
 import os
-import json
+import asyncio
 import logging
-from typing import Dict, Any, Optional
+import time
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Any, List, Optional, Tuple
 from enum import Enum
-import aiohttp
 import hashlib
 import hmac
+import msgspec
+
+if TYPE_CHECKING:
+    # aiohttp is heavy to import; it is loaded on the first payment request instead
+    import aiohttp
 
 logger = logging.getLogger(__name__)
 
+# The gateway APIs speak JSON; reuse one msgspec encoder/decoder for every request
+_json_encoder = msgspec.json.Encoder()
+_json_decoder = msgspec.json.Decoder()
+
+# Concurrent verification requests allowed per gateway in a batch
+VERIFY_BATCH_CONCURRENCY = 20
+
+# Reject Stripe webhooks signed longer ago than this, to limit replays
+WEBHOOK_TOLERANCE_SECONDS = 300
+
+# Refresh OAuth tokens this many seconds before they expire
+TOKEN_REFRESH_MARGIN = 60
+
+# Request headers shared by every call of a given content type
+_FORM_HEADERS = {'Content-Type': 'application/x-www-form-urlencoded'}
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+
+# Checkout session form fields that are the same for every Stripe payment
+_STRIPE_STATIC_FIELDS = (
+    ('payment_method_types[]', 'card'),
+    ('line_items[0][quantity]', '1'),
+    ('mode', 'payment'),
+)
+
 class PaymentStatus(Enum):
     PENDING = "pending"
     COMPLETED = "completed"
@@ -21,11 +50,77 @@ class PaymentStatus(Enum):
     CANCELLED = "cancelled"
     REFUNDED = "refunded"
 
+class GatewayConfig(msgspec.Struct, frozen=True):
+    """Payment gateway credentials and settings"""
+    stripe_secret_key: Optional[str] = None
+    stripe_webhook_secret: Optional[str] = None
+    paypal_client_id: Optional[str] = None
+    paypal_client_secret: Optional[str] = None
+    paypal_sandbox: str = 'true'
+    razorpay_key_id: Optional[str] = None
+    razorpay_key_secret: Optional[str] = None
+
+_GATEWAY_ENV_VARS = (
+    'STRIPE_SECRET_KEY',
+    'STRIPE_WEBHOOK_SECRET',
+    'PAYPAL_CLIENT_ID',
+    'PAYPAL_CLIENT_SECRET',
+    'PAYPAL_SANDBOX',
+    'RAZORPAY_KEY_ID',
+    'RAZORPAY_KEY_SECRET',
+)
+
+# Read the environment once at import; gateways then read plain attributes
+_GATEWAY_CONFIG = GatewayConfig(**{
+    name.lower(): os.environ[name] for name in _GATEWAY_ENV_VARS if name in os.environ
+})
+
+class _StripeCheckoutSession(msgspec.Struct):
+    """Fields read from a Stripe checkout session"""
+    id: str
+    url: Optional[str] = None
+    payment_status: Optional[str] = None
+    amount_total: Optional[int] = None
+    currency: Optional[str] = None
+    payment_intent: Optional[str] = None
+
+class _PayPalToken(msgspec.Struct):
+    """Fields read from a PayPal OAuth token response"""
+    access_token: str
+    expires_in: int = 0
+
+class _PayPalLink(msgspec.Struct):
+    """HATEOAS link in a PayPal order response"""
+    href: str
+    rel: str
+
+class _PayPalOrder(msgspec.Struct):
+    """Fields read from a PayPal order"""
+    id: str
+    links: List[_PayPalLink] = []
+
+class _RazorpayPaymentLink(msgspec.Struct):
+    """Fields read from a Razorpay payment link"""
+    id: str
+    short_url: str
+
+# Typed decoders for successful responses skip building dicts for fields we never read
+_stripe_session_decoder = msgspec.json.Decoder(_StripeCheckoutSession)
+_paypal_token_decoder = msgspec.json.Decoder(_PayPalToken)
+_paypal_order_decoder = msgspec.json.Decoder(_PayPalOrder)
+_razorpay_link_decoder = msgspec.json.Decoder(_RazorpayPaymentLink)
+
 class PaymentGateway:
     """Base class for payment gateway implementations"""
     
-    def __init__(self, config: Dict[str, str]):
+    def __init__(self, config: 'GatewayConfig', session_provider: Callable[[], 'aiohttp.ClientSession']):
         self.config = config
+        self._session_provider = session_provider
+    
+    @property
+    def session(self) -> 'aiohttp.ClientSession':
+        """Shared keep-alive HTTP session owned by the gateway manager"""
+        return self._session_provider()
         
     async def create_payment(self, amount: float, currency: str, description: str, 
                            return_url: str, metadata: Dict[str, Any] = None) -> Dict[str, Any]:
@@ -43,11 +138,20 @@ class PaymentGateway:
 class StripeGateway(PaymentGateway):
     """Stripe payment gateway integration"""
     
-    def __init__(self, config: Dict[str, str]):
-        super().__init__(config)
-        self.api_key = config.get('STRIPE_SECRET_KEY')
-        self.webhook_secret = config.get('STRIPE_WEBHOOK_SECRET')
+    def __init__(self, config: 'GatewayConfig', session_provider: Callable[[], 'aiohttp.ClientSession']):
+        super().__init__(config, session_provider)
+        self.api_key = config.stripe_secret_key
+        self.webhook_secret = config.stripe_webhook_secret
         self.base_url = "https://api.stripe.com/v1"
+        # URLs and headers are fixed per gateway; build them once (aiohttp copies headers, never mutates them)
+        self._sessions_url = self.base_url + "/checkout/sessions"
+        self._sessions_url_slash = self._sessions_url + "/"
+        self._auth_headers = {'Authorization': f'Bearer {self.api_key}'}
+        self._form_headers = {**self._auth_headers, 'Content-Type': 'application/x-www-form-urlencoded'}
+        # Key setup is done once; each webhook copies this keyed state
+        self._webhook_hmac = (
+            hmac.new(self.webhook_secret.encode(), digestmod='sha256') if self.webhook_secret else None
+        )
         
     async def create_payment(self, amount: float, currency: str, description: str, 
                            return_url: str, metadata: Dict[str, Any] = None) -> Dict[str, Any]:
@@ -55,122 +159,151 @@ class StripeGateway(PaymentGateway):
         if not self.api_key:
             raise ValueError("Stripe API key not configured")
             
-        headers = {
-            'Authorization': f'Bearer {self.api_key}',
-            'Content-Type': 'application/x-www-form-urlencoded'
-        }
-        
         # Convert amount to cents for Stripe
         amount_cents = int(amount * 100)
         
-        data = {
-            'payment_method_types[]': 'card',
-            'line_items[0][price_data][currency]': currency.lower(),
-            'line_items[0][price_data][product_data][name]': description,
-            'line_items[0][price_data][unit_amount]': str(amount_cents),
-            'line_items[0][quantity]': '1',
-            'mode': 'payment',
-            'success_url': f"{return_url}?session_id={{CHECKOUT_SESSION_ID}}",
-            'cancel_url': return_url,
-        }
+        data = list(_STRIPE_STATIC_FIELDS)
+        data += (
+            ('line_items[0][price_data][currency]', currency.lower()),
+            ('line_items[0][price_data][product_data][name]', description),
+            ('line_items[0][price_data][unit_amount]', str(amount_cents)),
+            ('success_url', return_url + "?session_id={CHECKOUT_SESSION_ID}"),
+            ('cancel_url', return_url),
+        )
         
         if metadata:
-            for key, value in metadata.items():
-                data[f'metadata[{key}]'] = str(value)
+            data += (('metadata[' + key + ']', str(value)) for key, value in metadata.items())
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{self.base_url}/checkout/sessions",
-                headers=headers,
-                data=data
-            ) as response:
-                result = await response.json()
-                
-                if response.status == 200:
-                    return {
-                        'success': True,
-                        'payment_id': result['id'],
-                        'payment_url': result['url'],
-                        'status': PaymentStatus.PENDING.value,
-                        'gateway': 'stripe'
-                    }
-                else:
-                    return {
-                        'success': False,
-                        'error': result.get('error', {}).get('message', 'Unknown error'),
-                        'gateway': 'stripe'
-                    }
+        async with self.session.post(
+            self._sessions_url,
+            headers=self._form_headers,
+            data=data
+        ) as response:
+            body = await response.read()
+            
+            if response.status == 200:
+                checkout = _stripe_session_decoder.decode(body)
+                return {
+                    'success': True,
+                    'payment_id': checkout.id,
+                    'payment_url': checkout.url,
+                    'status': PaymentStatus.PENDING.value,
+                    'gateway': 'stripe'
+                }
+            else:
+                result = _json_decoder.decode(body)
+                return {
+                    'success': False,
+                    'error': result.get('error', {}).get('message', 'Unknown error'),
+                    'gateway': 'stripe'
+                }
     
     async def verify_payment(self, payment_id: str) -> Dict[str, Any]:
         """Verify Stripe payment status"""
         if not self.api_key:
             raise ValueError("Stripe API key not configured")
             
-        headers = {'Authorization': f'Bearer {self.api_key}'}
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f"{self.base_url}/checkout/sessions/{payment_id}",
-                headers=headers
-            ) as response:
-                result = await response.json()
+        async with self.session.get(
+            self._sessions_url_slash + payment_id,
+            headers=self._auth_headers
+        ) as response:
+            body = await response.read()
+            
+            if response.status == 200:
+                checkout = _stripe_session_decoder.decode(body)
+                payment_status = checkout.payment_status
+                status_map = {
+                    'paid': PaymentStatus.COMPLETED.value,
+                    'unpaid': PaymentStatus.PENDING.value,
+                    'no_payment_required': PaymentStatus.COMPLETED.value
+                }
                 
-                if response.status == 200:
-                    payment_status = result.get('payment_status')
-                    status_map = {
-                        'paid': PaymentStatus.COMPLETED.value,
-                        'unpaid': PaymentStatus.PENDING.value,
-                        'no_payment_required': PaymentStatus.COMPLETED.value
-                    }
-                    
-                    return {
-                        'success': True,
-                        'status': status_map.get(payment_status, PaymentStatus.PENDING.value),
-                        'amount': result.get('amount_total', 0) / 100,
-                        'currency': result.get('currency', '').upper(),
-                        'payment_intent': result.get('payment_intent'),
-                        'gateway': 'stripe'
-                    }
-                else:
-                    return {
-                        'success': False,
-                        'error': result.get('error', {}).get('message', 'Unknown error'),
-                        'gateway': 'stripe'
-                    }
+                return {
+                    'success': True,
+                    'status': status_map.get(payment_status, PaymentStatus.PENDING.value),
+                    'amount': (checkout.amount_total or 0) / 100,
+                    'currency': (checkout.currency or '').upper(),
+                    'payment_intent': checkout.payment_intent,
+                    'gateway': 'stripe'
+                }
+            else:
+                result = _json_decoder.decode(body)
+                return {
+                    'success': False,
+                    'error': result.get('error', {}).get('message', 'Unknown error'),
+                    'gateway': 'stripe'
+                }
+
+    def verify_webhook(self, payload: bytes, signature_header: str,
+                       tolerance: int = WEBHOOK_TOLERANCE_SECONDS) -> bool:
+        """Check a Stripe-Signature header against the raw webhook payload"""
+        if self._webhook_hmac is None:
+            raise ValueError("Stripe webhook secret not configured")
+        
+        timestamp = None
+        signatures = []
+        for item in signature_header.split(','):
+            key, _, value = item.partition('=')
+            if key == 't':
+                timestamp = value
+            elif key == 'v1':
+                signatures.append(value)
+        
+        if not timestamp or not signatures or not timestamp.isdigit():
+            return False
+        if abs(time.time() - int(timestamp)) > tolerance:
+            return False
+        
+        mac = self._webhook_hmac.copy()
+        mac.update(timestamp.encode() + b'.' + payload)
+        expected = mac.hexdigest()
+        return any(hmac.compare_digest(expected, signature) for signature in signatures)
 
 class PayPalGateway(PaymentGateway):
     """PayPal payment gateway integration"""
     
-    def __init__(self, config: Dict[str, str]):
-        super().__init__(config)
-        self.client_id = config.get('PAYPAL_CLIENT_ID')
-        self.client_secret = config.get('PAYPAL_CLIENT_SECRET')
-        self.sandbox = config.get('PAYPAL_SANDBOX', 'true').lower() == 'true'
+    def __init__(self, config: 'GatewayConfig', session_provider: Callable[[], 'aiohttp.ClientSession']):
+        super().__init__(config, session_provider)
+        self.client_id = config.paypal_client_id
+        self.client_secret = config.paypal_client_secret
+        self.sandbox = config.paypal_sandbox.lower() == 'true'
         self.base_url = "https://api.sandbox.paypal.com" if self.sandbox else "https://api.paypal.com"
+        self._token_url = self.base_url + "/v1/oauth2/token"
+        self._orders_url = self.base_url + "/v2/checkout/orders"
         self._access_token = None
+        self._token_expiry = 0.0
+        self._token_lock = asyncio.Lock()
         
     async def _get_access_token(self) -> str:
-        """Get PayPal access token"""
+        """Get PayPal access token, reusing the cached one until shortly before it expires"""
+        if self._access_token and time.monotonic() < self._token_expiry - TOKEN_REFRESH_MARGIN:
+            return self._access_token
+        
         if not self.client_id or not self.client_secret:
             raise ValueError("PayPal credentials not configured")
-            
-        auth = aiohttp.BasicAuth(self.client_id, self.client_secret)
-        headers = {'Content-Type': 'application/x-www-form-urlencoded'}
-        data = 'grant_type=client_credentials'
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{self.base_url}/v1/oauth2/token",
+        # Only one caller refreshes; the others wait and reuse its token
+        async with self._token_lock:
+            if self._access_token and time.monotonic() < self._token_expiry - TOKEN_REFRESH_MARGIN:
+                return self._access_token
+            
+            from aiohttp import BasicAuth
+            
+            auth = BasicAuth(self.client_id, self.client_secret)
+            async with self.session.post(
+                self._token_url,
                 auth=auth,
-                headers=headers,
-                data=data
+                headers=_FORM_HEADERS,
+                data='grant_type=client_credentials'
             ) as response:
-                result = await response.json()
+                body = await response.read()
                 if response.status == 200:
-                    self._access_token = result['access_token']
+                    token = _paypal_token_decoder.decode(body)
+                    self._access_token = token.access_token
+                    self._token_expiry = time.monotonic() + token.expires_in
                     return self._access_token
                 else:
-                    raise Exception(f"Failed to get PayPal access token: {result}")
+                    raise Exception(f"Failed to get PayPal access token: {_json_decoder.decode(body)}")
     
     async def create_payment(self, amount: float, currency: str, description: str, 
                            return_url: str, metadata: Dict[str, Any] = None) -> Dict[str, Any]:
@@ -200,44 +333,46 @@ class PayPalGateway(PaymentGateway):
         }
         
         if metadata:
-            payment_data["purchase_units"][0]["custom_id"] = json.dumps(metadata)
+            payment_data["purchase_units"][0]["custom_id"] = _json_encoder.encode(metadata).decode()
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{self.base_url}/v2/checkout/orders",
-                headers=headers,
-                json=payment_data
-            ) as response:
-                result = await response.json()
+        async with self.session.post(
+            self._orders_url,
+            headers=headers,
+            data=_json_encoder.encode(payment_data)
+        ) as response:
+            body = await response.read()
+            
+            if response.status == 201:
+                order = _paypal_order_decoder.decode(body)
+                approval_link = next(
+                    (link.href for link in order.links if link.rel == 'approve'),
+                    None
+                )
                 
-                if response.status == 201:
-                    approval_link = next(
-                        (link['href'] for link in result['links'] if link['rel'] == 'approve'),
-                        None
-                    )
-                    
-                    return {
-                        'success': True,
-                        'payment_id': result['id'],
-                        'payment_url': approval_link,
-                        'status': PaymentStatus.PENDING.value,
-                        'gateway': 'paypal'
-                    }
-                else:
-                    return {
-                        'success': False,
-                        'error': result.get('message', 'Unknown error'),
-                        'gateway': 'paypal'
-                    }
+                return {
+                    'success': True,
+                    'payment_id': order.id,
+                    'payment_url': approval_link,
+                    'status': PaymentStatus.PENDING.value,
+                    'gateway': 'paypal'
+                }
+            else:
+                result = _json_decoder.decode(body)
+                return {
+                    'success': False,
+                    'error': result.get('message', 'Unknown error'),
+                    'gateway': 'paypal'
+                }
 
 class RazorpayGateway(PaymentGateway):
     """Razorpay payment gateway integration (for Indian market)"""
     
-    def __init__(self, config: Dict[str, str]):
-        super().__init__(config)
-        self.key_id = config.get('RAZORPAY_KEY_ID')
-        self.key_secret = config.get('RAZORPAY_KEY_SECRET')
+    def __init__(self, config: 'GatewayConfig', session_provider: Callable[[], 'aiohttp.ClientSession']):
+        super().__init__(config, session_provider)
+        self.key_id = config.razorpay_key_id
+        self.key_secret = config.razorpay_key_secret
         self.base_url = "https://api.razorpay.com/v1"
+        self._payment_links_url = self.base_url + "/payment_links"
         
     async def create_payment(self, amount: float, currency: str, description: str, 
                            return_url: str, metadata: Dict[str, Any] = None) -> Dict[str, Any]:
@@ -245,8 +380,9 @@ class RazorpayGateway(PaymentGateway):
         if not self.key_id or not self.key_secret:
             raise ValueError("Razorpay credentials not configured")
             
-        auth = aiohttp.BasicAuth(self.key_id, self.key_secret)
-        headers = {'Content-Type': 'application/json'}
+        from aiohttp import BasicAuth
+        
+        auth = BasicAuth(self.key_id, self.key_secret)
         
         # Convert amount to smallest currency unit (paise for INR)
         amount_smallest = int(amount * 100)
@@ -262,63 +398,81 @@ class RazorpayGateway(PaymentGateway):
         if metadata:
             payment_data["notes"] = metadata
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{self.base_url}/payment_links",
-                auth=auth,
-                headers=headers,
-                json=payment_data
-            ) as response:
-                result = await response.json()
-                
-                if response.status == 200:
-                    return {
-                        'success': True,
-                        'payment_id': result['id'],
-                        'payment_url': result['short_url'],
-                        'status': PaymentStatus.PENDING.value,
-                        'gateway': 'razorpay'
-                    }
-                else:
-                    return {
-                        'success': False,
-                        'error': result.get('error', {}).get('description', 'Unknown error'),
-                        'gateway': 'razorpay'
-                    }
+        async with self.session.post(
+            self._payment_links_url,
+            auth=auth,
+            headers=_JSON_HEADERS,
+            data=_json_encoder.encode(payment_data)
+        ) as response:
+            body = await response.read()
+            
+            if response.status == 200:
+                link = _razorpay_link_decoder.decode(body)
+                return {
+                    'success': True,
+                    'payment_id': link.id,
+                    'payment_url': link.short_url,
+                    'status': PaymentStatus.PENDING.value,
+                    'gateway': 'razorpay'
+                }
+            else:
+                result = _json_decoder.decode(body)
+                return {
+                    'success': False,
+                    'error': result.get('error', {}).get('description', 'Unknown error'),
+                    'gateway': 'razorpay'
+                }
 
 class PaymentGatewayManager:
     """Manager for multiple payment gateways"""
     
-    def __init__(self):
+    def __init__(self, config: Optional['GatewayConfig'] = None):
+        self.config = config or _GATEWAY_CONFIG
         self.gateways = {}
+        self._create_dispatch: Dict[str, Callable[..., Awaitable[Dict[str, Any]]]] = {}
+        self._verify_dispatch: Dict[str, Callable[[str], Awaitable[Dict[str, Any]]]] = {}
+        self._session: Optional['aiohttp.ClientSession'] = None
         self._initialize_gateways()
     
+    def _get_session(self) -> 'aiohttp.ClientSession':
+        """Get the shared HTTP session, creating it on first use inside the running loop"""
+        if self._session is None or self._session.closed:
+            import aiohttp
+            
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300, keepalive_timeout=75)
+            )
+        return self._session
+    
+    async def aclose(self, application: Any = None):
+        """Close the shared HTTP session. Usable as an Application post_shutdown hook."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
     def _initialize_gateways(self):
         """Initialize available payment gateways"""
-        config = {
-            'STRIPE_SECRET_KEY': os.environ.get('STRIPE_SECRET_KEY'),
-            'STRIPE_WEBHOOK_SECRET': os.environ.get('STRIPE_WEBHOOK_SECRET'),
-            'PAYPAL_CLIENT_ID': os.environ.get('PAYPAL_CLIENT_ID'),
-            'PAYPAL_CLIENT_SECRET': os.environ.get('PAYPAL_CLIENT_SECRET'),
-            'PAYPAL_SANDBOX': os.environ.get('PAYPAL_SANDBOX', 'true'),
-            'RAZORPAY_KEY_ID': os.environ.get('RAZORPAY_KEY_ID'),
-            'RAZORPAY_KEY_SECRET': os.environ.get('RAZORPAY_KEY_SECRET'),
-        }
+        config = self.config
         
         # Initialize Stripe if configured
-        if config.get('STRIPE_SECRET_KEY'):
-            self.gateways['stripe'] = StripeGateway(config)
+        if config.stripe_secret_key:
+            self.gateways['stripe'] = StripeGateway(config, self._get_session)
             logger.info("Stripe gateway initialized")
         
         # Initialize PayPal if configured
-        if config.get('PAYPAL_CLIENT_ID') and config.get('PAYPAL_CLIENT_SECRET'):
-            self.gateways['paypal'] = PayPalGateway(config)
+        if config.paypal_client_id and config.paypal_client_secret:
+            self.gateways['paypal'] = PayPalGateway(config, self._get_session)
             logger.info("PayPal gateway initialized")
         
         # Initialize Razorpay if configured
-        if config.get('RAZORPAY_KEY_ID') and config.get('RAZORPAY_KEY_SECRET'):
-            self.gateways['razorpay'] = RazorpayGateway(config)
+        if config.razorpay_key_id and config.razorpay_key_secret:
+            self.gateways['razorpay'] = RazorpayGateway(config, self._get_session)
             logger.info("Razorpay gateway initialized")
+        
+        # Bind each gateway's entry points once so a request is a single lookup
+        for name, gateway in self.gateways.items():
+            self._create_dispatch[name] = gateway.create_payment
+            self._verify_dispatch[name] = gateway.verify_payment
     
     def get_available_gateways(self) -> list:
         """Get list of available payment gateways"""
@@ -331,8 +485,8 @@ class PaymentGatewayManager:
     async def create_payment(self, gateway_name: str, amount: float, currency: str, 
                            description: str, return_url: str, metadata: Dict[str, Any] = None) -> Dict[str, Any]:
         """Create payment using specified gateway"""
-        gateway = self.get_gateway(gateway_name)
-        if not gateway:
+        create = self._create_dispatch.get(gateway_name)
+        if create is None:
             return {
                 'success': False,
                 'error': f'Gateway {gateway_name} not available',
@@ -340,7 +494,7 @@ class PaymentGatewayManager:
             }
         
         try:
-            return await gateway.create_payment(amount, currency, description, return_url, metadata)
+            return await create(amount, currency, description, return_url, metadata)
         except Exception as e:
             logger.error(f"Payment creation failed for {gateway_name}: {str(e)}")
             return {
@@ -351,8 +505,8 @@ class PaymentGatewayManager:
     
     async def verify_payment(self, gateway_name: str, payment_id: str) -> Dict[str, Any]:
         """Verify payment using specified gateway"""
-        gateway = self.get_gateway(gateway_name)
-        if not gateway:
+        verify = self._verify_dispatch.get(gateway_name)
+        if verify is None:
             return {
                 'success': False,
                 'error': f'Gateway {gateway_name} not available',
@@ -360,7 +514,7 @@ class PaymentGatewayManager:
             }
         
         try:
-            return await gateway.verify_payment(payment_id)
+            return await verify(payment_id)
         except Exception as e:
             logger.error(f"Payment verification failed for {gateway_name}: {str(e)}")
             return {
@@ -368,6 +522,17 @@ class PaymentGatewayManager:
                 'error': str(e),
                 'gateway': gateway_name
             }
+    
+    async def verify_payments_batch(self, items: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """Verify many (gateway_name, payment_id) pairs concurrently, returning results in input order"""
+        semaphores = {gateway_name: asyncio.Semaphore(VERIFY_BATCH_CONCURRENCY) for gateway_name, _ in items}
+        
+        async def verify(gateway_name: str, payment_id: str) -> Dict[str, Any]:
+            # Cap in-flight requests per gateway to stay inside each provider's rate limits
+            async with semaphores[gateway_name]:
+                return await self.verify_payment(gateway_name, payment_id)
+        
+        return await asyncio.gather(*(verify(gateway_name, payment_id) for gateway_name, payment_id in items))
 
 # Global payment manager instance
 payment_manager = PaymentGatewayManager()
\ No newline at end of file
@@ -29,8 +29,13 @@ async def test_registration():
         
         # Check if we can query the users table
         from sqlalchemy import text
-        result = session.execute(text("SELECT COUNT(*) FROM users")).scalar()
-        print(f"✅ Database connected! Users count: {result}")
+        # The planner's row estimate is O(1); only count for real if the table was never analyzed
+        result = session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE relname = :t"), {"t": "users"}
+        ).scalar()
+        if result is None or result < 0:
+            result = session.execute(text("SELECT COUNT(*) FROM users")).scalar()
+        print(f"✅ Database connected! Users count (approx.): {result}")
         
         session.close()
         return True
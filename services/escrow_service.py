@@ -2,27 +2,132 @@
 Escrow service for the Telegram Escrow Bot.
 Manages transactions, disputes, and escrow functionality.
 """
+import asyncio
+import bisect
+import heapq
+import itertools
 import logging
-import uuid
+import secrets
+import threading
+import time
+from collections import defaultdict
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Set
 
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DataError, IntegrityError, OperationalError, SQLAlchemyError
+
+from db_models import SessionLocal, Transaction as DbTransaction
+from models.dispute import Dispute
 from models.transaction import Transaction
 from models.wallet import Wallet, WalletTransaction
+from services.executor import DB_EXECUTOR
 from services.user_service import UserService
 from config import TransactionStatus, DisputeStatus
 
 logger = logging.getLogger(__name__)
 
+# New and changed transactions are buffered and written to the database in batches of
+# this size, or every PENDING_FLUSH_INTERVAL seconds, whichever comes first
+PENDING_FLUSH_SIZE = 500
+PENDING_FLUSH_INTERVAL = 5.0
+
+# Buffered rows are upserted: new transactions are inserted, known ones get their
+# mutable columns updated, so the table follows every state transition
+_UPSERT_TXN = pg_insert(DbTransaction)
+_UPSERT_TXN_STMT = _UPSERT_TXN.on_conflict_do_update(
+    index_elements=[DbTransaction.id],
+    set_={
+        column: _UPSERT_TXN.excluded[column]
+        for column in ('buyer_id', 'status', 'updated_at', 'completed_at')
+    }
+)
+
+# Transaction statuses from which a dispute may be opened
+_DISPUTABLE_STATUSES = frozenset({TransactionStatus.FUNDED, TransactionStatus.CONFIRMED})
+
+# Terminal transaction statuses; no transition can follow, so their locks are dropped
+_FINAL_STATUSES = frozenset({TransactionStatus.COMPLETED, TransactionStatus.CANCELLED, TransactionStatus.REFUNDED})
+
 class EscrowService:
     """Service for managing escrow transactions and wallets."""
     
+    _instance: Optional["EscrowService"] = None
+    _instance_lock = threading.Lock()
+    
+    @classmethod
+    def get(cls) -> "EscrowService":
+        """
+        Get the process-wide shared instance, creating it on first use.
+        
+        Returns:
+            The shared EscrowService
+        """
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+    
     def __init__(self):
         """Initialize the escrow service with in-memory storage."""
         self.transactions: Dict[str, Transaction] = {}
         self.wallets: Dict[int, Wallet] = {}
-        self.disputes: Dict[str, Dict[str, Any]] = {}
-        self.user_service = UserService()
+        self.disputes: Dict[str, Dispute] = {}
+        # Per-user transaction ID indices, each kept sorted oldest first
+        self._by_seller: Dict[int, List[str]] = defaultdict(list)
+        self._by_buyer: Dict[int, List[str]] = defaultdict(list)
+        self._buyer_indexed: Set[str] = set()
+        self.user_service = UserService.get()
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        # Latest unwritten state of each transaction, keyed by ID
+        self._pending_txns: Dict[str, Dict[str, Any]] = {}
+        self._pending_lock = threading.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+    
+    def _created_at(self, transaction_id: str) -> int:
+        """Sort key for the per-user indices."""
+        return self.transactions[transaction_id].created_at
+    
+    def _transaction_lock(self, transaction_id: str) -> Optional[threading.Lock]:
+        """
+        Get the lock serializing state transitions of a transaction.
+        
+        Transaction IDs arrive in user-controlled callback data, so locks are only
+        registered for transactions that exist and can still change state.
+        
+        Args:
+            transaction_id: Transaction ID
+            
+        Returns:
+            Lock dedicated to this transaction, or None if the transaction does not exist
+        """
+        with self._locks_guard:
+            transaction = self.transactions.get(transaction_id)
+            if transaction is None:
+                return None
+            lock = self._locks.get(transaction_id)
+            if lock is None:
+                if transaction.status in _FINAL_STATUSES:
+                    # No transition can follow, so a private lock suffices and nothing is left behind
+                    return threading.Lock()
+                lock = self._locks[transaction_id] = threading.Lock()
+            return lock
+    
+    def _drop_lock_if_final(self, transaction: Transaction) -> None:
+        """
+        Forget a transaction's lock once it can no longer change state.
+        
+        Called while holding the lock. A caller already waiting on it still sees
+        the final status and fails its check, so no later transition is possible.
+        
+        Args:
+            transaction: Transaction that was just transitioned
+        """
+        if transaction.status in _FINAL_STATUSES:
+            with self._locks_guard:
+                self._locks.pop(transaction.id, None)
     
     def create_transaction(self, transaction: Transaction) -> bool:
         """
@@ -41,16 +146,162 @@ class EscrowService:
             
             # Save the transaction
             self.transactions[transaction.id] = transaction
+            bisect.insort(self._by_seller[transaction.seller_id], transaction.id, key=self._created_at)
+            
+            self._queue_row(transaction)
             
             # Add transaction to seller's list
             self.user_service.add_transaction_to_user(transaction.seller_id, transaction.id)
             
+            self.user_service.invalidate_user_stats(transaction.seller_id, transaction.buyer_id)
+            
             logger.info(f"Transaction {transaction.id} created successfully.")
             return True
         except Exception as e:
             logger.error(f"Error creating transaction: {e}")
             return False
     
+    def _queue_row(self, transaction: Transaction) -> None:
+        """
+        Buffer a transaction's current state for the next batched upsert.
+        
+        A newer state replaces an unwritten older one. A full batch is flushed off the event loop.
+        
+        Args:
+            transaction: Transaction that was created or changed
+        """
+        with self._pending_lock:
+            self._pending_txns[transaction.id] = self._transaction_row(transaction)
+            flush_now = len(self._pending_txns) >= PENDING_FLUSH_SIZE
+        if flush_now:
+            DB_EXECUTOR.submit(self.flush_pending)
+    
+    @staticmethod
+    def _transaction_row(transaction: Transaction) -> Dict[str, Any]:
+        """Column values for upserting a transaction into the database."""
+        return {
+            'id': transaction.id,
+            'title': transaction.title,
+            'description': transaction.description,
+            'amount': transaction.amount,
+            'fee': transaction.fee,
+            'payment_method': transaction.payment_method,
+            'seller_id': transaction.seller_id,
+            'buyer_id': transaction.buyer_id,
+            'status': transaction.status,
+            'created_at': transaction.created_at_dt,
+            'updated_at': transaction.updated_at_dt,
+            'completed_at': transaction.completed_at_dt,
+        }
+    
+    def flush_pending(self) -> int:
+        """
+        Write buffered transactions to the database in one batched upsert.
+        
+        SQLAlchemy sends the rows as multi-row VALUES statements, the same
+        technique as psycopg2's execute_values. If the database is unreachable
+        the rows are put back and retried on the next flush. If some rows are
+        rejected (e.g. a party missing from users), only those rows are dropped.
+        Cached stats of the affected users are dropped once the rows are committed.
+        
+        Returns:
+            Number of transactions written
+        """
+        with self._pending_lock:
+            pending, self._pending_txns = self._pending_txns, {}
+        if not pending:
+            return 0
+        rows = list(pending.values())
+        
+        session = SessionLocal()
+        try:
+            try:
+                session.execute(_UPSERT_TXN_STMT, rows)
+                written = len(rows)
+            except (IntegrityError, DataError):
+                # Redo the batch in savepoints to isolate the offending rows
+                session.rollback()
+                written = self._insert_isolating_bad_rows(session, rows)
+            session.commit()
+            logger.info(f"Flushed {written} transactions to the database.")
+            
+            # Stats read before the flush came from the old rows
+            for row in rows:
+                self.user_service.invalidate_user_stats(row['seller_id'], row['buyer_id'])
+            return written
+        except OperationalError as e:
+            session.rollback()
+            logger.warning(f"Database unavailable, keeping {len(rows)} transactions for the next flush: {e}")
+            with self._pending_lock:
+                # Keep any newer state queued while this flush was running
+                for row in rows:
+                    self._pending_txns.setdefault(row['id'], row)
+            return 0
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.error(f"Error flushing transactions, dropping batch of {len(rows)}: {e}")
+            return 0
+        finally:
+            session.close()
+    
+    def _insert_isolating_bad_rows(self, session, rows: List[Dict[str, Any]]) -> int:
+        """
+        Upsert rows inside a savepoint, splitting the batch in halves on row-level errors.
+        
+        Args:
+            session: Session whose transaction the caller commits
+            rows: Transaction rows to upsert
+            
+        Returns:
+            Number of rows written; rejected rows are logged and dropped
+        """
+        try:
+            with session.begin_nested():
+                session.execute(_UPSERT_TXN_STMT, rows)
+            return len(rows)
+        except (IntegrityError, DataError) as e:
+            if len(rows) == 1:
+                logger.error(f"Dropping transaction {rows[0]['id']} rejected by the database: {e.orig}")
+                return 0
+            mid = len(rows) // 2
+            return (self._insert_isolating_bad_rows(session, rows[:mid])
+                    + self._insert_isolating_bad_rows(session, rows[mid:]))
+    
+    async def _flush_periodically(self, interval: float) -> None:
+        """Flush a partial batch on the DB thread pool every interval seconds."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            if not self._pending_txns:
+                continue
+            try:
+                await loop.run_in_executor(DB_EXECUTOR, self.flush_pending)
+            except Exception as e:
+                logger.error(f"Periodic transaction flush failed: {e}")
+    
+    def start_flush_timer(self, interval: float = PENDING_FLUSH_INTERVAL) -> None:
+        """
+        Start flushing buffered transactions on a timer, alongside the batch-size trigger.
+        
+        Must be called from the running event loop; calling it again is a no-op.
+        
+        Args:
+            interval: Seconds between flushes
+        """
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_periodically(interval))
+    
+    async def stop_flush_timer(self) -> None:
+        """Stop the flush timer started by start_flush_timer, if any."""
+        task, self._flush_task = self._flush_task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    
     def get_transaction(self, transaction_id: str) -> Optional[Transaction]:
         """
         Get a transaction by its ID.
@@ -79,43 +330,52 @@ class EscrowService:
                 return False
             
             # Update timestamp
-            transaction.updated_at = datetime.now()
+            transaction.updated_at = time.time_ns()
             
             # Save the updated transaction
             self.transactions[transaction.id] = transaction
             
             # If there's a buyer and they're not already associated with the transaction
-            if transaction.buyer_id and transaction.id not in self.user_service.get_user(transaction.buyer_id).transactions:
+            if transaction.buyer_id and transaction.id not in self._buyer_indexed:
+                self._buyer_indexed.add(transaction.id)
+                if transaction.buyer_id != transaction.seller_id:
+                    bisect.insort(self._by_buyer[transaction.buyer_id], transaction.id, key=self._created_at)
                 self.user_service.add_transaction_to_user(transaction.buyer_id, transaction.id)
             
+            self._queue_row(transaction)
+            self.user_service.invalidate_user_stats(transaction.seller_id, transaction.buyer_id)
+            
             logger.info(f"Transaction {transaction.id} updated successfully.")
             return True
         except Exception as e:
             logger.error(f"Error updating transaction: {e}")
             return False
     
-    def get_user_transactions(self, user_id: int) -> List[Transaction]:
+    def get_user_transactions(self, user_id: int, limit: Optional[int] = None, offset: int = 0) -> List[Transaction]:
         """
-        Get all transactions for a user.
+        Get transactions for a user, newest first.
         
         Args:
             user_id: User's Telegram ID
+            limit: Maximum number of transactions to return (all if None)
+            offset: Number of newest transactions to skip
             
         Returns:
             List of transactions where the user is either buyer or seller
         """
-        user_transactions = []
-        
-        for txn in self.transactions.values():
-            if txn.seller_id == user_id or txn.buyer_id == user_id:
-                user_transactions.append(txn)
-        
-        # Sort by created_at, newest first
-        user_transactions.sort(key=lambda x: x.created_at, reverse=True)
-        
-        return user_transactions
+        # Both indices are already sorted, so walking them backwards and merging yields newest first
+        newest_first = heapq.merge(
+            reversed(self._by_seller.get(user_id, ())),
+            reversed(self._by_buyer.get(user_id, ())),
+            key=self._created_at,
+            reverse=True
+        )
+        
+        stop = None if limit is None else offset + limit
+        transactions = self.transactions
+        return [transactions[tid] for tid in itertools.islice(newest_first, offset, stop)]
     
-    def cancel_transaction(self, transaction_id: str, user_id: int) -> bool:
+    def cancel_transaction(self, transaction_id: str, user_id: int) -> Optional[Transaction]:
         """
         Cancel a transaction.
         
@@ -124,31 +384,37 @@ class EscrowService:
             user_id: User's Telegram ID initiating the cancellation
             
         Returns:
-            True if cancellation was successful, False otherwise
+            The updated transaction if cancellation was successful, None otherwise
         """
-        transaction = self.get_transaction(transaction_id)
-        
-        if not transaction:
+        # Check and transition under the transaction's lock so concurrent actions can't both succeed
+        lock = self._transaction_lock(transaction_id)
+        if lock is None:
             logger.warning(f"Transaction {transaction_id} not found.")
-            return False
-        
-        # Check if user is authorized to cancel
-        if user_id != transaction.seller_id and user_id != transaction.buyer_id:
-            logger.warning(f"User {user_id} not authorized to cancel transaction {transaction_id}.")
-            return False
-        
-        # Check if transaction can be cancelled
-        if transaction.status != TransactionStatus.CREATED:
-            logger.warning(f"Transaction {transaction_id} cannot be cancelled in {transaction.status} status.")
-            return False
-        
-        # Update transaction status
-        transaction.status = TransactionStatus.CANCELLED
-        transaction.updated_at = datetime.now()
+            return None
         
-        return self.update_transaction(transaction)
+        with lock:
+            transaction = self.transactions[transaction_id]
+            
+            # Check if user is authorized to cancel
+            if user_id not in (transaction.seller_id, transaction.buyer_id):
+                logger.warning(f"User {user_id} not authorized to cancel transaction {transaction_id}.")
+                return None
+            
+            # Check if transaction can be cancelled
+            if transaction.status != TransactionStatus.CREATED:
+                logger.warning(f"Transaction {transaction_id} cannot be cancelled in {transaction.status} status.")
+                return None
+            
+            # Update transaction status
+            transaction.status = TransactionStatus.CANCELLED
+            transaction.updated_at = time.time_ns()
+            
+            if not self.update_transaction(transaction):
+                return None
+            self._drop_lock_if_final(transaction)
+            return transaction
     
-    def confirm_transaction(self, transaction_id: str, user_id: int) -> bool:
+    def confirm_transaction(self, transaction_id: str, user_id: int) -> Optional[Transaction]:
         """
         Seller confirms receipt of payment.
         
@@ -157,31 +423,34 @@ class EscrowService:
             user_id: User's Telegram ID (should be the seller)
             
         Returns:
-            True if confirmation was successful, False otherwise
+            The updated transaction if confirmation was successful, None otherwise
         """
-        transaction = self.get_transaction(transaction_id)
-        
-        if not transaction:
+        # Check and transition under the transaction's lock so concurrent actions can't both succeed
+        lock = self._transaction_lock(transaction_id)
+        if lock is None:
             logger.warning(f"Transaction {transaction_id} not found.")
-            return False
-        
-        # Check if user is the seller
-        if user_id != transaction.seller_id:
-            logger.warning(f"User {user_id} is not the seller for transaction {transaction_id}.")
-            return False
-        
-        # Check if transaction is in the right state
-        if transaction.status != TransactionStatus.FUNDED:
-            logger.warning(f"Transaction {transaction_id} cannot be confirmed in {transaction.status} status.")
-            return False
+            return None
         
-        # Update transaction status
-        transaction.status = TransactionStatus.CONFIRMED
-        transaction.updated_at = datetime.now()
-        
-        return self.update_transaction(transaction)
+        with lock:
+            transaction = self.transactions[transaction_id]
+            
+            # Check if user is the seller
+            if user_id != transaction.seller_id:
+                logger.warning(f"User {user_id} is not the seller for transaction {transaction_id}.")
+                return None
+            
+            # Check if transaction is in the right state
+            if transaction.status != TransactionStatus.FUNDED:
+                logger.warning(f"Transaction {transaction_id} cannot be confirmed in {transaction.status} status.")
+                return None
+            
+            # Update transaction status
+            transaction.status = TransactionStatus.CONFIRMED
+            transaction.updated_at = time.time_ns()
+            
+            return transaction if self.update_transaction(transaction) else None
     
-    def complete_transaction(self, transaction_id: str, user_id: int) -> bool:
+    def complete_transaction(self, transaction_id: str, user_id: int) -> Optional[Transaction]:
         """
         Complete a transaction, releasing funds to the seller.
         
@@ -190,33 +459,39 @@ class EscrowService:
             user_id: User's Telegram ID (should be the buyer)
             
         Returns:
-            True if completion was successful, False otherwise
+            The updated transaction if completion was successful, None otherwise
         """
-        transaction = self.get_transaction(transaction_id)
-        
-        if not transaction:
+        # Check and transition under the transaction's lock so concurrent actions can't both succeed
+        lock = self._transaction_lock(transaction_id)
+        if lock is None:
             logger.warning(f"Transaction {transaction_id} not found.")
-            return False
-        
-        # Check if user is the buyer
-        if user_id != transaction.buyer_id:
-            logger.warning(f"User {user_id} is not the buyer for transaction {transaction_id}.")
-            return False
+            return None
         
-        # Check if transaction is in the right state
-        if transaction.status != TransactionStatus.CONFIRMED:
-            logger.warning(f"Transaction {transaction_id} cannot be completed in {transaction.status} status.")
-            return False
-        
-        # Update transaction status
-        transaction.status = TransactionStatus.COMPLETED
-        transaction.updated_at = datetime.now()
-        transaction.completed_at = datetime.now()
-        
-        # In a real implementation, this would trigger the escrow release logic
-        # For this demo, we'll just update the transaction status
-        
-        return self.update_transaction(transaction)
+        with lock:
+            transaction = self.transactions[transaction_id]
+            
+            # Check if user is the buyer
+            if user_id != transaction.buyer_id:
+                logger.warning(f"User {user_id} is not the buyer for transaction {transaction_id}.")
+                return None
+            
+            # Check if transaction is in the right state
+            if transaction.status != TransactionStatus.CONFIRMED:
+                logger.warning(f"Transaction {transaction_id} cannot be completed in {transaction.status} status.")
+                return None
+            
+            # Update transaction status
+            transaction.status = TransactionStatus.COMPLETED
+            transaction.updated_at = time.time_ns()
+            transaction.completed_at = time.time_ns()
+            
+            # In a real implementation, this would trigger the escrow release logic
+            # For this demo, we'll just update the transaction status
+            
+            if not self.update_transaction(transaction):
+                return None
+            self._drop_lock_if_final(transaction)
+            return transaction
     
     def get_user_wallet(self, user_id: int) -> Optional[Wallet]:
         """
@@ -230,7 +505,7 @@ class EscrowService:
         """
         if user_id not in self.wallets:
             # Create a new wallet for the user
-            wallet_id = str(uuid.uuid4())
+            wallet_id = secrets.token_hex(16)
             self.wallets[user_id] = Wallet(id=wallet_id, user_id=user_id)
         
         return self.wallets.get(user_id)
@@ -248,56 +523,62 @@ class EscrowService:
         Returns:
             True if dispute was opened successfully, False otherwise
         """
-        transaction = self.get_transaction(transaction_id)
-        
-        if not transaction:
+        # Check and transition under the transaction's lock so a concurrent completion or
+        # cancellation can't also succeed
+        lock = self._transaction_lock(transaction_id)
+        if lock is None:
             logger.warning(f"Transaction {transaction_id} not found.")
             return False
         
-        # Check if user is part of the transaction
-        if user_id != transaction.seller_id and user_id != transaction.buyer_id:
-            logger.warning(f"User {user_id} not authorized to open dispute for transaction {transaction_id}.")
-            return False
-        
-        # Check if transaction is in a state that can be disputed
-        if transaction.status not in [TransactionStatus.FUNDED, TransactionStatus.CONFIRMED]:
-            logger.warning(f"Transaction {transaction_id} cannot be disputed in {transaction.status} status.")
-            return False
-        
-        # Check if there's already a dispute
-        if transaction_id in self.disputes:
-            logger.warning(f"Dispute already exists for transaction {transaction_id}.")
-            return False
-        
-        # Determine the opener's role
-        opener_role = "seller" if user_id == transaction.seller_id else "buyer"
-        
-        # Create the dispute
-        dispute = {
-            'transaction_id': transaction_id,
-            'opened_by': opener_role,
-            'reason': reason,
-            'evidence': evidence,
-            'response': None,
-            'status': DisputeStatus.OPEN,
-            'resolution': None,
-            'opened_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'resolved_at': None
-        }
-        
-        self.disputes[transaction_id] = dispute
-        
-        # Update transaction status
-        transaction.status = TransactionStatus.DISPUTED
-        transaction.updated_at = datetime.now()
-        transaction.dispute = {'status': DisputeStatus.OPEN}
-        
-        self.update_transaction(transaction)
+        with lock:
+            transaction = self.transactions[transaction_id]
+            
+            # Check if user is part of the transaction
+            if user_id not in (transaction.seller_id, transaction.buyer_id):
+                logger.warning(f"User {user_id} not authorized to open dispute for transaction {transaction_id}.")
+                return False
+            
+            # Check if transaction is in a state that can be disputed
+            if transaction.status not in _DISPUTABLE_STATUSES:
+                logger.warning(f"Transaction {transaction_id} cannot be disputed in {transaction.status} status.")
+                return False
+            
+            # Check if there's already a dispute
+            if transaction_id in self.disputes:
+                logger.warning(f"Dispute already exists for transaction {transaction_id}.")
+                return False
+            
+            # Determine the opener's role
+            opener_role = "seller" if user_id == transaction.seller_id else "buyer"
+            
+            # Read the clock once; timestamps are kept raw and formatted only for display
+            now = time.time_ns()
+            
+            # Create the dispute
+            dispute = Dispute(
+                transaction_id=transaction_id,
+                opened_by=opener_role,
+                reason=reason,
+                evidence=evidence,
+                opened_at=datetime.fromtimestamp(now / 1e9)
+            )
+            
+            self.disputes[transaction_id] = dispute
+            
+            # Update transaction status
+            transaction.status = TransactionStatus.DISPUTED
+            transaction.updated_at = now
+            transaction.dispute = {'status': DisputeStatus.OPEN}
+            
+            # The stored transaction was mutated in place and its parties are already indexed;
+            # only its database row and the cached stats of both parties are stale
+            self._queue_row(transaction)
+            self.user_service.invalidate_user_stats(transaction.seller_id, transaction.buyer_id)
         
         logger.info(f"Dispute opened for transaction {transaction_id}.")
         return True
     
-    def get_dispute(self, transaction_id: str) -> Optional[Dict[str, Any]]:
+    def get_dispute(self, transaction_id: str) -> Optional[Dispute]:
         """
         Get a dispute by transaction ID.
         
@@ -305,7 +586,7 @@ class EscrowService:
             transaction_id: Transaction ID
             
         Returns:
-            Dispute dictionary if found, None otherwise
+            Dispute if found, None otherwise
         """
         return self.disputes.get(transaction_id)
     
@@ -320,38 +601,77 @@ class EscrowService:
         Returns:
             True if resolution was successful, False otherwise
         """
-        transaction = self.get_transaction(transaction_id)
-        dispute = self.get_dispute(transaction_id)
-        
-        if not transaction or not dispute:
+        # Check and transition under the transaction's lock, as in open_dispute
+        lock = self._transaction_lock(transaction_id)
+        if lock is None:
             logger.warning(f"Transaction or dispute not found for ID {transaction_id}.")
             return False
         
-        if dispute['status'] != DisputeStatus.OPEN:
-            logger.warning(f"Dispute for transaction {transaction_id} is not open.")
-            return False
-        
-        # Update dispute
-        dispute['status'] = DisputeStatus.RESOLVED
-        dispute['resolution'] = resolution
-        dispute['resolved_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
-        # Update transaction status based on resolution
-        if resolution == 'buyer':
-            # Return funds to buyer
-            transaction.status = TransactionStatus.REFUNDED
-        elif resolution == 'seller':
-            # Release funds to seller
-            transaction.status = TransactionStatus.COMPLETED
-            transaction.completed_at = datetime.now()
-        else:  # 'refund'
-            # Partial refund/negotiated solution
-            transaction.status = TransactionStatus.REFUNDED
-        
-        transaction.updated_at = datetime.now()
-        transaction.dispute = {'status': DisputeStatus.RESOLVED, 'resolution': resolution}
-        
-        self.update_transaction(transaction)
+        with lock:
+            transaction = self.transactions[transaction_id]
+            dispute = self.disputes.get(transaction_id)
+            
+            if not dispute:
+                logger.warning(f"Transaction or dispute not found for ID {transaction_id}.")
+                return False
+            
+            if dispute.status != DisputeStatus.OPEN:
+                logger.warning(f"Dispute for transaction {transaction_id} is not open.")
+                return False
+            
+            # Read the clock once; timestamps are kept raw and formatted only for display
+            now = time.time_ns()
+            
+            # Update dispute
+            dispute.status = DisputeStatus.RESOLVED
+            dispute.resolution = resolution
+            dispute.resolved_at = datetime.fromtimestamp(now / 1e9)
+            
+            # Update transaction status based on resolution
+            if resolution == 'buyer':
+                # Return funds to buyer
+                transaction.status = TransactionStatus.REFUNDED
+            elif resolution == 'seller':
+                # Release funds to seller
+                transaction.status = TransactionStatus.COMPLETED
+                transaction.completed_at = now
+            else:  # 'refund'
+                # Partial refund/negotiated solution
+                transaction.status = TransactionStatus.REFUNDED
+            
+            transaction.updated_at = now
+            transaction.dispute = {'status': DisputeStatus.RESOLVED, 'resolution': resolution}
+            
+            # Mutated in place, as in open_dispute
+            self._queue_row(transaction)
+            self.user_service.invalidate_user_stats(transaction.seller_id, transaction.buyer_id)
+            self._drop_lock_if_final(transaction)
         
         logger.info(f"Dispute resolved for transaction {transaction_id} with outcome: {resolution}.")
         return True
+
+
+async def start_transaction_flusher(application: Any = None) -> None:
+    """
+    Start the shared escrow service's periodic flush of buffered transactions.
+    
+    Usable as an Application post_init hook, so a quiet bot still writes new
+    transactions within PENDING_FLUSH_INTERVAL seconds.
+    
+    Args:
+        application: The telegram Application (unused)
+    """
+    EscrowService.get().start_flush_timer()
+
+async def flush_pending_transactions(application: Any = None) -> None:
+    """
+    Stop the periodic flush and write the remaining buffered transactions on the DB thread pool.
+    
+    Usable as an Application post_shutdown hook so a partial batch is not lost.
+    
+    Args:
+        application: The telegram Application (unused)
+    """
+    service = EscrowService.get()
+    await service.stop_flush_timer()
+    await asyncio.get_running_loop().run_in_executor(DB_EXECUTOR, service.flush_pending)
@@ -0,0 +1,25 @@
+"""
+Shared thread pool for blocking database work in the Telegram Escrow Bot.
+Sized to the SQLAlchemy connection pool so threads never queue for a connection.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from db_models import DB_POOL_SIZE
+
+# One worker per pooled connection, following DB_POOL_SIZE overrides
+DB_EXECUTOR_WORKERS = DB_POOL_SIZE
+DB_EXECUTOR = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="db")
+
+async def install_default_executor(application: Any = None) -> None:
+    """
+    Make DB_EXECUTOR the event loop's default executor.
+    
+    Usable as an Application post_init hook, so ``run_in_executor(None, ...)``
+    calls from any library share the same bounded pool.
+    
+    Args:
+        application: The telegram Application (unused)
+    """
+    asyncio.get_running_loop().set_default_executor(DB_EXECUTOR)
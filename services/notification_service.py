@@ -0,0 +1,161 @@
+"""
+Notification service for the Telegram Escrow Bot.
+Delivers outbound notifications from a bounded background queue so handlers
+never wait on Telegram's bot-wide send rate limit.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+from telegram.error import RetryAfter
+
+logger = logging.getLogger(__name__)
+
+# Telegram allows roughly 30 messages per second per bot; stay safely below it
+MAX_MESSAGES_PER_SECOND = 25
+NOTIFY_QUEUE_SIZE = 1000
+NOTIFY_WORKERS = 3
+MAX_SEND_ATTEMPTS = 3
+# Seconds to wait at shutdown for queued messages to be delivered
+NOTIFY_DRAIN_TIMEOUT = 10.0
+
+
+@dataclass
+class NotifyJob:
+    """
+    A pending outbound message.
+
+    Attributes:
+        bot: Bot instance used to send the message
+        chat_id: Telegram chat ID of the recipient
+        text: Message text
+        parse_mode: Telegram parse mode for the text
+        attempts: Number of delivery attempts made so far
+    """
+    bot: Any
+    chat_id: int
+    text: str
+    parse_mode: Optional[str] = "Markdown"
+    attempts: int = 0
+
+
+class NotificationService:
+    """Service for rate-limited background delivery of notifications."""
+
+    def __init__(self, rate: float = MAX_MESSAGES_PER_SECOND, queue_size: int = NOTIFY_QUEUE_SIZE,
+                 workers: int = NOTIFY_WORKERS):
+        """Initialize the notification service. Workers start on first use."""
+        self.rate = rate
+        self.queue_size = queue_size
+        self.worker_count = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._slot_lock: Optional[asyncio.Lock] = None
+        self._next_slot = 0.0
+
+    def _ensure_started(self) -> None:
+        """Create the queue and worker tasks on the running event loop."""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._slot_lock = asyncio.Lock()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.worker_count)]
+
+    def enqueue(self, bot: Any, chat_id: int, text: str, parse_mode: Optional[str] = "Markdown") -> bool:
+        """
+        Queue a message for background delivery.
+
+        Args:
+            bot: Bot instance used to send the message
+            chat_id: Telegram chat ID of the recipient
+            text: Message text
+            parse_mode: Telegram parse mode for the text
+
+        Returns:
+            True if the message was queued, False if the queue is full
+        """
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(NotifyJob(bot=bot, chat_id=chat_id, text=text, parse_mode=parse_mode))
+            return True
+        except asyncio.QueueFull:
+            logger.warning("Notification queue full, dropping message to %s", chat_id)
+            return False
+
+    async def aclose(self, application: Any = None) -> None:
+        """
+        Deliver the queued messages, then stop the workers.
+        
+        Waits at most NOTIFY_DRAIN_TIMEOUT seconds for the queue to drain.
+        Usable as an Application post_shutdown hook.
+        
+        Args:
+            application: The telegram Application (unused)
+        """
+        if not self._workers:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), NOTIFY_DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("Notification queue not drained at shutdown, dropping %s messages", self._queue.qsize())
+        
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+    
+    async def _throttle(self) -> None:
+        """Wait for the next free send slot under the global rate limit."""
+        async with self._slot_lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + 1 / self.rate
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def _back_off(self, delay: float) -> None:
+        """Hold every worker's next send until Telegram's flood wait has passed."""
+        async with self._slot_lock:
+            self._next_slot = max(self._next_slot, time.monotonic() + delay)
+
+    async def _worker(self) -> None:
+        """Deliver queued messages one at a time."""
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._deliver(job)
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, job: NotifyJob) -> None:
+        """
+        Send one message, retrying when Telegram asks us to back off.
+
+        The flood limit is bot-wide, so RetryAfter delays the shared send slot
+        for all workers; the job is then retried in place, keeping its order,
+        and waits for that slot like any other send.
+
+        Args:
+            job: Message to deliver
+        """
+        while True:
+            try:
+                await self._throttle()
+                await job.bot.send_message(chat_id=job.chat_id, text=job.text, parse_mode=job.parse_mode)
+                return
+            except RetryAfter as e:
+                job.attempts += 1
+                if job.attempts >= MAX_SEND_ATTEMPTS:
+                    logger.error("Giving up notifying user %s after %s attempts", job.chat_id, job.attempts)
+                    return
+                delay = e.retry_after
+                await self._back_off(delay.total_seconds() if hasattr(delay, "total_seconds") else delay)
+            except Exception as e:
+                logger.error("Failed to notify user %s: %s", job.chat_id, e)
+                return
+
+
+# Global notification service instance
+notification_service = NotificationService()
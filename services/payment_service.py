@@ -3,6 +3,7 @@ Payment service for the Telegram Escrow Bot.
 Manages payment methods and verification.
 """
 import logging
+import threading
 from typing import Dict, List, Optional, Any
 
 from services.user_service import UserService
@@ -13,11 +14,30 @@ logger = logging.getLogger(__name__)
 class PaymentService:
     """Service for managing payments and payment methods."""
     
+    _instance: Optional["PaymentService"] = None
+    _instance_lock = threading.Lock()
+    
+    @classmethod
+    def get(cls) -> "PaymentService":
+        """
+        Get the process-wide shared instance, creating it on first use.
+        
+        Returns:
+            The shared PaymentService
+        """
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+    
     def __init__(self):
         """Initialize the payment service."""
-        self.user_service = UserService()
-        self.escrow_service = EscrowService()
+        self.user_service = UserService.get()
+        self.escrow_service = EscrowService.get()
         self.payment_methods: Dict[int, List[Dict[str, Any]]] = {}
+        # Lowercased method name -> method, per user, for O(1) lookups by name
+        self._methods_by_name: Dict[int, Dict[str, Dict[str, Any]]] = {}
     
     def add_payment_method(self, method_data: Dict[str, Any]) -> bool:
         """
@@ -54,6 +74,8 @@ class PaymentService:
             
             # Add the payment method
             self.payment_methods[user_id].append(payment_method)
+            # The first method added under a name wins, as with the old linear search
+            self._methods_by_name.setdefault(user_id, {}).setdefault(payment_method['name'].lower(), payment_method)
             logger.info(f"Payment method added for user {user_id}.")
             return True
         except Exception as e:
@@ -83,13 +105,10 @@ class PaymentService:
         Returns:
             Payment method dictionary if found, None otherwise
         """
-        methods = self.get_user_payment_methods(user_id)
-        
-        for method in methods:
-            if method['name'].lower() == method_name.lower().replace('_', ' '):
-                return method
-        
-        return None
+        methods = self._methods_by_name.get(user_id)
+        if not methods:
+            return None
+        return methods.get(method_name.lower().replace('_', ' '))
     
     def confirm_payment_sent(self, transaction_id: str, user_id: int) -> bool:
         """
@@ -3,23 +3,108 @@ User service for the Telegram Escrow Bot.
 Manages user data and provides user-related functionality.
 Uses PostgreSQL database for persistent storage.
 """
+import asyncio
+import functools
 import logging
-import uuid
-from typing import Dict, List, Optional, Any
-from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import Session
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Any
+from sqlalchemy import bindparam, case, func, insert, literal, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DBAPIError, DisconnectionError, SQLAlchemyError
+from sqlalchemy.orm import Session, scoped_session
 
 from models.user import User as UserModel
-from db_models import User as DbUser, Wallet, get_db_session
+from db_models import User as DbUser, Wallet, SessionLocal
+from services.executor import DB_EXECUTOR
+from utils.cache import TTLCache
+from utils.helpers import generate_uuid7
 
 logger = logging.getLogger(__name__)
 
+# Read-through cache of registered users shared by every UserService instance.
+# Only hits are cached; registration populates it and updates invalidate it.
+USER_CACHE_TTL = 60
+_user_cache = TTLCache(maxsize=10_000, ttl=USER_CACHE_TTL)
+
+# Profile statistics are several aggregate queries; a short TTL absorbs bursts
+# of profile views while transaction changes invalidate the affected users.
+USER_STATS_CACHE_TTL = 15
+_stats_cache = TTLCache(maxsize=5000, ttl=USER_STATS_CACHE_TTL)
+
+# User lookups are built once; SQLAlchemy memoizes their cache keys and compiled SQL
+_GET_USER_STMT = select(DbUser).where(DbUser.id == bindparam('user_id'))
+_GET_USERS_STMT = select(DbUser).where(DbUser.id.in_(bindparam('user_ids', expanding=True)))
+
+def _empty_stats() -> Dict[str, Any]:
+    """Statistics of a user without any transactions."""
+    return {
+        'total_transactions': 0,
+        'as_buyer': 0,
+        'as_seller': 0,
+        'completed': 0,
+        'active': 0,
+        'disputed': 0,
+        'escrow_balance': 0.0
+    }
+
+def _user_from_row(db_user: DbUser) -> UserModel:
+    """Convert a database user row to a User model."""
+    # Loaded attributes already have their Python types; only NULLs need defaults
+    return UserModel(
+        id=db_user.id,
+        username=db_user.username,
+        first_name=db_user.first_name,
+        last_name=db_user.last_name or "",
+        created_at=db_user.created_at,
+        is_active=db_user.is_active or False
+    )
+
+def _retry_on_disconnect(func):
+    """
+    Retry a read once when its pooled connection turned out to be dead.
+    
+    The engine does not ping connections on checkout, so a connection dropped
+    by the server is only noticed when a query fails on it.
+    """
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return func(self, *args, **kwargs)
+        except (DisconnectionError, DBAPIError) as e:
+            if isinstance(e, DBAPIError) and not e.connection_invalidated:
+                raise
+            logger.warning(f"Database connection lost in {func.__name__}, retrying: {e}")
+            self.db.rollback()
+            return func(self, *args, **kwargs)
+    return wrapper
+
 class UserService:
     """Service for managing users with database persistence."""
     
+    _instance: Optional["UserService"] = None
+    _instance_lock = threading.Lock()
+    
+    @classmethod
+    def get(cls) -> "UserService":
+        """
+        Get the process-wide shared instance, creating it on first use.
+        
+        Returns:
+            The shared UserService
+        """
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+    
     def __init__(self):
-        """Initialize the user service with database connection."""
-        self.db = get_db_session()
+        """Initialize the user service with a thread-local database session."""
+        # Each thread gets its own session, so handlers can run lookups on a thread pool.
+        # Public methods remove() it when done, so no DB_EXECUTOR thread keeps a
+        # transaction open or serves stale rows from its identity map.
+        self.db = scoped_session(SessionLocal)
     
     def get_user(self, user_id: int) -> Optional[UserModel]:
         """
@@ -31,23 +116,81 @@ class UserService:
         Returns:
             User object if found, None otherwise
         """
+        cached = _user_cache.get(user_id)
+        if cached is not None:
+            return cached
+        
         try:
-            db_user = self.db.query(DbUser).filter(DbUser.id == user_id).first()
-            if not db_user:
-                return None
-            
-            # Convert DB user to model user (using attribute values, not column objects)
-            return UserModel(
-                id=int(db_user.id),
-                username=str(db_user.username),
-                first_name=str(db_user.first_name),
-                last_name=str(db_user.last_name) if db_user.last_name else "",
-                created_at=db_user.created_at.isoformat() if db_user.created_at else None,
-                is_active=bool(db_user.is_active)
-            )
+            user = self._fetch_user(user_id)
+            if user:
+                _user_cache[user_id] = user
+            return user
         except Exception as e:
             logger.error(f"Error getting user {user_id}: {e}")
             return None
+        finally:
+            self.db.remove()
+    
+    async def get_user_async(self, user_id: int) -> Optional[UserModel]:
+        """
+        Get a user without blocking the event loop.
+        
+        Cache hits are answered inline; misses run ``get_user`` on the DB thread pool.
+        
+        Args:
+            user_id: User's Telegram ID
+            
+        Returns:
+            User object if found, None otherwise
+        """
+        cached = _user_cache.get(user_id)
+        if cached is not None:
+            return cached
+        return await asyncio.get_running_loop().run_in_executor(DB_EXECUTOR, self.get_user, user_id)
+    
+    @_retry_on_disconnect
+    def _fetch_user(self, user_id: int) -> Optional[UserModel]:
+        """Load a user from the database, bypassing the cache."""
+        db_user = self.db.execute(_GET_USER_STMT, {'user_id': user_id}).scalar_one_or_none()
+        if not db_user:
+            return None
+        return _user_from_row(db_user)
+    
+    def get_users(self, user_ids: Iterable[int]) -> Dict[int, UserModel]:
+        """
+        Get several users at once, loading all cache misses with one query.
+        
+        Args:
+            user_ids: Telegram IDs of the users
+            
+        Returns:
+            Dictionary mapping the ID of every user found to its User object
+        """
+        users: Dict[int, UserModel] = {}
+        missing: List[int] = []
+        for user_id in set(user_ids):
+            cached = _user_cache.get(user_id)
+            if cached is not None:
+                users[user_id] = cached
+            else:
+                missing.append(user_id)
+        
+        if missing:
+            try:
+                for user in self._fetch_users(missing):
+                    _user_cache[user.id] = user
+                    users[user.id] = user
+            except Exception as e:
+                logger.error(f"Error getting users {missing}: {e}")
+            finally:
+                self.db.remove()
+        return users
+    
+    @_retry_on_disconnect
+    def _fetch_users(self, user_ids: List[int]) -> List[UserModel]:
+        """Load several users from the database in one query, bypassing the cache."""
+        db_users = self.db.execute(_GET_USERS_STMT, {'user_ids': user_ids}).scalars()
+        return [_user_from_row(db_user) for db_user in db_users]
     
     def register_user(self, user: UserModel) -> bool:
         """
@@ -65,66 +208,70 @@ class UserService:
                 logger.warning(f"Cannot register user {user.id} without a username.")
                 return False
 
-            # Create a new session for registration to avoid session conflicts
-            self.db = get_db_session()
-                
-            # Check if user already exists
-            existing_user = self.db.query(DbUser).filter(DbUser.id == user.id).first()
-            if existing_user:
-                logger.warning(f"User {user.id} already exists.")
-                # If the user exists, treat it as a success since they're already registered
-                return True
+            # Ensure numeric user ID
+            user_id = int(user.id)
             
-            # Create new user in database with error handling for each field
-            try:
-                # Ensure numeric user ID
-                user_id = int(user.id)
-                
-                # Validate username is not blank
-                if not user.username or len(user.username.strip()) == 0:
-                    raise ValueError("Username cannot be blank")
-                
-                # Create user record
-                db_user = DbUser(
+            # Validate username is not blank
+            if len(user.username.strip()) == 0:
+                raise ValueError("Username cannot be blank")
+            
+            # Insert the user unless it exists and, only if it was inserted, its wallet;
+            # one atomic statement and one round-trip
+            created_at = datetime.now()
+            new_user = (
+                pg_insert(DbUser)
+                .values(
                     id=user_id,
                     username=user.username,
                     first_name=user.first_name or "User",  # Default if missing
-                    last_name=user.last_name or ""
+                    last_name=user.last_name or "",
+                    created_at=created_at
                 )
-                self.db.add(db_user)
-                
-                # Create wallet for the user
-                wallet = Wallet(
-                    id=str(uuid.uuid4()),
-                    user_id=user_id,
-                    balance=0.0
+                .on_conflict_do_nothing(index_elements=[DbUser.id])
+                .returning(DbUser.id)
+                .cte('new_user')
+            )
+            create_wallet = (
+                insert(Wallet)
+                .from_select(
+                    ['id', 'user_id', 'balance'],
+                    select(literal(generate_uuid7()), new_user.c.id, literal(0.0))
                 )
-                self.db.add(wallet)
-                
-                # Commit changes
-                self.db.commit()
-                
-                logger.info(f"User {user_id} registered successfully.")
+                .returning(Wallet.user_id)
+            )
+            
+            # A short-lived pooled session: commits on success, rolls back on error
+            # and hands its connection back to the pool on exit
+            with SessionLocal() as session, session.begin():
+                created = session.execute(create_wallet).first() is not None
+            
+            if not created:
+                logger.warning(f"User {user_id} already exists.")
+                # If the user exists, treat it as a success since they're already registered
                 return True
-                
-            except ValueError as ve:
-                self.db.rollback()
-                logger.error(f"Value error registering user: {ve}")
-                return False
-                
+            
+            # Warm the caches so the user's next command and profile view skip the database
+            _user_cache[user_id] = UserModel(
+                id=user_id,
+                username=user.username,
+                first_name=user.first_name or "User",
+                last_name=user.last_name or "",
+                created_at=created_at
+            )
+            _stats_cache[user_id] = _empty_stats()
+            
+            logger.info(f"User {user_id} registered successfully.")
+            return True
+            
+        except ValueError as ve:
+            logger.error(f"Value error registering user: {ve}")
+            return False
         except SQLAlchemyError as e:
-            if self.db:
-                self.db.rollback()
             logger.error(f"Database error registering user: {e}")
             return False
         except Exception as e:
-            if self.db:
-                self.db.rollback()
             logger.error(f"Error registering user: {e}")
             return False
-        finally:
-            if self.db:
-                self.db.close()
     
     def update_user(self, user: UserModel) -> bool:
         """
@@ -151,6 +298,7 @@ class UserService:
             
             # Commit changes
             self.db.commit()
+            _user_cache.pop(user.id, None)
             
             logger.info(f"User {user.id} updated successfully.")
             return True
@@ -162,6 +310,8 @@ class UserService:
             self.db.rollback()
             logger.error(f"Error updating user: {e}")
             return False
+        finally:
+            self.db.remove()
     
     def add_transaction_to_user(self, user_id: int, transaction_id: str) -> bool:
         """
@@ -191,52 +341,67 @@ class UserService:
         Returns:
             Dictionary containing user statistics
         """
+        cached = _stats_cache.get(user_id)
+        if cached is not None:
+            return cached
+        
         try:
-            from db_models import Transaction, Wallet
-            
-            stats = {
-                'total_transactions': 0,
-                'as_buyer': 0,
-                'as_seller': 0,
-                'completed': 0,
-                'active': 0,
-                'disputed': 0,
-                'escrow_balance': 0.0
-            }
-            
-            # Check if user exists
-            db_user = self.db.query(DbUser).filter(DbUser.id == user_id).first()
-            if not db_user:
-                return stats
-            
-            # Count transactions
-            seller_txns = self.db.query(Transaction).filter(Transaction.seller_id == user_id).all()
-            buyer_txns = self.db.query(Transaction).filter(Transaction.buyer_id == user_id).all()
-            
-            stats['as_seller'] = len(seller_txns)
-            stats['as_buyer'] = len(buyer_txns)
-            stats['total_transactions'] = stats['as_seller'] + stats['as_buyer']
-            
-            # Count by status
-            all_txns = seller_txns + buyer_txns
-            stats['completed'] = sum(1 for txn in all_txns if txn.status == 'completed')
-            stats['disputed'] = sum(1 for txn in all_txns if txn.status == 'disputed')
-            stats['active'] = sum(1 for txn in all_txns if txn.status in ['created', 'funded', 'confirmed'])
-            
-            # Get wallet balance
-            wallet = self.db.query(Wallet).filter(Wallet.user_id == user_id).first()
-            if wallet:
-                stats['escrow_balance'] = wallet.balance
-            
+            stats = self._fetch_user_stats(user_id)
+            _stats_cache[user_id] = stats
             return stats
         except Exception as e:
             logger.error(f"Error getting user stats: {e}")
-            return {
-                'total_transactions': 0,
-                'as_buyer': 0,
-                'as_seller': 0,
-                'completed': 0,
-                'active': 0,
-                'disputed': 0,
-                'escrow_balance': 0.0
-            }
+            return _empty_stats()
+        finally:
+            self.db.remove()
+    
+    @_retry_on_disconnect
+    def _fetch_user_stats(self, user_id: int) -> Dict[str, Any]:
+        """Compute a user's statistics from the database, bypassing the cache."""
+        from db_models import Transaction, Wallet
+        
+        stats = _empty_stats()
+        
+        # Check that the user exists and read their wallet balance in the same query
+        user_row = (
+            self.db.query(DbUser.id, Wallet.balance)
+            .outerjoin(Wallet, Wallet.user_id == DbUser.id)
+            .filter(DbUser.id == user_id)
+            .first()
+        )
+        if user_row is None:
+            return stats
+        if user_row.balance is not None:
+            stats['escrow_balance'] = user_row.balance
+        
+        # One aggregate query: the database counts transactions per role and status
+        role = case((Transaction.seller_id == user_id, 'seller'), else_='buyer').label('role')
+        rows = (
+            self.db.query(role, Transaction.status, func.count(Transaction.id))
+            .filter(or_(Transaction.seller_id == user_id, Transaction.buyer_id == user_id))
+            .group_by(role, Transaction.status)
+            .all()
+        )
+        
+        for txn_role, status, count in rows:
+            stats['as_' + txn_role] += count
+            if status == 'completed':
+                stats['completed'] += count
+            elif status == 'disputed':
+                stats['disputed'] += count
+            elif status in ('created', 'funded', 'confirmed'):
+                stats['active'] += count
+        stats['total_transactions'] = stats['as_seller'] + stats['as_buyer']
+        
+        return stats
+    
+    def invalidate_user_stats(self, *user_ids: Optional[int]) -> None:
+        """
+        Drop cached statistics after a user's transactions changed.
+        
+        Args:
+            *user_ids: Telegram IDs of the affected users; None entries are ignored
+        """
+        for user_id in user_ids:
+            if user_id is not None:
+                _stats_cache.pop(user_id, None)
@@ -5,7 +5,8 @@ Professional P2P trading platform like Binance P2P, Paxful, and AirTM
 """
 import os
 import logging
-import uuid
+import re
+import secrets
 from datetime import datetime
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters, ContextTypes
@@ -17,6 +18,61 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Messages mentioning a supported coin are treated as trade offers
+_CRYPTO_RE = re.compile(r"BTC|ETH|USDT", re.IGNORECASE)
+
+# Static keyboards shared by every request
+_START_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("🛒 Buy Crypto", callback_data="buy_crypto"),
+        InlineKeyboardButton("💰 Sell Crypto", callback_data="sell_crypto")
+    ],
+    [
+        InlineKeyboardButton("📊 View Marketplace", callback_data="marketplace"),
+        InlineKeyboardButton("💼 My Trades", callback_data="my_trades")
+    ],
+    [
+        InlineKeyboardButton("💳 My Wallet", callback_data="wallet"),
+        InlineKeyboardButton("👤 Register", callback_data="register")
+    ],
+    [
+        InlineKeyboardButton("❓ Help", callback_data="help"),
+        InlineKeyboardButton("⚙️ Settings", callback_data="settings")
+    ]
+])
+_BUY_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("₿ Bitcoin (BTC)", callback_data="buy_BTC"),
+        InlineKeyboardButton("Ξ Ethereum (ETH)", callback_data="buy_ETH")
+    ],
+    [
+        InlineKeyboardButton("💵 USDT", callback_data="buy_USDT"),
+        InlineKeyboardButton("🔙 Back", callback_data="back_main")
+    ]
+])
+_SELL_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("₿ Bitcoin (BTC)", callback_data="sell_BTC"),
+        InlineKeyboardButton("Ξ Ethereum (ETH)", callback_data="sell_ETH")
+    ],
+    [
+        InlineKeyboardButton("💵 USDT", callback_data="sell_USDT"),
+        InlineKeyboardButton("🔙 Back", callback_data="back_main")
+    ]
+])
+_WALLET_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("📥 Deposit", callback_data="deposit"),
+        InlineKeyboardButton("📤 Withdraw", callback_data="withdraw")
+    ]
+])
+_OFFERS_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("🔄 Refresh", callback_data="refresh_offers"),
+        InlineKeyboardButton("➕ Create Offer", callback_data="create_offer")
+    ]
+])
+
 # Bot commands
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Start command with professional P2P interface"""
@@ -37,27 +93,7 @@ Hi {user.first_name}! Your professional escrow assistant for secure crypto tradi
 *📈 Ready to Trade?*
 """
     
-    keyboard = [
-        [
-            InlineKeyboardButton("🛒 Buy Crypto", callback_data="buy_crypto"),
-            InlineKeyboardButton("💰 Sell Crypto", callback_data="sell_crypto")
-        ],
-        [
-            InlineKeyboardButton("📊 View Marketplace", callback_data="marketplace"),
-            InlineKeyboardButton("💼 My Trades", callback_data="my_trades")
-        ],
-        [
-            InlineKeyboardButton("💳 My Wallet", callback_data="wallet"),
-            InlineKeyboardButton("👤 Register", callback_data="register")
-        ],
-        [
-            InlineKeyboardButton("❓ Help", callback_data="help"),
-            InlineKeyboardButton("⚙️ Settings", callback_data="settings")
-        ]
-    ]
-    
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    await update.message.reply_text(welcome_text, reply_markup=reply_markup, parse_mode='Markdown')
+    await update.message.reply_text(welcome_text, reply_markup=_START_MARKUP, parse_mode='Markdown')
 
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Help command"""
@@ -92,41 +128,17 @@ Need support? Contact @admin
 
 async def buy_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Buy crypto command"""
-    keyboard = [
-        [
-            InlineKeyboardButton("₿ Bitcoin (BTC)", callback_data="buy_BTC"),
-            InlineKeyboardButton("Ξ Ethereum (ETH)", callback_data="buy_ETH")
-        ],
-        [
-            InlineKeyboardButton("💵 USDT", callback_data="buy_USDT"),
-            InlineKeyboardButton("🔙 Back", callback_data="back_main")
-        ]
-    ]
-    
-    reply_markup = InlineKeyboardMarkup(keyboard)
     await update.message.reply_text(
         "🛒 *Create Buy Offer*\n\nChoose cryptocurrency to buy:",
-        reply_markup=reply_markup,
+        reply_markup=_BUY_MARKUP,
         parse_mode='Markdown'
     )
 
 async def sell_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Sell crypto command"""
-    keyboard = [
-        [
-            InlineKeyboardButton("₿ Bitcoin (BTC)", callback_data="sell_BTC"),
-            InlineKeyboardButton("Ξ Ethereum (ETH)", callback_data="sell_ETH")
-        ],
-        [
-            InlineKeyboardButton("💵 USDT", callback_data="sell_USDT"),
-            InlineKeyboardButton("🔙 Back", callback_data="back_main")
-        ]
-    ]
-    
-    reply_markup = InlineKeyboardMarkup(keyboard)
     await update.message.reply_text(
         "💰 *Create Sell Offer*\n\nChoose cryptocurrency to sell:",
-        reply_markup=reply_markup,
+        reply_markup=_SELL_MARKUP,
         parse_mode='Markdown'
     )
 
@@ -150,15 +162,7 @@ async def balance_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 • 50 USDT (Trade #DEF456)
 """
     
-    keyboard = [
-        [
-            InlineKeyboardButton("📥 Deposit", callback_data="deposit"),
-            InlineKeyboardButton("📤 Withdraw", callback_data="withdraw")
-        ]
-    ]
-    
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    await update.message.reply_text(balance_text, reply_markup=reply_markup, parse_mode='Markdown')
+    await update.message.reply_text(balance_text, reply_markup=_WALLET_MARKUP, parse_mode='Markdown')
 
 async def offers_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """View marketplace offers"""
@@ -178,15 +182,7 @@ async def offers_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 _Click any offer to start secure trading_
 """
     
-    keyboard = [
-        [
-            InlineKeyboardButton("🔄 Refresh", callback_data="refresh_offers"),
-            InlineKeyboardButton("➕ Create Offer", callback_data="create_offer")
-        ]
-    ]
-    
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    await update.message.reply_text(offers_text, reply_markup=reply_markup, parse_mode='Markdown')
+    await update.message.reply_text(offers_text, reply_markup=_OFFERS_MARKUP, parse_mode='Markdown')
 
 async def trades_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """View user trades"""
@@ -208,26 +204,10 @@ async def trades_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 """
     await update.message.reply_text(trades_text, parse_mode='Markdown')
 
-async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handle button clicks"""
-    query = update.callback_query
-    await query.answer()
-    
-    data = query.data
-    
-    if data == "buy_crypto":
-        await buy_command(query, context)
-    elif data == "sell_crypto":
-        await sell_command(query, context)
-    elif data == "marketplace":
-        await offers_command(query, context)
-    elif data == "my_trades":
-        await trades_command(query, context)
-    elif data == "wallet":
-        await balance_command(query, context)
-    elif data == "register":
-        user = query.from_user
-        reg_text = f"""
+async def _show_registration(query, context: ContextTypes.DEFAULT_TYPE):
+    """Confirm registration from the main menu"""
+    user = query.from_user
+    reg_text = f"""
 ✅ *Registration Successful!*
 
 Welcome {user.first_name}!
@@ -245,13 +225,33 @@ Welcome {user.first_name}!
 
 Use /help for commands
 """
-        await query.edit_message_text(reg_text, parse_mode='Markdown')
-    elif data == "help":
-        await help_command(query, context)
-    elif data.startswith("buy_"):
-        crypto = data.split("_")[1]
-        trade_id = uuid.uuid4().hex[:8].upper()
-        text = f"""
+    await query.edit_message_text(reg_text, parse_mode='Markdown')
+
+async def _show_deposit(query, context: ContextTypes.DEFAULT_TYPE):
+    """Show deposit addresses"""
+    deposit_text = """
+📥 *Deposit Cryptocurrency*
+
+*Bitcoin (BTC):*
+`bc1qxy2kgdygjrsqtzq2n0yrf2493p83kkfjhx0wlh`
+
+*Ethereum (ETH):*
+`0x742d35Cc0Df7F5C3Ee2B3E3F88B4523F3C51234`
+
+*USDT (TRC20):*
+`TYASr3nPAaDfkjhXmGF7Qj8ZbBc3K1a7s9`
+
+⚠️ *Important:*
+• Only send correct cryptocurrency
+• Wait for confirmations
+• Minimum: 0.001 BTC, 0.01 ETH, 10 USDT
+"""
+    await query.edit_message_text(deposit_text, parse_mode='Markdown')
+
+async def _create_buy_offer(query, crypto: str):
+    """Open a buy offer for the chosen cryptocurrency"""
+    trade_id = secrets.token_hex(4).upper()
+    text = f"""
 🛒 *Buy {crypto} Offer Created*
 
 *Trade ID:* {trade_id}
@@ -265,11 +265,12 @@ Please specify:
 
 Example: "0.01 {crypto} at $45,000 via PayPal"
 """
-        await query.edit_message_text(text, parse_mode='Markdown')
-    elif data.startswith("sell_"):
-        crypto = data.split("_")[1]
-        trade_id = uuid.uuid4().hex[:8].upper()
-        text = f"""
+    await query.edit_message_text(text, parse_mode='Markdown')
+
+async def _create_sell_offer(query, crypto: str):
+    """Open a sell offer for the chosen cryptocurrency"""
+    trade_id = secrets.token_hex(4).upper()
+    text = f"""
 💰 *Sell {crypto} Offer Created*
 
 *Trade ID:* {trade_id}
@@ -283,34 +284,50 @@ Please specify:
 
 Example: "0.01 {crypto} at $45,000 via PayPal"
 """
-        await query.edit_message_text(text, parse_mode='Markdown')
-    elif data == "deposit":
-        deposit_text = """
-📥 *Deposit Cryptocurrency*
-
-*Bitcoin (BTC):*
-`bc1qxy2kgdygjrsqtzq2n0yrf2493p83kkfjhx0wlh`
-
-*Ethereum (ETH):*
-`0x742d35Cc0Df7F5C3Ee2B3E3F88B4523F3C51234`
+    await query.edit_message_text(text, parse_mode='Markdown')
+
+# Menu buttons, keyed by their exact callback_data
+_BUTTON_ACTIONS = {
+    "buy_crypto": buy_command,
+    "sell_crypto": sell_command,
+    "marketplace": offers_command,
+    "my_trades": trades_command,
+    "wallet": balance_command,
+    "register": _show_registration,
+    "help": help_command,
+    "deposit": _show_deposit,
+}
+
+# Coin buttons, keyed by the side prefix of "<side>_<coin>" callback_data
+_OFFER_ACTIONS = {
+    "buy": _create_buy_offer,
+    "sell": _create_sell_offer,
+}
 
-*USDT (TRC20):*
-`TYASr3nPAaDfkjhXmGF7Qj8ZbBc3K1a7s9`
-
-⚠️ *Important:*
-• Only send correct cryptocurrency
-• Wait for confirmations
-• Minimum: 0.001 BTC, 0.01 ETH, 10 USDT
-"""
-        await query.edit_message_text(deposit_text, parse_mode='Markdown')
+async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle button clicks"""
+    query = update.callback_query
+    await query.answer()
+    
+    data = query.data
+    
+    action = _BUTTON_ACTIONS.get(data)
+    if action is not None:
+        await action(query, context)
+        return
+    
+    side, _, crypto = data.partition("_")
+    create_offer = _OFFER_ACTIONS.get(side)
+    if create_offer is not None and crypto:
+        await create_offer(query, crypto)
     else:
         await query.edit_message_text("Feature coming soon! 🚀")
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle text messages"""
     text = update.message.text
-    if "BTC" in text.upper() or "ETH" in text.upper() or "USDT" in text.upper():
-        trade_id = uuid.uuid4().hex[:8].upper()
+    if _CRYPTO_RE.search(text):
+        trade_id = secrets.token_hex(4).upper()
         response = f"""
 ✅ *Trade Offer Created Successfully!*
 
@@ -3,16 +3,21 @@ Social Proof and Trust Rating System for Escrow Bot
 Implements user reputation, feedback, and trust scoring mechanisms
 """
 
-import os
+import asyncio
+import functools
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from enum import Enum
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Float, Text, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, Boolean, ForeignKey, Index, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import sessionmaker, relationship, raiseload, selectinload
 from sqlalchemy.sql import func
 
+from services.executor import DB_EXECUTOR
+
 logger = logging.getLogger(__name__)
 
 Base = declarative_base()
@@ -89,6 +94,12 @@ class UserFeedback(Base):
     # Relationships
     giver = relationship("UserProfile", foreign_keys=[giver_id], back_populates="feedbacks_given")
     receiver = relationship("UserProfile", foreign_keys=[receiver_id], back_populates="feedbacks_received")
+    
+    # Duplicate-feedback check and recent-feedback listing
+    __table_args__ = (
+        Index("ix_feedback_trade_giver_receiver", "trade_id", "giver_id", "receiver_id", unique=True),
+        Index("ix_feedback_receiver_created", "receiver_id", "created_at"),
+    )
 
 class BadgeType(Base):
     """Available badge types"""
@@ -112,6 +123,11 @@ class UserBadge(Base):
     # Relationships
     user = relationship("UserProfile", back_populates="badges")
     badge_type = relationship("BadgeType")
+    
+    # Held-badge check and per-user badge listing
+    __table_args__ = (
+        Index("ix_user_badge", "user_id", "badge_type_id", unique=True),
+    )
 
 class TrustMetrics(Base):
     """Daily trust metrics tracking"""
@@ -125,19 +141,54 @@ class TrustMetrics(Base):
     disputes_resolved = Column(Integer, default=0)
     response_time = Column(Float, default=0.0)
     trust_score_change = Column(Float, default=0.0)
+    
+    __table_args__ = (
+        Index("ix_trust_metrics_user_date", "user_id", "date"),
+    )
+
+# Profile counter incremented by each type of feedback
+_FEEDBACK_COUNTERS = {
+    FeedbackType.POSITIVE: UserProfile.positive_feedback,
+    FeedbackType.NEUTRAL: UserProfile.neutral_feedback,
+    FeedbackType.NEGATIVE: UserProfile.negative_feedback
+}
+
+# Profile columns read by TrustSystem._compute_trust_score
+_SCORING_COLUMNS = (
+    UserProfile.total_trades,
+    UserProfile.successful_trades,
+    UserProfile.positive_feedback,
+    UserProfile.neutral_feedback,
+    UserProfile.negative_feedback,
+    UserProfile.phone_verified,
+    UserProfile.email_verified,
+    UserProfile.id_verified,
+    UserProfile.join_date,
+    UserProfile.response_time_avg
+)
 
 class TrustSystem:
     """Main trust system manager"""
     
     def __init__(self):
-        self.engine = create_engine(os.environ.get("DATABASE_URL"))
+        from db_models import get_engine
+        self.engine = get_engine()
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self._badge_name_to_id: Dict[str, int] = {}
         self.create_tables()
         self._initialize_badges()
     
     def create_tables(self):
         """Create trust system tables"""
         Base.metadata.create_all(bind=self.engine)
+        # create_all skips the indexes of tables that already exist
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                try:
+                    index.create(bind=self.engine, checkfirst=True)
+                except SQLAlchemyError as e:
+                    # e.g. a unique index over rows that already contain duplicates
+                    logger.warning(f"Could not create index {index.name}: {e}")
         logger.info("Trust system tables created successfully")
     
     def get_session(self):
@@ -199,41 +250,79 @@ class TrustSystem:
             }
         ]
         
-        for badge_data in default_badges:
-            existing = session.query(BadgeType).filter_by(name=badge_data["name"]).first()
-            if not existing:
-                badge = BadgeType(**badge_data)
-                session.add(badge)
+        # One query for the default badges already present and one batched insert for the rest
+        default_names = [badge_data["name"] for badge_data in default_badges]
+        existing_names = {
+            name for (name,) in session.query(BadgeType.name).filter(BadgeType.name.in_(default_names))
+        }
+        session.add_all([
+            BadgeType(**badge_data) for badge_data in default_badges
+            if badge_data["name"] not in existing_names
+        ])
         
         session.commit()
+        
+        # Badge types are static after seeding, so their IDs are resolved once
+        self._badge_name_to_id = dict(session.query(BadgeType.name, BadgeType.id))
         session.close()
     
     def get_or_create_user(self, telegram_id: str, username: str = None, first_name: str = "User") -> UserProfile:
         """Get or create user profile"""
         session = self.get_session()
         
-        user = session.query(UserProfile).filter_by(telegram_id=str(telegram_id)).first()
-        if not user:
-            user = UserProfile(
-                telegram_id=str(telegram_id),
-                username=username,
-                first_name=first_name
-            )
-            session.add(user)
-            session.commit()
-        
+        # One upsert instead of SELECT-then-INSERT; DO UPDATE (not DO NOTHING) so the
+        # existing row is returned too, and concurrent first contacts cannot collide
+        stmt = pg_insert(UserProfile).values(
+            telegram_id=str(telegram_id),
+            username=username,
+            first_name=first_name
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserProfile.telegram_id],
+            set_={"username": stmt.excluded.username}
+        ).returning(UserProfile)
+        
+        user = session.scalars(stmt).one()
+        # Detach before committing so the returned profile keeps its loaded values
+        session.expunge(user)
+        session.commit()
         session.close()
         return user
     
     def calculate_trust_score(self, user_id: str) -> float:
         """Calculate comprehensive trust score"""
         session = self.get_session()
-        user = session.query(UserProfile).filter_by(telegram_id=str(user_id)).first()
         
-        if not user:
+        # Score from a plain column row and write back only the two results,
+        # skipping ORM identity and change tracking for the whole profile
+        row = session.query(*_SCORING_COLUMNS).filter_by(telegram_id=str(user_id)).first()
+        if not row:
             session.close()
             return 0.0
         
+        score = self._compute_trust_score(row, datetime.now())
+        session.execute(
+            update(UserProfile)
+            .where(UserProfile.telegram_id == str(user_id))
+            .values(trust_score=score, trust_level=self._get_trust_level(score).value)
+        )
+        session.commit()
+        session.close()
+        
+        return score
+    
+    def _apply_trust_score(self, user: UserProfile) -> float:
+        """Score a loaded profile and store the result on it; the caller commits"""
+        score = self._compute_trust_score(user, datetime.now())
+        
+        # Update user's trust score
+        user.trust_score = score
+        user.trust_level = self._get_trust_level(score).value
+        
+        return score
+    
+    def _compute_trust_score(self, user, now: datetime) -> float:
+        """Score a profile or a row carrying the same metric columns"""
         score = 50.0  # Base score
         
         # Trading history (30% weight)
@@ -258,7 +347,7 @@ class TrustSystem:
         score += verification_score
         
         # Activity and longevity (15% weight)
-        days_active = (datetime.now() - user.join_date).days
+        days_active = (now - user.join_date).days
         if days_active > 0:
             activity_score = min(days_active / 30, 1) * 15  # Max 15 points for 30+ days
             score += activity_score
@@ -270,15 +359,38 @@ class TrustSystem:
             score += response_score
         
         # Cap at 100
-        score = min(score, 100.0)
+        return min(score, 100.0)
+    
+    def recalculate_all_trust_scores(self) -> int:
+        """
+        Recalculate every user's trust score in one pass.
         
-        # Update user's trust score
-        user.trust_score = score
-        user.trust_level = self._get_trust_level(score).value
-        session.commit()
-        session.close()
+        Reads only the scoring columns of all profiles with one query and writes
+        the results back with one batched UPDATE and a single commit.
         
-        return score
+        Returns:
+            Number of profiles updated
+        """
+        session = self.get_session()
+        try:
+            rows = session.query(UserProfile.id, *_SCORING_COLUMNS).all()
+            
+            now = datetime.now()
+            updates = []
+            for row in rows:
+                score = self._compute_trust_score(row, now)
+                updates.append({
+                    "id": row.id,
+                    "trust_score": score,
+                    "trust_level": self._get_trust_level(score).value
+                })
+            
+            if updates:
+                session.execute(update(UserProfile), updates)
+            session.commit()
+            return len(updates)
+        finally:
+            session.close()
     
     def _get_trust_level(self, score: float) -> TrustLevel:
         """Determine trust level based on score"""
@@ -299,17 +411,6 @@ class TrustSystem:
                     rating: int, comment: str = None, 
                     communication: int = None, delivery: int = None, quality: int = None) -> bool:
         """Add user feedback"""
-        session = self.get_session()
-        
-        # Check if feedback already exists for this trade
-        existing = session.query(UserFeedback).filter_by(
-            trade_id=trade_id, giver_id=str(giver_id), receiver_id=str(receiver_id)
-        ).first()
-        
-        if existing:
-            session.close()
-            return False
-        
         # Determine feedback type
         if rating >= 4:
             feedback_type = FeedbackType.POSITIVE
@@ -318,39 +419,46 @@ class TrustSystem:
         else:
             feedback_type = FeedbackType.NEGATIVE
         
-        # Create feedback
-        feedback = UserFeedback(
-            trade_id=trade_id,
-            giver_id=str(giver_id),
-            receiver_id=str(receiver_id),
-            rating=rating,
-            feedback_type=feedback_type.value,
-            comment=comment,
-            communication_rating=communication,
-            delivery_rating=delivery,
-            quality_rating=quality
-        )
-        
-        session.add(feedback)
-        
-        # Update receiver's feedback counts
-        receiver = session.query(UserProfile).filter_by(telegram_id=str(receiver_id)).first()
-        if receiver:
-            if feedback_type == FeedbackType.POSITIVE:
-                receiver.positive_feedback += 1
-            elif feedback_type == FeedbackType.NEUTRAL:
-                receiver.neutral_feedback += 1
-            else:
-                receiver.negative_feedback += 1
-        
-        session.commit()
-        session.close()
-        
-        # Recalculate trust score
-        self.calculate_trust_score(receiver_id)
-        self._check_badges(receiver_id)
-        
-        return True
+        session = self.get_session()
+        try:
+            # Create feedback unless this trade was already rated; the unique index makes the
+            # duplicate check and the insert one atomic statement, safe under concurrent calls
+            result = session.execute(
+                pg_insert(UserFeedback)
+                .values(
+                    trade_id=trade_id,
+                    giver_id=str(giver_id),
+                    receiver_id=str(receiver_id),
+                    rating=rating,
+                    feedback_type=feedback_type.value,
+                    comment=comment,
+                    communication_rating=communication,
+                    delivery_rating=delivery,
+                    quality_rating=quality
+                )
+                .on_conflict_do_nothing(index_elements=["trade_id", "giver_id", "receiver_id"])
+            )
+            if result.rowcount == 0:
+                session.rollback()
+                return False
+            
+            # Update receiver's feedback count atomically in the database and load the updated profile
+            counter = _FEEDBACK_COUNTERS[feedback_type]
+            receiver = session.execute(
+                update(UserProfile)
+                .where(UserProfile.telegram_id == str(receiver_id))
+                .values({counter: counter + 1})
+                .returning(UserProfile)
+            ).scalar_one_or_none()
+            if receiver:
+                # Recalculate trust score and badges in the same transaction
+                self._apply_trust_score(receiver)
+                self._award_badges(session, receiver)
+            
+            session.commit()
+            return True
+        finally:
+            session.close()
     
     def get_user_stats(self, user_id: str) -> Dict:
         """Get comprehensive user statistics"""
@@ -362,12 +470,14 @@ class TrustSystem:
             return {}
         
         # Get recent feedback
-        recent_feedback = session.query(UserFeedback).filter_by(
+        recent_feedback = session.query(UserFeedback).options(raiseload('*')).filter_by(
             receiver_id=str(user_id)
         ).order_by(UserFeedback.created_at.desc()).limit(5).all()
         
-        # Get badges
-        user_badges = session.query(UserBadge).filter_by(user_id=str(user_id)).all()
+        # Get badges, loading all their badge types in one extra query
+        user_badges = session.query(UserBadge).options(
+            selectinload(UserBadge.badge_type)
+        ).filter_by(user_id=str(user_id)).all()
         
         total_feedback = user.positive_feedback + user.neutral_feedback + user.negative_feedback
         
@@ -414,15 +524,8 @@ class TrustSystem:
         session.close()
         return stats
     
-    def _check_badges(self, user_id: str):
-        """Check and award badges based on user activity"""
-        session = self.get_session()
-        user = session.query(UserProfile).filter_by(telegram_id=str(user_id)).first()
-        
-        if not user:
-            session.close()
-            return
-        
+    def _award_badges(self, session, user: UserProfile):
+        """Check and award badges based on user activity; the caller commits"""
         # Check for badges to award
         badge_checks = {
             "First Timer": user.total_trades >= 1,
@@ -433,42 +536,72 @@ class TrustSystem:
             "Customer Champion": (user.positive_feedback / max(user.positive_feedback + user.neutral_feedback + user.negative_feedback, 1)) >= 0.95
         }
         
-        for badge_name, earned in badge_checks.items():
-            if earned:
-                badge_type = session.query(BadgeType).filter_by(name=badge_name).first()
-                if badge_type:
-                    existing_badge = session.query(UserBadge).filter_by(
-                        user_id=str(user_id), badge_type_id=badge_type.id
-                    ).first()
-                    
-                    if not existing_badge:
-                        new_badge = UserBadge(
-                            user_id=str(user_id),
-                            badge_type_id=badge_type.id
-                        )
-                        session.add(new_badge)
+        earned_ids = [
+            self._badge_name_to_id[badge_name] for badge_name, earned in badge_checks.items()
+            if earned and badge_name in self._badge_name_to_id
+        ]
+        if not earned_ids:
+            return
         
-        session.commit()
-        session.close()
+        # One statement; badges the user already holds (or that a concurrent call just
+        # awarded) are skipped by the unique index instead of a separate lookup
+        session.execute(
+            pg_insert(UserBadge)
+            .values([{"user_id": user.telegram_id, "badge_type_id": badge_type_id} for badge_type_id in earned_ids])
+            .on_conflict_do_nothing(index_elements=["user_id", "badge_type_id"])
+        )
     
     def update_trade_completion(self, user_id: str, successful: bool = True):
         """Update user trade statistics"""
         session = self.get_session()
-        user = session.query(UserProfile).filter_by(telegram_id=str(user_id)).first()
-        
-        if user:
-            user.total_trades += 1
-            if successful:
-                user.successful_trades += 1
-            user.last_active = datetime.now()
+        try:
+            user = session.query(UserProfile).filter_by(telegram_id=str(user_id)).first()
             
-            session.commit()
-        
-        session.close()
-        
-        # Recalculate trust score and check badges
-        self.calculate_trust_score(user_id)
-        self._check_badges(user_id)
+            if user:
+                user.total_trades += 1
+                if successful:
+                    user.successful_trades += 1
+                user.last_active = datetime.now()
+                
+                # Recalculate trust score and check badges in the same transaction
+                self._apply_trust_score(user)
+                self._award_badges(session, user)
+                session.commit()
+        finally:
+            session.close()
+    
+    # Async wrappers: run the blocking calls above on the shared DB thread pool so
+    # handlers awaiting them do not stall the event loop
+    
+    async def _run_blocking(self, func, *args, **kwargs):
+        """Run a blocking TrustSystem call on DB_EXECUTOR"""
+        return await asyncio.get_running_loop().run_in_executor(
+            DB_EXECUTOR, functools.partial(func, *args, **kwargs)
+        )
+    
+    async def get_or_create_user_async(self, telegram_id: str, username: str = None,
+                                       first_name: str = "User") -> UserProfile:
+        """Get or create user profile without blocking the event loop"""
+        return await self._run_blocking(self.get_or_create_user, telegram_id, username, first_name)
+    
+    async def calculate_trust_score_async(self, user_id: str) -> float:
+        """Calculate trust score without blocking the event loop"""
+        return await self._run_blocking(self.calculate_trust_score, user_id)
+    
+    async def add_feedback_async(self, trade_id: str, giver_id: str, receiver_id: str,
+                                 rating: int, comment: str = None,
+                                 communication: int = None, delivery: int = None, quality: int = None) -> bool:
+        """Add user feedback without blocking the event loop"""
+        return await self._run_blocking(self.add_feedback, trade_id, giver_id, receiver_id,
+                                        rating, comment, communication, delivery, quality)
+    
+    async def get_user_stats_async(self, user_id: str) -> Dict:
+        """Get user statistics without blocking the event loop"""
+        return await self._run_blocking(self.get_user_stats, user_id)
+    
+    async def update_trade_completion_async(self, user_id: str, successful: bool = True):
+        """Update user trade statistics without blocking the event loop"""
+        return await self._run_blocking(self.update_trade_completion, user_id, successful)
 
 # Global trust system instance
 trust_system = TrustSystem()
\ No newline at end of file
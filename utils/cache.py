@@ -0,0 +1,85 @@
+"""
+In-memory caching utilities for the Telegram Escrow Bot.
+Provides bounded, time-limited containers for per-user state.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Iterator, MutableMapping
+
+
+class TTLCache(MutableMapping):
+    """
+    Dict-compatible mapping with a maximum size and a sliding time-to-live.
+
+    Entries expire ``ttl`` seconds after they were last written or read.
+    When the cache is full, the least recently used entry is evicted.
+    Safe to share between threads.
+
+    Attributes:
+        maxsize: Maximum number of entries kept
+        ttl: Lifetime of an entry in seconds
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key: Hashable) -> Any:
+        with self._lock:
+            value, expires_at = self._data[key]
+            now = time.monotonic()
+            if expires_at <= now:
+                del self._data[key]
+                raise KeyError(key)
+            self._data[key] = (value, now + self.ttl)
+            self._data.move_to_end(key)
+            return value
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __delitem__(self, key: Hashable) -> None:
+        with self._lock:
+            del self._data[key]
+
+    def pop(self, key: Hashable, *default: Any) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+        if entry is None or entry[1] <= time.monotonic():
+            if default:
+                return default[0]
+            raise KeyError(key)
+        return entry[0]
+
+    def __contains__(self, key: object) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry[1] > time.monotonic()
+
+    def __iter__(self) -> Iterator[Hashable]:
+        now = time.monotonic()
+        with self._lock:
+            return iter([key for key, (_, expires_at) in self._data.items() if expires_at > now])
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def expire(self) -> int:
+        """
+        Drop every expired entry.
+
+        Returns:
+            Number of entries removed
+        """
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (_, expires_at) in self._data.items() if expires_at <= now]
+            for key in expired:
+                del self._data[key]
+        return len(expired)
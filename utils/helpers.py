@@ -2,15 +2,27 @@
 Helper utilities for the Telegram Escrow Bot.
 Provides common helper functions used across the application.
 """
+import asyncio
+import atexit
+import html
 import logging
-from typing import Dict, Any
-import json
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Any, List, Optional
 import os
+import re
+import secrets
 import time
-from datetime import datetime, timedelta
+from datetime import datetime
+
+import msgspec
 
 logger = logging.getLogger(__name__)
 
+# Shared JSON codec for on-disk state; enc_hook=str mirrors json.dump(default=str)
+_json_encoder = msgspec.json.Encoder(enc_hook=str)
+_json_decoder = msgspec.json.Decoder()
+
 def format_currency(amount: float) -> str:
     """
     Format a currency amount with appropriate precision.
@@ -23,6 +35,23 @@ def format_currency(amount: float) -> str:
     """
     return f"${amount:.2f}"
 
+_MD_CODE_RE = re.compile(r"`([^`\n]+)`")
+_MD_BOLD_RE = re.compile(r"\*([^*\n]+)\*")
+
+def markdown_to_html(text: str) -> str:
+    """
+    Convert the bot's legacy Markdown (*bold* and `code`) to Telegram HTML.
+    
+    Args:
+        text: Markdown text
+        
+    Returns:
+        Equivalent text for parse_mode="HTML"
+    """
+    text = html.escape(text, quote=False)
+    text = _MD_CODE_RE.sub(r"<code>\1</code>", text)
+    return _MD_BOLD_RE.sub(r"<b>\1</b>", text)
+
 def calculate_fee(amount: float, percentage: float) -> float:
     """
     Calculate fee based on amount and percentage.
@@ -43,8 +72,24 @@ def generate_short_id() -> str:
     Returns:
         Short unique ID string
     """
-    import uuid
-    return str(uuid.uuid4())[:8]
+    return secrets.token_hex(4)
+
+def generate_uuid7() -> str:
+    """
+    Generate a time-ordered UUID (version 7).
+    
+    The leading 48 bits are the Unix time in milliseconds, so IDs created later
+    sort later and new rows land on the right-most page of a B-tree index.
+    
+    Returns:
+        Canonical 36-character UUID string
+    """
+    value = (time.time_ns() // 1_000_000) << 80 | secrets.randbits(80)
+    # Set the version (0b0111) and RFC 4122 variant (0b10) bits
+    value = (value & ~(0xF << 76)) | (0x7 << 76)
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)
+    h = f"{value:032x}"
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
 
 def is_expired(timestamp: datetime, days: int) -> bool:
     """
@@ -57,8 +102,7 @@ def is_expired(timestamp: datetime, days: int) -> bool:
     Returns:
         True if expired, False otherwise
     """
-    expiration = timestamp + timedelta(days=days)
-    return datetime.now() > expiration
+    return (datetime.now() - timestamp).total_seconds() > days * 86400
 
 def safe_json_dump(data: Dict[str, Any], filepath: str) -> bool:
     """
@@ -72,8 +116,8 @@ def safe_json_dump(data: Dict[str, Any], filepath: str) -> bool:
         True if successful, False otherwise
     """
     try:
-        with open(filepath, 'w') as file:
-            json.dump(data, file, default=str)
+        with open(filepath, 'wb') as file:
+            file.write(_json_encoder.encode(data))
         return True
     except Exception as e:
         logger.error(f"Error saving data to {filepath}: {e}")
@@ -91,8 +135,8 @@ def safe_json_load(filepath: str) -> Dict[str, Any]:
     """
     try:
         if os.path.exists(filepath):
-            with open(filepath, 'r') as file:
-                return json.load(file)
+            with open(filepath, 'rb') as file:
+                return _json_decoder.decode(file.read())
         return {}
     except Exception as e:
         logger.error(f"Error loading data from {filepath}: {e}")
@@ -122,3 +166,101 @@ def retry_operation(func, max_retries=3, delay=1):
             wait_time = delay * (2 ** (retries - 1))
             logger.warning(f"Retry {retries}/{max_retries} after {wait_time}s: {e}")
             time.sleep(wait_time)
+
+async def retry_operation_async(coro_factory, max_retries=3, delay=1):
+    """
+    Retry a coroutine multiple times with exponential backoff.
+    
+    Unlike retry_operation, the backoff awaits asyncio.sleep so other
+    handlers keep running while this one waits.
+    
+    Args:
+        coro_factory: Zero-argument callable returning a fresh awaitable per attempt
+        max_retries: Maximum number of retries
+        delay: Initial delay in seconds
+        
+    Returns:
+        Result of the coroutine or None if all retries failed
+    """
+    retries = 0
+    while retries < max_retries:
+        try:
+            return await coro_factory()
+        except Exception as e:
+            retries += 1
+            if retries == max_retries:
+                logger.error(f"Operation failed after {max_retries} retries: {e}")
+                return None
+            wait_time = delay * (2 ** (retries - 1))
+            logger.warning(f"Retry {retries}/{max_retries} after {wait_time}s: {e}")
+            await asyncio.sleep(wait_time)
+
+def enable_queue_logging() -> Optional[QueueListener]:
+    """
+    Move the root logger's handlers onto a background thread.
+    
+    Log calls only push records onto an in-memory queue, so slow file or
+    network handlers never block the event loop.
+    
+    Returns:
+        The started QueueListener, or None if the root logger has no handlers
+    """
+    root = logging.getLogger()
+    handlers = [handler for handler in root.handlers if not isinstance(handler, QueueHandler)]
+    if not handlers:
+        return None
+    
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+    
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+def install_uvloop() -> bool:
+    """
+    Use uvloop for the asyncio event loop when it is installed.
+    
+    Returns:
+        True if uvloop was installed, False if the default loop is kept
+    """
+    try:
+        import uvloop
+    except ImportError:
+        logger.info("uvloop not available, using the default asyncio event loop.")
+        return False
+    
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+def run_application(application: Any, allowed_updates: Optional[List[str]] = None) -> None:
+    """
+    Run a telegram Application, via webhook when WEBHOOK_URL is set and polling otherwise.
+    
+    Webhook settings are read from the environment: WEBHOOK_URL (public base URL),
+    WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_LISTEN and PORT.
+    
+    Args:
+        application: Configured telegram.ext.Application
+        allowed_updates: Update types to receive from Telegram
+    """
+    install_uvloop()
+    
+    webhook_url = os.environ.get("WEBHOOK_URL")
+    if not webhook_url:
+        application.run_polling(allowed_updates=allowed_updates)
+        return
+    
+    url_path = os.environ.get("WEBHOOK_PATH", "telegram").strip("/")
+    logger.info(f"Starting webhook on {webhook_url.rstrip('/')}/{url_path}")
+    application.run_webhook(
+        listen=os.environ.get("WEBHOOK_LISTEN", "0.0.0.0"),
+        port=int(os.environ.get("PORT", 8443)),
+        url_path=url_path,
+        webhook_url=f"{webhook_url.rstrip('/')}/{url_path}",
+        secret_token=os.environ.get("WEBHOOK_SECRET"),
+        allowed_updates=allowed_updates
+    )
@@ -18,6 +18,36 @@ from config import (
 
 logger = logging.getLogger(__name__)
 
+# Supported payment methods in their normalized form, and the error listing them
+_NORMALIZED_PAYMENT_METHODS = frozenset(
+    [m.lower().replace(' ', '_') for m in SUPPORTED_FIAT_METHODS] +
+    [m.lower() for m in SUPPORTED_CRYPTO_METHODS]
+)
+_UNSUPPORTED_METHOD_ERROR = (
+    f"Unsupported payment method. Please choose from: {', '.join(SUPPORTED_FIAT_METHODS + SUPPORTED_CRYPTO_METHODS)}"
+)
+
+# Basic validation patterns for common cryptocurrencies
+_CRYPTO_ADDRESS_PATTERNS = {
+    'bitcoin': re.compile(r'^(bc1|[13])[a-zA-HJ-NP-Z0-9]{25,62}$'),
+    'ethereum': re.compile(r'^0x[a-fA-F0-9]{40}$'),
+    'litecoin': re.compile(r'^[LM3][a-km-zA-HJ-NP-Z1-9]{26,33}$'),
+    'usdt': re.compile(r'^0x[a-fA-F0-9]{40}$|^T[a-zA-Z0-9]{33}$')  # ERC-20 or TRC-20
+}
+
+_TRANSACTION_ID_RE = re.compile(r'^[a-zA-Z0-9-]{4,36}$')
+
+# Valid transaction status transitions
+_VALID_TRANSITIONS = {
+    TransactionStatus.CREATED: frozenset({TransactionStatus.FUNDED, TransactionStatus.CANCELLED}),
+    TransactionStatus.FUNDED: frozenset({TransactionStatus.CONFIRMED, TransactionStatus.DISPUTED, TransactionStatus.REFUNDED}),
+    TransactionStatus.CONFIRMED: frozenset({TransactionStatus.COMPLETED, TransactionStatus.DISPUTED}),
+    TransactionStatus.DISPUTED: frozenset({TransactionStatus.COMPLETED, TransactionStatus.REFUNDED, TransactionStatus.CANCELLED}),
+    TransactionStatus.COMPLETED: frozenset(),  # Terminal state
+    TransactionStatus.REFUNDED: frozenset(),   # Terminal state
+    TransactionStatus.CANCELLED: frozenset()   # Terminal state
+}
+
 def validate_transaction_amount(amount: Union[str, float]) -> Tuple[bool, Optional[float], Optional[str]]:
     """
     Validate a transaction amount.
@@ -65,15 +95,10 @@ def validate_payment_method(method: str) -> Tuple[bool, Optional[str]]:
     normalized_method = method.lower().replace(' ', '_')
     
     # Check against supported methods
-    for fiat_method in SUPPORTED_FIAT_METHODS:
-        if fiat_method.lower().replace(' ', '_') == normalized_method:
-            return True, None
-    
-    for crypto_method in SUPPORTED_CRYPTO_METHODS:
-        if crypto_method.lower() == normalized_method:
-            return True, None
+    if normalized_method in _NORMALIZED_PAYMENT_METHODS:
+        return True, None
     
-    return False, f"Unsupported payment method. Please choose from: {', '.join(SUPPORTED_FIAT_METHODS + SUPPORTED_CRYPTO_METHODS)}"
+    return False, _UNSUPPORTED_METHOD_ERROR
 
 def validate_transaction_status_transition(current_status: str, new_status: str) -> Tuple[bool, Optional[str]]:
     """
@@ -86,18 +111,7 @@ def validate_transaction_status_transition(current_status: str, new_status: str)
     Returns:
         Tuple (is_valid, error_message)
     """
-    # Define valid transitions
-    valid_transitions = {
-        TransactionStatus.CREATED: [TransactionStatus.FUNDED, TransactionStatus.CANCELLED],
-        TransactionStatus.FUNDED: [TransactionStatus.CONFIRMED, TransactionStatus.DISPUTED, TransactionStatus.REFUNDED],
-        TransactionStatus.CONFIRMED: [TransactionStatus.COMPLETED, TransactionStatus.DISPUTED],
-        TransactionStatus.DISPUTED: [TransactionStatus.COMPLETED, TransactionStatus.REFUNDED, TransactionStatus.CANCELLED],
-        TransactionStatus.COMPLETED: [],  # Terminal state
-        TransactionStatus.REFUNDED: [],   # Terminal state
-        TransactionStatus.CANCELLED: []   # Terminal state
-    }
-    
-    if new_status in valid_transitions.get(current_status, []):
+    if new_status in _VALID_TRANSITIONS.get(current_status, ()):
         return True, None
     
     return False, f"Invalid status transition from '{current_status}' to '{new_status}'"
@@ -113,19 +127,11 @@ def validate_crypto_address(crypto_type: str, address: str) -> Tuple[bool, Optio
     Returns:
         Tuple (is_valid, error_message)
     """
-    # Basic validation patterns for common cryptocurrencies
-    validation_patterns = {
-        'bitcoin': r'^(bc1|[13])[a-zA-HJ-NP-Z0-9]{25,62}$',
-        'ethereum': r'^0x[a-fA-F0-9]{40}$',
-        'litecoin': r'^[LM3][a-km-zA-HJ-NP-Z1-9]{26,33}$',
-        'usdt': r'^0x[a-fA-F0-9]{40}$|^T[a-zA-Z0-9]{33}$'  # ERC-20 or TRC-20
-    }
-    
     # Normalize crypto type
     crypto_type = crypto_type.lower()
     
     # Get the appropriate pattern
-    pattern = validation_patterns.get(crypto_type)
+    pattern = _CRYPTO_ADDRESS_PATTERNS.get(crypto_type)
     
     if not pattern:
         # For unsupported types, just check if it's not empty and has a reasonable length
@@ -134,7 +140,7 @@ def validate_crypto_address(crypto_type: str, address: str) -> Tuple[bool, Optio
         return True, None
     
     # Check against the pattern
-    if re.match(pattern, address):
+    if pattern.match(address):
         return True, None
     
     return False, f"Invalid {crypto_type} address format"
@@ -151,10 +157,11 @@ def validate_user_input(text: str, min_length: int = 1, max_length: int = 500) -
     Returns:
         Tuple (is_valid, error_message)
     """
-    if not text or len(text.strip()) < min_length:
+    length = len(text.strip()) if text else 0
+    if length < min_length:
         return False, f"Text must be at least {min_length} characters long"
     
-    if len(text.strip()) > max_length:
+    if length > max_length:
         return False, f"Text cannot exceed {max_length} characters"
     
     return True, None
@@ -170,7 +177,7 @@ def validate_transaction_id(transaction_id: str) -> Tuple[bool, Optional[str]]:
         Tuple (is_valid, error_message)
     """
     # Check if it's alphanumeric and has the right length
-    if not re.match(r'^[a-zA-Z0-9-]{4,36}$', transaction_id):
+    if not _TRANSACTION_ID_RE.match(transaction_id):
         return False, "Invalid transaction ID format"
     
     return True, None
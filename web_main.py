@@ -0,0 +1,26 @@
+"""
+Web interface for the Telegram Escrow Bot.
+Serves the landing and features pages; kept apart from the bot process so the
+bot never loads Flask.
+"""
+import os
+from flask import Flask, render_template
+
+# Create Flask app
+app = Flask(__name__)
+
+# Set secret key
+app.secret_key = os.environ.get("SESSION_SECRET", os.urandom(24))
+
+# Get bot username for the template
+bot_username = os.environ.get("BOT_USERNAME", "Secure_P2P_bot")
+
+@app.route('/')
+def index():
+    """Main page that displays information about the bot."""
+    return render_template('index.html', bot_username=bot_username)
+
+@app.route('/features')
+def features():
+    """Page with detailed features of the escrow bot."""
+    return render_template('features.html', bot_username=bot_username)